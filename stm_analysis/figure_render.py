@@ -0,0 +1,398 @@
+import time                                 # Standard time module to measure the time taken to render each frame
+import threading                            # Standard threading module to perform the rendering in the background
+import traceback                            # Standard traceback module to report the errors of the background renders
+from concurrent.futures import Future       # Standard future, to wait for the calls passed to the main thread
+import numpy as np                          # Standard numpy module
+import matplotlib                           # Standard matplotlib module to find the backend that is in use
+import matplotlib.pyplot as plt             # Standard matplotlib module in regards to plotting all figures
+from matplotlib.figure import Figure        # Standard matplotlib figure class, used without the pyplot figure manager
+from matplotlib.backends.backend_agg import FigureCanvasAgg  # Standard matplotlib canvas to render static figures
+import ipywidgets as ipy                    # Standard ipywidgets module that holds all widget functionality
+from IPython.core.interactiveshell import InteractiveShell  # Specific module to format the figures for display
+
+# Information about the "figure_render.py" module
+__version__ = "1.00"
+__date__ = "19th October 2026"
+__status__ = "Pending"
+
+__authors__ = "Procopi Constantinou & Tobias Gill"
+__email__ = "procopios.constantinou.16@ucl.ac.uk"
+
+
+# 1.0 - Defining the function that determines whether the figures can be updated interactively
+def static_backend():
+    """
+    Return True if the matplotlib backend only renders static images (such as the inline backend of a notebook), in
+    which case an updated figure must be re-displayed. Otherwise, the figure canvas is an interactive widget that is
+    displayed once and redrawn in place.
+    """
+    backend = matplotlib.get_backend().lower()
+    return 'inline' in backend or backend in ('agg', 'pdf', 'ps', 'svg', 'cairo', 'template')
+
+
+def _kernel_loop():
+    """
+    Return the event loop of the IPython kernel, which runs on the main thread, or None if there is no kernel.
+    """
+    if not InteractiveShell.initialized():
+        return None
+    kernel = getattr(InteractiveShell.instance(), 'kernel', None)
+    return getattr(kernel, 'io_loop', None)
+
+
+def main_thread_call(func, *args):
+    """
+    Call a function on the main thread, where the figures must be drawn and the widgets updated. From a background
+    thread, the call is passed to the event loop of the IPython kernel and is waited for, so that the artists are not
+    changed whilst they are drawn. On the main thread, or without a kernel, the function is called directly.
+
+    :param func: Function to be called.
+    :param args: Arguments of the function.
+    :return: The return value of the function.
+    """
+    loop = _kernel_loop()
+    if loop is None or threading.current_thread() is threading.main_thread():
+        return func(*args)
+    future = Future()
+
+    def run():
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(func(*args))
+            except BaseException as error:
+                future.set_exception(error)
+    loop.add_callback(run)
+    return future.result()
+
+
+def axes_pixel_shape(ax):
+    """
+    Return the size of the axes on the screen, in (rows, columns) of pixels.
+
+    :param ax: The matplotlib axes.
+    :return: Tuple of the (rows, columns) of pixels covered by the axes.
+    """
+    extent = ax.get_window_extent()
+    return int(np.ceil(extent.height)), int(np.ceil(extent.width))
+
+
+def update_lines(ax, lines, xs, ys, *args, **kwargs):
+    """
+    Update a pool of line artists in place, to one line for each of the given curves. The existing lines are re-used,
+    only the extra lines that are needed are created, and any surplus lines are removed from the axes.
+
+    :param ax: The matplotlib axes.
+    :param lines: List of the line artists returned by a previous call (or an empty list).
+    :param xs: List of the 1D arrays of the x-data of each curve (or a single 1D array shared by all the curves).
+    :param ys: List of the 1D arrays of the y-data of each curve.
+    :param args: Format arguments of 'plot', for the lines that are created.
+    :param kwargs: Keyword arguments of 'plot', for the lines that are created.
+    :return: List of the line artists, one for each curve.
+    """
+    ys = list(ys)
+    if len(ys) > 0 and np.ndim(xs[0]) == 0:
+        xs = [xs] * len(ys)
+    lines = list(lines)
+    while len(lines) < len(ys):
+        lines.append(ax.plot([], [], *args, **kwargs)[0])
+    for line in lines[len(ys):]:
+        line.remove()
+    lines = lines[:len(ys)]
+    for line, x, y in zip(lines, xs, ys):
+        line.set_data(x, y)
+    return lines
+
+
+def set_fill(fill, x, y1, y2=0):
+    """
+    Update the area of a 'fill_between' collection in place, to the area between the two given curves.
+
+    :param fill: The PolyCollection returned by 'fill_between'.
+    :param x: 1D array of the x-data.
+    :param y1: 1D array (or scalar) of the first curve.
+    :param y2: 1D array (or scalar) of the second curve.
+    """
+    x = np.asarray(x, dtype=float)
+    if x.size == 0:
+        fill.set_verts([])
+        return
+    y1, y2 = np.broadcast_to(y1, x.shape), np.broadcast_to(y2, x.shape)
+    fill.set_verts([np.column_stack((np.concatenate((x, x[::-1])), np.concatenate((y1, y2[::-1]))))])
+
+
+def set_errorbar(errorbar, x, y, xerr, yerr):
+    """
+    Update the curve and error bars of an 'errorbar' container in place.
+
+    :param errorbar: The ErrorbarContainer returned by 'errorbar', with both x- and y-errors and no caps.
+    :param x: 1D array of the x-data.
+    :param y: 1D array of the y-data.
+    :param xerr: Scalar (or 1D array) of the x-errors.
+    :param yerr: Scalar (or 1D array) of the y-errors.
+    """
+    data_line, _, (x_bars, y_bars) = errorbar.lines
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    data_line.set_data(x, y)
+    x_bars.set_segments(np.stack((np.column_stack((x - xerr, y)), np.column_stack((x + xerr, y))), axis=1))
+    y_bars.set_segments(np.stack((np.column_stack((x, y - yerr)), np.column_stack((x, y + yerr))), axis=1))
+
+
+def rescale(ax, fills=()):
+    """
+    Re-compute the data limits of the axes from its updated artists, and autoscale its view to them. The lines and
+    images are found by 'relim', whilst the areas of the given fill collections are added to the limits.
+
+    :param ax: The matplotlib axes.
+    :param fills: List of the fill collections whose areas are included in the limits.
+    """
+    ax.relim()
+    for fill in fills:
+        for path in fill.get_paths():
+            if len(path.vertices) > 0:
+                ax.update_datalim(path.vertices)
+    # The autoscaling keeps the direction of the axes, which may have been reversed by a fixed limit
+    ax.set_xlim(sorted(ax.get_xlim()))
+    ax.set_ylim(sorted(ax.get_ylim()))
+    ax.set_autoscale_on(True)
+    ax.autoscale_view()
+
+
+# 2.0 - Defining the class object of a figure that is built once, with all of its artists then updated in place
+class LiveFigure(object):
+    def __init__(self, figsize):
+        """
+        Defines the initialisation of the class object.
+        figsize:    Size (width, height) of the figure in inches.
+        """
+        self.static = static_backend()              # Boolean as to whether the figure is rendered as a static image
+        # - A static figure is created without the pyplot manager, so that it is never shown or closed automatically
+        if self.static:
+            self.fig = Figure(figsize=figsize)
+            FigureCanvasAgg(self.fig)
+        else:
+            self.fig = plt.figure(figsize=figsize)
+        self.axes = dict()                          # Dictionary of the axes of the figure
+        self.artists = dict()                       # Dictionary of the artists of the figure that are updated in place
+        self.layout_key = None                      # Key of everything in the figure that is not blitted
+        self.background = None                      # Saved background of the figure, used for blitting
+
+    def draw(self, layout_key=None, blit_artists=()):
+        """
+        Redraw the figure after its artists have been updated in place. If only the given artists have changed since the
+        last full draw (the layout key is unchanged), they are blitted over the saved background, otherwise the whole
+        figure is redrawn. A static figure is rendered when it is displayed, so nothing is done here. The figure is
+        always drawn on the main thread (see 'main_thread_call').
+
+        :param layout_key: Hashable key of all the figure content that is not blitted (ticks, labels, colorbars...).
+        :param blit_artists: List of the artists that can be blitted.
+        :return: True if the artists were blitted, and False otherwise.
+        """
+        if self.static:
+            return False
+        return main_thread_call(self._draw, layout_key, blit_artists)
+
+    def _draw(self, layout_key, blit_artists):
+        """
+        Redraw the figure, by blitting or in full, on the main thread (see 'draw').
+        """
+        canvas = self.fig.canvas
+        blit_artists = [artist for artist in blit_artists if artist is not None]
+        can_blit = getattr(canvas, 'supports_blit', False) and len(blit_artists) > 0
+        # Blit the artists over the saved background, if nothing else in the figure has changed
+        if can_blit and self.background is not None and layout_key is not None and layout_key == self.layout_key:
+            canvas.restore_region(self.background)
+            for artist in blit_artists:
+                self.fig.draw_artist(artist)
+            canvas.blit(self.fig.bbox)
+            canvas.flush_events()
+            return True
+        # Otherwise, redraw the full figure and save its background without the blitted artists
+        self.layout_key = layout_key
+        if can_blit:
+            for artist in blit_artists:
+                artist.set_animated(True)
+            canvas.draw()
+            self.background = canvas.copy_from_bbox(self.fig.bbox)
+            for artist in blit_artists:
+                self.fig.draw_artist(artist)
+            canvas.blit(self.fig.bbox)
+        else:
+            canvas.draw_idle()
+        return False
+
+
+# 3.0 - Defining the class object that displays the live figures and measures the time taken to render each frame
+class FigureDisplay(object):
+    def __init__(self):
+        """
+        Defines the initialisation of the class object.
+        """
+        self.output = ipy.Output()                  # Output widget that holds the displayed figures
+        self.shown = None                           # Tuple of the live figures that are currently displayed
+        self.figure_outputs = tuple()               # Tuple of the outputs of the figures that are displayed
+        self.errors = list()                        # List of the outputs of the errors, shown below the figures
+        self.frame_start = None                     # Time at which the current frame was started
+        self.frame_times = list()                   # List of the time taken to render each frame (in seconds)
+
+    def begin(self):
+        """
+        Mark the start of a new frame, before any of the numerical analysis or updating of the artists.
+        """
+        self.frame_start = time.perf_counter()
+
+    def show(self, *figures):
+        """
+        Show the live figures after they have been updated. Static figures are re-displayed for every frame, whereas
+        interactive figures are only displayed when a different set of figures is to be shown. The figures are always
+        shown on the main thread (see 'main_thread_call'), and any errors that have been reported are kept below them.
+
+        :param figures: The LiveFigure instances to be shown.
+        """
+        main_thread_call(self._show, figures)
+
+    def _show(self, figures):
+        """
+        Show the live figures and record the frame time, on the main thread (see 'show').
+        """
+        if any(live_fig.static for live_fig in figures) or self.shown != figures:
+            fmt = InteractiveShell.instance().display_formatter.format
+            outputs = list()
+            for live_fig in figures:
+                data, metadata = fmt(live_fig.fig if live_fig.static else live_fig.fig.canvas)
+                outputs.append({'output_type': 'display_data', 'data': data, 'metadata': metadata})
+            self.figure_outputs = tuple(outputs)
+            self.output.outputs = self.figure_outputs + tuple(self.errors)
+        self.shown = figures
+        # Record the time taken to render the frame
+        if self.frame_start is not None:
+            self.frame_times.append(time.perf_counter() - self.frame_start)
+            self.frame_start = None
+
+    def append_stderr(self, text):
+        """
+        Report an error below the figures, where it is kept as the figures are re-displayed until 'clear_errors'.
+
+        :param text: Text of the error.
+        """
+        self.errors.append({'output_type': 'stream', 'name': 'stderr', 'text': text})
+        main_thread_call(self._refresh)
+
+    def clear_errors(self):
+        """
+        Remove all of the errors that are shown below the figures.
+        """
+        self.errors = list()
+        main_thread_call(self._refresh)
+
+    def _refresh(self):
+        """
+        Display the outputs of the figures followed by the errors, on the main thread.
+        """
+        self.output.outputs = self.figure_outputs + tuple(self.errors)
+
+    def frame_time_stats(self):
+        """
+        Return the statistics of the time taken to render each frame.
+
+        :return: Dictionary of the number of frames and the last, mean, median and maximum frame times (in ms).
+        """
+        frame_times = 1e3 * np.array(self.frame_times)
+        if len(frame_times) == 0:
+            return {'frames': 0}
+        return {'frames': len(frame_times), 'last': frame_times[-1], 'mean': np.mean(frame_times),
+                'median': np.median(frame_times), 'max': np.max(frame_times)}
+
+
+# 4.0 - Defining the scheduler that debounces the widget events and performs the updates in the background
+class JobCancelled(Exception):
+    """
+    Raised within an update when a newer widget event has made it stale, so that its remaining work is dropped.
+    """
+    pass
+
+
+class RenderScheduler(object):
+    def __init__(self, job, output=None, delay=0.2):
+        """
+        Defines the initialisation of the class object. A burst of widget events is coalesced into a single update,
+        which is run on a background thread once no further events have arrived for 'delay' seconds. Only the latest
+        update is ever run, and an update that has been superseded by a newer event is dropped at its next 'check'.
+        job:        Function that performs the update, given the values of the widgets as keyword arguments.
+        output:     Output widget (or FigureDisplay) onto which any errors of the update are written.
+        delay:      Time (in seconds) to wait for further events (if None, every update is run immediately).
+        """
+        self.job = job                              # Function that performs the update
+        self.output = output                        # Output widget to report the errors of the update
+        self.delay = delay                          # Debounce time, in seconds, between the events and the update
+        self.generation = 0                         # Integer that is incremented for each widget event
+        self.pending = None                         # Tuple (generation, time, kwargs) of the latest event to be run
+        self.cancelled = 0                          # Number of updates that were dropped as they became stale
+        self.condition = threading.Condition()      # Condition to notify the worker thread of a new event
+        self.local = threading.local()              # Thread-local generation of the update that is running
+        self.worker = None                          # Background thread that runs the updates
+
+    def submit(self, **kwargs):
+        """
+        Submit a new widget event, which supersedes all of the events before it.
+
+        :param kwargs: The values of the widgets, which are passed to the update.
+        """
+        with self.condition:
+            self.generation += 1
+            self.pending = (self.generation, time.monotonic(), kwargs)
+            self.condition.notify()
+        # If there is no debouncing, the update is run immediately
+        if self.delay is None:
+            self.run_pending()
+            return
+        # Start the background thread if it is not already running
+        if self.worker is None or not self.worker.is_alive():
+            self.worker = threading.Thread(target=self.work, daemon=True)
+            self.worker.start()
+
+    def work(self):
+        """
+        Background thread that waits for the widget events to settle and then runs the latest update.
+        """
+        while True:
+            with self.condition:
+                while self.pending is None:
+                    self.condition.wait()
+                # Wait until no further event has arrived for the debounce time
+                while True:
+                    remaining = self.pending[1] + self.delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+            self.run_pending()
+
+    def run_pending(self):
+        """
+        Run the update of the latest widget event, if it has not already been run.
+        """
+        with self.condition:
+            if self.pending is None:
+                return
+            generation, _, kwargs = self.pending
+            self.pending = None
+        self.local.generation = generation
+        try:
+            self.job(**kwargs)
+        except JobCancelled:
+            self.cancelled += 1
+        except Exception:
+            if self.output is None:
+                raise
+            self.output.append_stderr(traceback.format_exc())
+        finally:
+            self.local.generation = None
+
+    def check(self):
+        """
+        Check whether the update that is running has been superseded by a newer widget event, in which case it is
+        dropped by raising 'JobCancelled'. This is called between each of the expensive stages of an update, and just
+        before its figures are shown, so only the latest result is ever displayed.
+        """
+        generation = getattr(self.local, 'generation', None)
+        if generation is not None and generation != self.generation:
+            raise JobCancelled()
@@ -0,0 +1,337 @@
+import os                                   # Standard os module to read the choice of kernel backend
+import time                                 # Standard time module to benchmark the kernel backends
+import numpy as np                          # Standard numpy module
+from scipy import ndimage                   # Standard scipy module for the reference local maxima filter
+try:
+    import numba                            # Optional numba module to compile the pixel-loop kernels
+except ImportError:
+    numba = None
+
+# Information about the "kernels.py" module
+__version__ = "1.00"
+__date__ = "19th October 2026"
+__status__ = "Pending"
+
+__authors__ = "Procopi Constantinou & Tobias Gill"
+__email__ = "procopios.constantinou.16@ucl.ac.uk"
+
+
+# 1.0 - Defining the pure numpy kernels, which are the reference implementation of every kernel
+def _row_median_numpy(topo_data):
+    """
+    Return the median of every row of the topography data.
+    """
+    return np.median(topo_data, axis=1)
+
+
+def _run_mask_numpy(flags, min_length):
+    """
+    Return the mask of all the runs of at least 'min_length' consecutive flagged pixels along each row.
+    """
+    rows, cols = flags.shape
+    padded = np.zeros((rows, cols + 2), dtype=np.int8)
+    padded[:, 1:-1] = flags
+    # - The starts and ends of every run, which alternate along each row in row-major order
+    edges = np.diff(padded, axis=1)
+    start_rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    keep = (ends - starts) >= min_length
+    # - Marking the kept runs by the cumulative sum of their starts and ends
+    delta = np.zeros((rows, cols + 1), dtype=np.int32)
+    np.add.at(delta, (start_rows[keep], starts[keep]), 1)
+    np.add.at(delta, (start_rows[keep], ends[keep]), -1)
+    return np.cumsum(delta, axis=1)[:, :-1] > 0
+
+
+def _local_maxima_numpy(topo_data, radius, threshold):
+    """
+    Return the mask of the pixels that are the maximum of the square window of the given radius around them.
+    """
+    peaks = ndimage.maximum_filter(topo_data, size=2 * radius + 1, mode='nearest') == topo_data
+    return peaks & (topo_data > threshold)
+
+
+def _simpson_numpy(y, dx):
+    """
+    Return the composite Simpson integral along the last axis of every row of the array. An even number of samples
+    is integrated by the average of the two Simpson integrals that each use a trapezoid at one end.
+    """
+    n = y.shape[-1]
+    if n < 2:
+        return np.zeros(y.shape[:-1])
+    if n == 2:
+        return 0.5 * dx * (y[..., 0] + y[..., 1])
+    if n % 2 == 1:
+        return dx / 3. * (y[..., 0] + y[..., -1] + 4 * np.sum(y[..., 1:-1:2], axis=-1) +
+                          2 * np.sum(y[..., 2:-1:2], axis=-1))
+    first = _simpson_numpy(y[..., :-1], dx) + 0.5 * dx * (y[..., -2] + y[..., -1])
+    last = _simpson_numpy(y[..., 1:], dx) + 0.5 * dx * (y[..., 0] + y[..., 1])
+    return 0.5 * (first + last)
+
+
+# 2.0 - Defining the numba kernels, which are compiled loops that give the same results as the numpy kernels
+if numba is not None:
+    @numba.njit(parallel=True, cache=True)
+    def _row_median_numba(topo_data):
+        medians = np.empty(topo_data.shape[0])
+        for r in numba.prange(topo_data.shape[0]):
+            medians[r] = np.median(topo_data[r])
+        return medians
+
+    @numba.njit(parallel=True, cache=True)
+    def _run_mask_numba(flags, min_length):
+        rows, cols = flags.shape
+        mask = np.zeros((rows, cols), dtype=np.bool_)
+        for r in numba.prange(rows):
+            length = 0
+            for c in range(cols + 1):
+                if c < cols and flags[r, c]:
+                    length += 1
+                    continue
+                if length >= min_length:
+                    for k in range(c - length, c):
+                        mask[r, k] = True
+                length = 0
+        return mask
+
+    @numba.njit(parallel=True, cache=True)
+    def _local_maxima_numba(topo_data, radius, threshold):
+        rows, cols = topo_data.shape
+        peaks = np.zeros((rows, cols), dtype=np.bool_)
+        for r in numba.prange(rows):
+            for c in range(cols):
+                value = topo_data[r, c]
+                if not value > threshold:
+                    continue
+                is_peak = True
+                for rr in range(max(r - radius, 0), min(r + radius + 1, rows)):
+                    for cc in range(max(c - radius, 0), min(c + radius + 1, cols)):
+                        if topo_data[rr, cc] > value:
+                            is_peak = False
+                            break
+                    if not is_peak:
+                        break
+                peaks[r, c] = is_peak
+        return peaks
+
+    @numba.njit(cache=True)
+    def _simpson_row(y, start, stop, dx):
+        # Composite Simpson integral over an odd number of samples y[start:stop]
+        total = y[start] + y[stop - 1]
+        for k in range(start + 1, stop - 1):
+            total += (4. if (k - start) % 2 == 1 else 2.) * y[k]
+        return dx / 3. * total
+
+    @numba.njit(parallel=True, cache=True)
+    def _simpson_numba_2d(y, dx):
+        rows, n = y.shape
+        result = np.zeros(rows)
+        for r in numba.prange(rows):
+            row = y[r]
+            if n < 2:
+                result[r] = 0.
+            elif n == 2:
+                result[r] = 0.5 * dx * (row[0] + row[1])
+            elif n % 2 == 1:
+                result[r] = _simpson_row(row, 0, n, dx)
+            else:
+                first = _simpson_row(row, 0, n - 1, dx) + 0.5 * dx * (row[n - 2] + row[n - 1])
+                last = _simpson_row(row, 1, n, dx) + 0.5 * dx * (row[0] + row[1])
+                result[r] = 0.5 * (first + last)
+        return result
+
+    def _simpson_numba(y, dx):
+        flat = np.ascontiguousarray(y.reshape((-1, y.shape[-1])))
+        return _simpson_numba_2d(flat, float(dx)).reshape(y.shape[:-1])
+
+
+# 3.0 - Defining the choice of the kernel backend, which is made at import and can be changed at any time
+# - Dictionary of the kernels of each available backend
+BACKENDS = {'numpy': {'row median': _row_median_numpy, 'run mask': _run_mask_numpy,
+                      'local maxima': _local_maxima_numpy, 'simpson': _simpson_numpy}}
+if numba is not None:
+    BACKENDS['numba'] = {'row median': _row_median_numba, 'run mask': _run_mask_numba,
+                         'local maxima': _local_maxima_numba, 'simpson': _simpson_numba}
+# - The numba backend is used whenever it is installed, unless the 'STM_KERNELS' environment variable chooses another
+backend = os.environ.get('STM_KERNELS', 'numba' if numba is not None else 'numpy')
+if backend not in BACKENDS:
+    backend = 'numpy'
+
+
+def set_backend(name):
+    """
+    Choose the backend of all the kernels.
+
+    :param name: Name of the backend; 'numpy' or 'numba' (if numba is installed).
+    """
+    global backend
+    if name not in BACKENDS:
+        raise ValueError("The '{}' kernel backend is not available; choose from {}.".format(name, list(BACKENDS)))
+    backend = name
+
+
+def _kernel(name, using=None):
+    """
+    Return a kernel of the chosen backend (if None, the current backend is used).
+    """
+    return BACKENDS[backend if using is None else using][name]
+
+
+# 4.0 - Defining the public kernels, which prepare their inputs and then call the kernel of the chosen backend
+def row_median_level(topo_data, using=None):
+    """
+    Subtract the median of every scan line from the topography data, which levels the offsets between the lines
+    without being pulled by the particles or steps along them, and zero the bottom of the resulting scan.
+
+    :param topo_data: 2D numpy array of the topography data.
+    :param using: Name of the backend to use (if None, the current backend is used).
+    :return: 2D array of the leveled topography data.
+    """
+    topo_data = np.ascontiguousarray(topo_data, dtype=float)
+    leveled = topo_data - _kernel('row median', using)(topo_data)[:, None]
+    return leveled - np.amin(leveled)
+
+
+def scar_mask(topo_data, threshold=4.0, min_length=8, using=None):
+    """
+    Find the scars (streaks) of the topography data, which are runs of pixels along a scan line that all stand above
+    (or below) the lines above and below them by more than 'threshold' robust standard deviations.
+
+    :param topo_data: 2D numpy array of the topography data.
+    :param threshold: Threshold of the deviation from the neighbouring lines, in robust standard deviations.
+    :param min_length: Minimum number of consecutive pixels along a line for a run to be a scar.
+    :param using: Name of the backend to use (if None, the current backend is used).
+    :return: 2D boolean array of the scar pixels.
+    """
+    topo_data = np.asarray(topo_data, dtype=float)
+    # The deviation of every line from the mean of the lines above and below, where the edge lines are repeated
+    padded = np.pad(topo_data, ((1, 1), (0, 0)), mode='edge')
+    deviation = topo_data - 0.5 * (padded[:-2] + padded[2:])
+    spread = 1.4826 * np.median(np.abs(deviation - np.median(deviation)))
+    limit = threshold * max(spread, np.finfo(float).tiny)
+    return run_mask(deviation > limit, min_length, using) | run_mask(deviation < -limit, min_length, using)
+
+
+def run_mask(flags, min_length, using=None):
+    """
+    Find all the runs of at least 'min_length' consecutive flagged pixels along each row.
+
+    :param flags: 2D boolean numpy array of the flagged pixels.
+    :param min_length: Minimum number of consecutive flagged pixels for a run to be kept.
+    :param using: Name of the backend to use (if None, the current backend is used).
+    :return: 2D boolean array of the pixels within the kept runs.
+    """
+    return _kernel('run mask', using)(np.ascontiguousarray(flags, dtype=bool), int(min_length))
+
+
+def local_maxima(topo_data, radius=1, threshold=-np.inf, using=None):
+    """
+    Find the local maxima of the topography data, which are the pixels that are not exceeded by any pixel within the
+    square window of the given radius around them.
+
+    :param topo_data: 2D numpy array of the topography data.
+    :param radius: Radius (in pixels) of the square window.
+    :param threshold: Value that a local maximum must exceed.
+    :param using: Name of the backend to use (if None, the current backend is used).
+    :return: 2D integer array of the (row, column) of every local maximum, in row-major order.
+    """
+    topo_data = np.ascontiguousarray(topo_data, dtype=float)
+    peaks = _kernel('local maxima', using)(topo_data, int(radius), float(threshold))
+    return np.argwhere(peaks)
+
+
+def simpson(y, dx=1.0, using=None):
+    """
+    Integrate every row of the array along its last axis by the composite Simpson rule, with all the rows integrated
+    together. An even number of samples is integrated by the average of the two Simpson integrals that each use a
+    trapezoid at one end.
+
+    :param y: Numpy array of the samples, of shape (..., samples).
+    :param dx: Spacing of the samples.
+    :param using: Name of the backend to use (if None, the current backend is used).
+    :return: Array of the integral of each row, of shape (...).
+    """
+    return _kernel('simpson', using)(np.asarray(y, dtype=float), dx)
+
+
+# 5.0 - Defining the parity checks and benchmarks of the kernel backends
+def _parity_inputs(shape=(256, 256), seed=0):
+    """
+    Return the test inputs of the parity checks and benchmarks, which are a rough topography with added scars.
+    """
+    rng = np.random.RandomState(seed)
+    topo_data = ndimage.gaussian_filter(rng.rand(*shape), 2) + 0.01 * rng.randn(*shape)
+    topo_data[shape[0] // 3, shape[1] // 4:shape[1] // 2] += 0.2
+    topo_data[2 * shape[0] // 3, shape[1] // 2:] -= 0.2
+    spectra = rng.rand(shape[0], shape[1] + 1)
+    return topo_data, spectra
+
+
+def check_parity(shape=(256, 256), tol=1e-9):
+    """
+    Check that every backend gives the same results as the numpy reference kernels.
+
+    :param shape: Shape of the test topography data.
+    :param tol: Largest difference allowed between the floating point results.
+    :return: Dictionary of the largest difference (or number of differing pixels) of each kernel of each backend.
+    """
+    topo_data, spectra = _parity_inputs(shape)
+    reference = {'row median': row_median_level(topo_data, using='numpy'),
+                 'scars': scar_mask(topo_data, using='numpy'),
+                 'maxima': local_maxima(topo_data, radius=2, using='numpy'),
+                 'simpson odd': simpson(spectra, 0.01, using='numpy'),
+                 'simpson even': simpson(spectra[:, :-1], 0.01, using='numpy')}
+    # The reference Simpson integral is itself checked against the exact integral of a cubic
+    x = np.linspace(0, 2, 101)
+    assert abs(simpson(x ** 3, x[1] - x[0], using='numpy') - 4.) < tol
+    results = dict()
+    for name in BACKENDS:
+        diff = {'row median': np.max(np.abs(row_median_level(topo_data, using=name) - reference['row median'])),
+                'scars': int(np.sum(scar_mask(topo_data, using=name) != reference['scars'])),
+                'maxima': int(not np.array_equal(local_maxima(topo_data, radius=2, using=name),
+                                                 reference['maxima'])),
+                'simpson odd': np.max(np.abs(simpson(spectra, 0.01, using=name) - reference['simpson odd'])),
+                'simpson even': np.max(np.abs(simpson(spectra[:, :-1], 0.01, using=name) -
+                                              reference['simpson even']))}
+        for kernel, value in diff.items():
+            assert value <= tol, "The '{}' kernel of the '{}' backend differs by {}.".format(kernel, name, value)
+        results[name] = diff
+    return results
+
+
+def benchmark(shape=(1024, 1024), repeat=5):
+    """
+    Time every kernel of every backend, where the first call of each kernel (which includes any compilation) is not
+    timed.
+
+    :param shape: Shape of the test topography data.
+    :param repeat: Number of timed calls of each kernel.
+    :return: Dictionary of the best time (in ms) of each kernel of each backend.
+    """
+    topo_data, spectra = _parity_inputs(shape)
+    calls = {'row median': lambda name: row_median_level(topo_data, using=name),
+             'scars': lambda name: scar_mask(topo_data, using=name),
+             'maxima': lambda name: local_maxima(topo_data, radius=2, using=name),
+             'simpson': lambda name: simpson(spectra, 0.01, using=name)}
+    results = dict()
+    for name in BACKENDS:
+        results[name] = dict()
+        for kernel, call in calls.items():
+            call(name)
+            times = list()
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                call(name)
+                times.append(time.perf_counter() - t0)
+            results[name][kernel] = 1e3 * min(times)
+    return results
+
+
+if __name__ == '__main__':
+    print('Kernel backend in use: ' + backend)
+    print('Parity with the numpy reference kernels:')
+    for name, diff in check_parity().items():
+        print('  {:6s} '.format(name) + ', '.join('{} {:.2g}'.format(k, v) for k, v in sorted(diff.items())))
+    print('Benchmarks (best of 5, in ms):')
+    for name, times in benchmark().items():
+        print('  {:6s} '.format(name) + ', '.join('{} {:.2f}'.format(k, v) for k, v in sorted(times.items())))
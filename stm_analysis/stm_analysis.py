@@ -1,14 +1,17 @@
 import glob                                 # Module to load in all folder for extracting all data from folders
-from copy import deepcopy                   # Module to create deep copies of flat-file instances in topography
 import numpy as np                          # Standard numpy module
 import matplotlib.pyplot as plt             # Standard matplotlib module in regards to plotting all figures
 import matplotlib.patches as patch          # Standard matplotlib module in regards to plotting patches on figures
 from matplotlib.colors import LogNorm       # Standard matplotlib module in regards to creating a log scale colorbar
-from scipy.optimize import leastsq          # Standard scipy module that performs the least square operation
 from scipy.ndimage.interpolation import rotate  # Standard scipy module to perform rotation of topography plots
 import ipywidgets as ipy                    # Standard ipywidgets module that holds all widget functionality
 from IPython.display import display         # Specific module to explicitly display the pre-defined widgets
 import flatfile_3 as ff                     # Module that loads in MATRIX flat-files into python class objects
+import topo_funcs as tf                     # Module that holds the vectorised topography image operations
+import topo_pipeline as tp                  # Module that holds the lazy pipeline of the topography operations
+import figure_render as fr                  # Module that holds the live figures that are updated in place
+import topo_spectrum as ts                  # Module that holds the cached power spectra of the topography scans
+import topo_mosaic as tm                    # Module that holds the mosaics and the deep-zoom export of the scans
 
 # Information about the "stm_analysis.py" module
 __version__ = "2.00"
@@ -132,10 +135,21 @@ class STT(object):
 
         # 2.0.3 - Defining the leveling and image operations
         self.image_props = None                     # Dictionary that contains all the image properties
+        self.image_recipe = None                    # Lazy pipeline of the level and image operations performed
         self.leveled_data = None                    # Attribute that holds the updated level corrected data
-        self.final_data = None                      # Attribute that holds the final topography data after all changes
-
-        # 2.0.4 User interaction
+        self.final_data = None                      # List of the final topography data, evaluated when requested
+        self.stage_cache = tp.StageCache()          # Bounded cache of the loaded, leveled and final topography data
+        self.height_stats = None                    # Dictionary of the roughness statistics of the final topography
+        self.fourier_terms = list()                 # List of the Fourier filter terms set by the user (Bragg masks)
+
+        # 2.0.4 - Defining the figures that are built once and then updated in place
+        self.topo_figure = None                     # Live figure of the main topography scan and its minimap
+        self.other_figure = None                    # Live figure of all the other topography scans
+        self.figure_display = fr.FigureDisplay()    # Output that displays the figures and measures the frame times
+        # - Scheduler that coalesces the widget events and runs only the latest update in the background
+        self.scheduler = fr.RenderScheduler(self.update_function, self.figure_display)
+
+        # 2.0.5 User interaction
         self.widgets = None                         # Widget object to hold all pre-defined widgets
         self.get_widgets()                          # Function to get all of the pre-defined widgets
         self.output = None                          # Output to the user interaction with widgets
@@ -179,7 +193,9 @@ class STT(object):
         # Extract the position of the topography file selected
         self.selected_pos = int(self.file_alias.index(self.selected_file))
         # Extract the topography raw data from the selected flat-file by using the flat-file load function
-        self.selected_data = ff.load(self.flat_files[self.selected_pos])
+        # - The loaded file is cached, so it is only read from disk when a different file is selected
+        file_path = self.flat_files[self.selected_pos]
+        self.selected_data = self.stage_cache.get(('load', file_path), lambda: tf.TopoFile(ff.load(file_path)))
         # Extract the scan-direction
         self.scan_dir = self.scan_dict[scan_dir]
         # Create an array of the minor scan directions
@@ -229,34 +245,14 @@ class STT(object):
         :param scan_dir: flat file scan direction.
         :return: the modified flat-file instance that has been line-subtracted over the scan direction.
         """
-        # Create a new deep copy of the flat file
-        flat_file_copy = deepcopy(flat_file)
-        # Extracting the information from the flat-file
-        topo_info = flat_file_copy[scan_dir].info
-        # - Extract the total number of x, y pixels from the flat file (total number of points in the scan)
-        x_res = topo_info['xres']
-        y_res = topo_info['yres']
-        # - Defining the x domain of the pixels over which the line-subtraction will be performed
-        x_range = np.arange(0, x_res, 1)
-        # Extracting the raw data from the flat-file instance
-        topo_data = flat_file_copy[scan_dir].data
-        # Executing the line-wise subtraction
-        # - Define the flattened topography data array
-        topo_flat_data = np.zeros((y_res, x_res))
-        # - Iterate over all the y-axis pixels
-        for y in range(0, y_res):
-            # Finding the line of best fit through an stm scan line
-            line = np.poly1d(np.polyfit(x_range, topo_data[y], 1))(x_range)
-            # Appending the line subtracted data to the topo_flat_data array
-            topo_flat_data[y] = topo_data[y] - line
-        # Properly zeroing the bottom of the line-wise subtracted scan
-        topo_flat_data = topo_flat_data - np.amin(topo_flat_data)
-        # Modify the copy of the flat-file instance so that the data over the scan direction is linewise subtracted
-        flat_file_copy[scan_dir].data = topo_flat_data
-        # Return the new amended flat file instance.
-        return flat_file_copy
-
-    def topo_localplane(self, flat_file, scan_dir, x0, x1, y0, y1):
+        # Wrap the flat file in a copy-on-write handle, so the other scan directions are shared rather than copied
+        flat_file = tf.TopoFile(flat_file)
+        # Executing the line-wise subtraction over all the scan lines at once, and zeroing the bottom of the scan
+        topo_flat_data = tf.linewise_subtract(flat_file[scan_dir].data)
+        # Return the new flat file instance, where only the data over the scan direction is linewise subtracted
+        return flat_file.replace(scan_dir, topo_flat_data)
+
+    def topo_localplane(self, flat_file, scan_dir, x0, x1, y0, y1, order=1, mask=None):
         """
         Create a copied instance of the flat file after plane flattening an stm image, by fitting to a defined area.
         
@@ -266,79 +262,32 @@ class STT(object):
         :param x1: x-axis plane area final co-ordinate in real units.
         :param y0: y-axis plane area initial co-ordinate in real units.
         :param y1: y-axis plane are final co-ordinate in real units.
+        :param order: Order of the polynomial surface that is fitted (1 = plane).
+        :param mask: Boolean array of the pixels to be included in the fit (None includes every pixel).
         :return: the modified flat-file instance that has been plane-subtracted over the scan direction and given area.
         """
-        # Create a new deep copy of the flat file
-        flat_file_copy = deepcopy(flat_file)
-        # Extracting the information from the flat-file
-        topo_info = flat_file_copy[scan_dir].info
-        # - Extract the total number of x, y pixels from the flat file (total number of points in the scan)
-        x_res = topo_info['xres']
-        y_res = topo_info['yres']
-
-        # Defining the function to determine the residuals of the fitted plane
-        def topo_plane_residuals(param, topo_data, x0, x1, y0, y1):
-            """
-            Calculate the residuals between the real and fit generated data.
-            :param param: List of three fit parameters for the x and y plane gradients, and z offset.
-            :param topo_data: numpy array containing topography data.
-            :param x0: x-axis plane area initial co-ordinate.
-            :param x1: x-axis plane area final co-ordinate.
-            :param y0: y-axis plane area intial co-ordinate.
-            :param y1: y-axis plane area final co-ordinate.
-            :return: Plane corrected data.
-            """
-            # Extracting the parameter information
-            p_x = param[0]
-            p_y = param[1]
-            p_z = param[2]
-            # Determination of the residuals between the real and fitted data
-            diff = []
-            for y in range(y0, y1):
-                for x in range(x0, x1):
-                    diff.append(topo_data[y, x] - (p_x * x + p_y * y + p_z))
-            return diff
-
-        # Defining the function to determine the parameters of the fitted plane
-        def topo_plane_paramEval(param, x_res, y_res):
-            """
-            Generate a plane from given parameters.
-            :param param: List of x, y gradients and z offset.
-            :return: Generated plane data.
-            """
-            # Create an empty numpy array with the same number as pixels as the real data.
-            topo_plane_fit_data = np.zeros((y_res, x_res))
-            for y in range(0, y_res):  # Iterate over the y-axis pixels.
-                for x in range(0, x_res):  # Iterate over the x-axis pixels.
-                    topo_plane_fit_data[y, x] = param[0] * x + param[1] * y + param[2]  # Generate plane value.
-            return topo_plane_fit_data  # Return entire array.
+        # Wrap the flat file in a copy-on-write handle, so the other scan directions are shared rather than copied
+        flat_file = tf.TopoFile(flat_file)
 
         # If the plane area is not well defined, define the starting points to be zero and end points to be the maxima
         if x0 == x1 or y0 == y1:
-            x0 = self.nm2pnt(0, flat_file_copy)
-            x1 = self.nm2pnt(self.selected_data[self.scan_dir].info['xreal'], flat_file_copy)
-            y0 = self.nm2pnt(0, flat_file_copy, axis='y')
-            y1 = self.nm2pnt(self.selected_data[self.scan_dir].info['yreal'], flat_file_copy, axis='y')
+            x0 = self.nm2pnt(0, flat_file)
+            x1 = self.nm2pnt(self.selected_data[self.scan_dir].info['xreal'], flat_file)
+            y0 = self.nm2pnt(0, flat_file, axis='y')
+            y1 = self.nm2pnt(self.selected_data[self.scan_dir].info['yreal'], flat_file, axis='y')
         # If the plane area is well defined, use the given points
         else:
-            x0 = self.nm2pnt(x0, flat_file_copy)
-            x1 = self.nm2pnt(x1, flat_file_copy)
-            y0 = self.nm2pnt(y0, flat_file_copy, axis='y')
-            y1 = self.nm2pnt(y1, flat_file_copy, axis='y')
+            x0 = self.nm2pnt(x0, flat_file)
+            x1 = self.nm2pnt(x1, flat_file)
+            y0 = self.nm2pnt(y0, flat_file, axis='y')
+            y1 = self.nm2pnt(y1, flat_file, axis='y')
 
         # Extracting the raw data from the flat-file instance
-        topo_data = flat_file_copy[scan_dir].data
-        # Initialising the parameters
-        param_init = [1, 1, 1]
-        # Determination of the plane-subtracted topography data
-        topo_plane_lsq = leastsq(topo_plane_residuals, param_init, args=(topo_data, x0, x1, y0, y1))[0]
-        topo_plane_fit = topo_plane_paramEval(topo_plane_lsq, x_res, y_res)
-        topo_data_flattened = topo_data - topo_plane_fit
-        topo_data_flattened = topo_data_flattened - np.amin(topo_data_flattened)
-        # Modify the copy of the flat-file instance so that the data over the scan direction is plane subtracted
-        flat_file_copy[scan_dir].data = topo_data_flattened
-        # Return the new amended flat file instance.
-        return flat_file_copy
+        topo_data = flat_file[scan_dir].data
+        # Determination of the plane-subtracted topography data by solving the normal equations over the plane area
+        topo_data_flattened = tf.poly_surface_subtract(topo_data, order, roi=[x0, x1, y0, y1], mask=mask)
+        # Return the new flat file instance, where only the data over the scan direction is plane subtracted
+        return flat_file.replace(scan_dir, topo_data_flattened)
 
     def topo_rotate(self, flat_file, angle):
         """
@@ -348,24 +297,14 @@ class STT(object):
         :param angle: Rotation angle in degrees.
         :return: New flat file instance with rotated image data.
         """
-        # Create a new deep copy of the flat file
-        flat_file_copy = deepcopy(flat_file)
-
-        # For each scan direction in the flat file rotate the data by the given angle.
-        for scan_dir in flat_file_copy:
-            scan_dir.data = rotate(scan_dir.data, angle)
+        # Defining the metadata pertinent to the new dimensions of the rotated image
+        def rotated_info(info, data):
+            new_res = np.shape(data)
+            return {'xres': new_res[1], 'yres': new_res[0],
+                    'xreal': info['xinc'] * new_res[1], 'yreal': info['yinc'] * new_res[0]}
 
-        new_res = np.shape(flat_file_copy[0].data)  # Get the new pixel resolution from the rotated image.
-
-        # For each scan direction amend the metadata pertinent to the new dimensions.
-        for scan_dir in flat_file_copy:
-            scan_dir.info['xres'] = new_res[1]  # Set new x-axis pixel resolution.
-            scan_dir.info['yres'] = new_res[0]  # Set new y-axis pixel resolution.
-
-            scan_dir.info['xreal'] = scan_dir.info['xinc'] * new_res[1]  # Set new x-axis image size.
-            scan_dir.info['yreal'] = scan_dir.info['yinc'] * new_res[0]  # Set new y-axis image size.
-
-        return flat_file_copy  # Return the new amended flat file instance.
+        # For each scan direction in the flat file rotate the data by the given angle and amend the metadata
+        return tf.TopoFile(flat_file).apply(lambda data: rotate(data, angle), info_func=rotated_info)
 
     def topo_crop(self, flat_file, xmin, xmax, ymin, ymax):
         """
@@ -384,151 +323,68 @@ class STT(object):
         ymin = self.nm2pnt(ymin, flat_file, axis='y')
         ymax = self.nm2pnt(ymax, flat_file, axis='y')
 
-        # Create a new deep copy of the flat file
-        flat_file_copy = deepcopy(flat_file)
+        # Wrap the flat file in a copy-on-write handle, so that unchanged data is shared rather than copied
+        flat_file = tf.TopoFile(flat_file)
 
         # For each scan direction in the flat file crop the data and amend metadata
         # - If the cropping values of the min and max are identical, avoid error and return original flat-file instance
         if xmin == xmax or ymin == ymax:
-            for scan_dir in flat_file_copy:
-                # - Set the minimum real value of the x- and y-axis to be zero as there is no cropping here
-                scan_dir.info['xreal_min'] = 0
-                scan_dir.info['yreal_min'] = 0
-            # - Return new flat file instance.
-            return flat_file_copy
-        # - If the cropping values of the min and max are proper, perform the cropping operation
-        elif xmin < xmax and ymin < ymax:
-            for scan_dir in flat_file_copy:
-                # - Crop the image data
-                scan_dir.data = scan_dir.data[ymin:ymax, xmin:xmax]
-                # - Set new x- and y-axis pixel resolution
-                scan_dir.info['xres'] = xmax - xmin
-                scan_dir.info['yres'] = ymax - ymin
-                # - Preserve the old positions of the x- and y-axis cropping point
-                scan_dir.info['xreal_min'] = scan_dir.info['xinc'] * xmin
-                scan_dir.info['yreal_min'] = scan_dir.info['yinc'] * ymin
-                # - Set new x- and y-axis image size
-                scan_dir.info['xreal'] = scan_dir.info['xreal_min'] + scan_dir.info['xinc'] * scan_dir.info['xres']
-                scan_dir.info['yreal'] = scan_dir.info['yreal_min'] + scan_dir.info['yinc'] * scan_dir.info['yres']
-            # - Return new flat file instance.
-            return flat_file_copy
-        # - If the cropping values of the xmin and xmax are switched, but ymin and ymax are proper
-        elif xmin > xmax and ymin < ymax:
-            for scan_dir in flat_file_copy:
-                # - Crop the image data
-                scan_dir.data = scan_dir.data[ymin:ymax, xmax:xmin]
-                # - Set new x- and y-axis pixel resolution
-                scan_dir.info['xres'] = xmin - xmax
-                scan_dir.info['yres'] = ymax - ymin
-                # - Preserve the old positions of the x- and y-axis cropping point
-                scan_dir.info['xreal_min'] = scan_dir.info['xinc'] * xmax
-                scan_dir.info['yreal_min'] = scan_dir.info['yinc'] * ymin
-                # - Set new x- and y-axis image size
-                scan_dir.info['xreal'] = scan_dir.info['xreal_min'] + scan_dir.info['xinc'] * scan_dir.info['xres']
-                scan_dir.info['yreal'] = scan_dir.info['yreal_min'] + scan_dir.info['yinc'] * scan_dir.info['yres']
-                # - Return new flat file instance.
-            return flat_file_copy
-        # - If the cropping values of the ymin and ymax are switched, but xmin and xmax are proper
-        elif xmin < xmax and ymin > ymax:
-            for scan_dir in flat_file_copy:
-                # - Crop the image data
-                scan_dir.data = scan_dir.data[ymax:ymin, xmin:xmax]
-                # - Set new x- and y-axis pixel resolution
-                scan_dir.info['xres'] = xmax - xmin
-                scan_dir.info['yres'] = ymin - ymax
-                # - Preserve the old positions of the x- and y-axis cropping point
-                scan_dir.info['xreal_min'] = scan_dir.info['xinc'] * xmin
-                scan_dir.info['yreal_min'] = scan_dir.info['yinc'] * ymax
-                # - Set new x- and y-axis image size
-                scan_dir.info['xreal'] = scan_dir.info['xreal_min'] + scan_dir.info['xinc'] * scan_dir.info['xres']
-                scan_dir.info['yreal'] = scan_dir.info['yreal_min'] + scan_dir.info['yinc'] * scan_dir.info['yres']
-                # - Return new flat file instance.
-            return flat_file_copy
-        # - If the cropping values of both min and max are switched, avoid error by reversing the crop direction
-        elif xmin > xmax and ymin > ymax:
-            for scan_dir in flat_file_copy:
-                # - Crop the image data
-                scan_dir.data = scan_dir.data[ymax:ymin, xmax:xmin]
-                # - Set new x- and y-axis pixel resolution
-                scan_dir.info['xres'] = xmin - xmax
-                scan_dir.info['yres'] = ymin - ymax
-                # - Preserve the old positions of the x- and y-axis cropping point
-                scan_dir.info['xreal_min'] = scan_dir.info['xinc'] * xmax
-                scan_dir.info['yreal_min'] = scan_dir.info['yinc'] * ymax
-                # - Set new x- and y-axis image size
-                scan_dir.info['xreal'] = scan_dir.info['xreal_min'] + scan_dir.info['xinc'] * scan_dir.info['xres']
-                scan_dir.info['yreal'] = scan_dir.info['yreal_min'] + scan_dir.info['yinc'] * scan_dir.info['yres']
-
-            # Return the modified flat-file instance
-            return flat_file_copy
-
-    def minimap_crop(self, xmin, xmax, ymin, ymax, angle):
-        """
-        Function that determines the cropped area within the minimap of the stm topography scan. The cropping includes 
-        the potential of rotation in the main topography plot and correctly rotates the cropped area within the
-        minimap, with the inclusion of a vector V that demonstrates the rotation.
+            # - Set the minimum real value of the x- and y-axis to be zero as there is no cropping here
+            return flat_file.apply(lambda data: data, info_func=lambda info, data: {'xreal_min': 0, 'yreal_min': 0})
+        # - If the cropping values of the min and max are switched, avoid error by reversing the crop direction
+        xmin, xmax = min(xmin, xmax), max(xmin, xmax)
+        ymin, ymax = min(ymin, ymax), max(ymin, ymax)
+
+        # Defining the metadata of the cropped image
+        def cropped_info(info, data):
+            # - Preserve the old positions of the x- and y-axis cropping point
+            xreal_min = info['xinc'] * xmin
+            yreal_min = info['yinc'] * ymin
+            # - Set new x- and y-axis pixel resolution and new x- and y-axis image size
+            return {'xres': xmax - xmin, 'yres': ymax - ymin, 'xreal_min': xreal_min, 'yreal_min': yreal_min,
+                    'xreal': xreal_min + info['xinc'] * (xmax - xmin),
+                    'yreal': yreal_min + info['yinc'] * (ymax - ymin)}
+
+        # Return the new flat file instance, whose cropped image data are views of the original data
+        return flat_file.apply(lambda data: data[ymin:ymax, xmin:xmax], info_func=cropped_info)
+
+    def topo_rotate_crop(self, flat_file, angle, xmin, xmax, ymin, ymax):
+        """
+        Create a copy of the flat file that is rotated by the given angle (in degrees) and then cropped, in a single
+        transform. The crop window is mapped back through the rotation, such that only the pixels within the window are
+        interpolated, instead of the full enlarged image that 'topo_rotate' produces and 'topo_crop' mostly discards.
+
+        :param flat_file: An instance of an Omicron flat file.
+        :param angle: Rotation angle in degrees.
+        :param xmin: Crop x-axis initial co-ordinate in real units, in the rotated image.
+        :param xmax: Crop x-axis final co-ordinate in real units, in the rotated image.
+        :param ymin: Crop y-axis initial co-ordinate in real units, in the rotated image.
+        :param ymax: Crop y-axis final co-ordinate in real units, in the rotated image.
+        :return: New flat file instance with the rotated and cropped image data.
+        """
+        flat_file = tf.TopoFile(flat_file)
+        rotated = tp.TopoPipeline().rotate(angle).crop(xmin, xmax, ymin, ymax).evaluate(flat_file)
+        return tf.TopoFile([rotated[scan_dir] for scan_dir in range(len(flat_file))])
+
+    def minimap_crop(self, xmin, xmax, ymin, ymax, angle, xflip=False, yflip=False):
+        """
+        Function that determines the cropped area within the minimap of the stm topography scan. The cropped area is
+        mapped back through the same flip and rotate transform that is used to resample the main topography plot, so
+        that it is placed correctly within the minimap for any rotation angle, with the inclusion of a vector V that
+        demonstrates the rotation.
         
         :param xmin: Crop x-axis initial co-ordinate in real units.
         :param xmax: Crop x-axis final co-ordinate in real units.
         :param ymin: Crop y-axis initial co-ordinate in real units.
         :param ymax: Crop y-axis final co-ordinate in real units.
         :param angle: Rotation angle in degrees.
+        :param xflip: Boolean as to whether a left-right flip is performed before the rotation.
+        :param yflip: Boolean as to whether a up-down flip is performed before the rotation.
         :return: Px, Py, V which represent the vertices of the cropped rectangle after rotation and an arrow V showing 
         the rotation vector.
         """
-        # TODO The rotation of the cropped region on the minimap does not work for rotations properly.
-        # - Becuase you need to continuously update the axis of rotation as the figure is rotated around because the real distance is actually changing.
-
-        # Define the rotation matrix that will rotate the points that define the cropped image
-        def rot_matrix(coord, angle):
-            angle = np.deg2rad(angle)
-            rotMatrix = np.matrix([[np.cos(angle), -np.sin(angle)],
-                                   [np.sin(angle), np.cos(angle)]])
-            return rotMatrix * np.matrix([[coord[0]], [coord[1]]])
-
-        # Defining the four points of the cropped rectangles and shifting them to the origins centre of rotation
-        # - Finding the position of the center of rotation
-        Ox = 0.5 * self.selected_data[self.scan_dir].info['xreal']
-        Oy = 0.5 * self.selected_data[self.scan_dir].info['yreal']
-        # - Shifting all the points to the axis of rotation to perform the rotation
-        P0 = np.array([xmin - Ox, ymin - Oy])
-        P1 = np.array([xmin - Ox, ymax - Oy])
-        P2 = np.array([xmax - Ox, ymax - Oy])
-        P3 = np.array([xmax - Ox, ymin - Oy])
-
-        # Applying a rotation of 'angle' degrees to the vertices of the rectangle to align it properly with the rotation
-        rot_P0 = rot_matrix(P0, angle)
-        rot_P1 = rot_matrix(P1, angle)
-        rot_P2 = rot_matrix(P2, angle)
-        rot_P3 = rot_matrix(P3, angle)
-
-        # Shifting all the points back to their initial positions, after rotation
-        rot_P0[0] = rot_P0[0] + Ox
-        rot_P0[1] = rot_P0[1] + Oy
-        rot_P1[0] = rot_P1[0] + Ox
-        rot_P1[1] = rot_P1[1] + Oy
-        rot_P2[0] = rot_P2[0] + Ox
-        rot_P2[1] = rot_P2[1] + Oy
-        rot_P3[0] = rot_P3[0] + Ox
-        rot_P3[1] = rot_P3[1] + Oy
-        # Converting from real units to pixel units for the image rotated, cropping operation
-        rot_P0[0] = self.nm2pnt(rot_P0[0], self.selected_data)
-        rot_P0[1] = self.nm2pnt(rot_P0[1], self.selected_data)
-        rot_P1[0] = self.nm2pnt(rot_P1[0], self.selected_data)
-        rot_P1[1] = self.nm2pnt(rot_P1[1], self.selected_data)
-        rot_P2[0] = self.nm2pnt(rot_P2[0], self.selected_data)
-        rot_P2[1] = self.nm2pnt(rot_P2[1], self.selected_data)
-        rot_P3[0] = self.nm2pnt(rot_P3[0], self.selected_data)
-        rot_P3[1] = self.nm2pnt(rot_P3[1], self.selected_data)
-        # Extracting all the x-values for the points
-        Px = np.array([rot_P0.item(0), rot_P1.item(0), rot_P2.item(0), rot_P3.item(0)])
-        Py = np.array([rot_P0.item(1), rot_P1.item(1), rot_P2.item(1), rot_P3.item(1)])
-        # Finding the vector arrow to represent the rotation
-        Vbase = rot_P0 + 0.5*(rot_P3-rot_P0) + 0.5*(rot_P1-rot_P0)
-        Vtip = 0.5*(rot_P1 - rot_P0)
-        V = np.array([Vbase.item(0), Vbase.item(1), Vtip.item(0), Vtip.item(1)])
-        # Return the necessary points and components
-        return Px, Py, V
+        geometry = tp.TopoPipeline().flip(xflip, yflip).rotate(angle).crop(xmin, xmax, ymin, ymax)
+        return geometry.footprint(self.selected_data[self.scan_dir])
 
     def topo_flip(self, flat_file, xflip, yflip):
         """
@@ -539,36 +395,259 @@ class STT(object):
         :param yflip: Boolean as to whether a up-down flip should be performed.
         :return: New flat file instance, with flipped image data if necessary.
         """
-        # Create a new deep copy of the flat file
-        flat_file_copy = deepcopy(flat_file)
+        # Wrap the flat file in a copy-on-write handle, so that unchanged data is shared rather than copied
+        flat_file = tf.TopoFile(flat_file)
 
         # For each scan direction in the flat file, perform the horizontal and vertical flips where necessary
-        # - If both a horizontal (up-down) and vertical (left-right) flip are performed
-        if xflip and yflip:
-            for scan_dir in flat_file_copy:
-                scan_dir.data = np.fliplr(scan_dir.data)
-                scan_dir.data = np.flipud(scan_dir.data)
-            # - Return new flat file instance.
-            return flat_file_copy
-        # - If just a vertical (left-right) flip is performed
-        elif xflip:
-            for scan_dir in flat_file_copy:
-                scan_dir.data = np.fliplr(scan_dir.data)
-                # - Return new flat file instance.
-                return flat_file_copy
-        # - If just a horizontal (up-down) flip is performed
-        elif yflip:
-            for scan_dir in flat_file_copy:
-                scan_dir.data = np.flipud(scan_dir.data)
-            # - Return new flat file instance.
-            return flat_file_copy
-        # - Else, if no flips are performed, return the original data back
-        else:
-            return flat_file_copy
+        # - The flipped image data are views of the original data, so no image data is copied
+        if xflip:
+            flat_file = flat_file.apply(np.fliplr)
+        if yflip:
+            flat_file = flat_file.apply(np.flipud)
+        # - Return new flat file instance (or the original instance, if no flips are performed)
+        return flat_file
 
-    def topo_plot(self, flat_file, ax, scan_dir=0, cmap=None, vmin=None, vmax=None, smooth=None):
+    def register_directions(self, flat_file, reference=0, apply=False):
         """
-        Function to plot the main, selected STM topographic data.
+        Register all the scan directions of the flat file onto a single reference direction, from the sub-pixel shifts
+        found by phase correlation.
+
+        :param flat_file: An instance of an Omicron flat file.
+        :param reference: Integer of the scan direction that the others are registered onto.
+        :param apply: Boolean as to whether the shifts should be applied to the scan directions.
+        :return: The (dy, dx) shifts of each scan direction in pixels, and the new flat file instance with the shifted
+        image data (or None, if the shifts are not applied).
+        """
+        flat_file = tf.TopoFile(flat_file)
+        # All scan directions are registered together in one vectorised pass
+        stack = np.stack([scan.data for scan in flat_file])
+        shifts = tf.phase_correlation(stack, reference=reference)
+        if not apply:
+            return shifts, None
+        # - The shifted image data replaces each of the scan directions
+        shifted = tf.apply_shifts(stack, shifts)
+        for scan_dir in range(len(flat_file)):
+            flat_file = flat_file.replace(scan_dir, shifted[scan_dir])
+        return shifts, flat_file
+
+    def register_rows(self, flat_file, reference=0, apply=False, smooth=9):
+        """
+        Register every line of all the scan directions of the flat file onto the same line of a single reference
+        direction, which corrects the line-dependent lateral shift between the forward and backward directions from the
+        creep and hysteresis of the piezo.
+
+        :param flat_file: An instance of an Omicron flat file.
+        :param reference: Integer of the scan direction that the others are registered onto.
+        :param apply: Boolean as to whether the shifts should be applied to the scan directions.
+        :param smooth: Number of lines of the running median of the shifts (if None, the raw shifts are used).
+        :return: The x-shift of every line of each scan direction in pixels, of shape (directions, rows), and the new
+        flat file instance with the shifted image data (or None, if the shifts are not applied).
+        """
+        flat_file = tf.TopoFile(flat_file)
+        # All the lines of all the scan directions are registered together in one vectorised pass
+        stack = np.stack([scan.data for scan in flat_file])
+        shifts = tf.row_shifts(stack, stack[reference], smooth=smooth)
+        if not apply:
+            return shifts, None
+        # - The shifted image data replaces each of the scan directions
+        shifted = tf.shift_rows(stack, shifts)
+        for scan_dir in range(len(flat_file)):
+            if scan_dir != reference:
+                flat_file = flat_file.replace(scan_dir, shifted[scan_dir])
+        return shifts, flat_file
+
+    def register_repeats(self, chosen_data=None, scan_dir=0, apply=False, crop=True):
+        """
+        Register all the repeated topography frames of a scan (the 'topo N_M' files with the same scan number N) onto
+        the first of the repeats, from the sub-pixel shifts found by phase correlation.
+
+        :param chosen_data: String of the alias of any of the repeated frames (if None, the selected file is used).
+        :param scan_dir: Integer of the scan direction that is registered.
+        :param apply: Boolean as to whether the shifts should be applied to the frames.
+        :param crop: Boolean as to whether the shifted frames are cropped to the area covered by every frame.
+        :return: The list of aliases of the repeated frames, the (dy, dx) shifts of each frame in pixels, and the 3D
+        array of the shifted frames (or None, if the shifts are not applied).
+        """
+        if chosen_data is None:
+            chosen_data = self.selected_file
+        # Finding all the repeats of the chosen scan, which share the alias up to the repeat number
+        scan_alias = chosen_data.rsplit('_', 1)[0] + '_'
+        aliases = [alias for alias in self.file_alias if alias.startswith(scan_alias)]
+        # Loading the frames, which are cached in the same way as the selected topography scan
+        frames = list()
+        for alias in aliases:
+            file_path = self.flat_files[self.file_alias.index(alias)]
+            flat_file = self.stage_cache.get(('load', file_path), lambda: tf.TopoFile(ff.load(file_path)))
+            frames.append(flat_file[scan_dir].data)
+        if len(set(np.shape(frame) for frame in frames)) > 1:
+            raise ValueError("The repeated frames of '{}' do not all have the same resolution.".format(chosen_data))
+        # All frames are registered together in one vectorised pass
+        stack = np.stack(frames)
+        shifts = tf.phase_correlation(stack, reference=0)
+        if not apply:
+            return aliases, shifts, None
+        return aliases, shifts, tf.apply_shifts(stack, shifts, crop=crop)
+
+    def topo_average(self, flat_file, reference=0, reject=3.0, per_line=False):
+        """
+        Combine all the scan directions of the flat file into a single image of higher signal-to-noise, where the
+        directions are registered onto the reference direction, outlier lines are rejected, and the remaining lines are
+        averaged.
+
+        :param flat_file: An instance of an Omicron flat file.
+        :param reference: Integer of the scan direction that the others are registered onto.
+        :param reject: Threshold for the rejection of outlier lines, in robust standard deviations.
+        :param per_line: Boolean as to whether every line is first registered on its own (see 'register_rows').
+        :return: New flat file instance, where the reference scan direction holds the averaged image over the area
+        covered by all the directions, and the per-pixel variance and number of directions averaged of that image.
+        """
+        flat_file = tf.TopoFile(flat_file)
+        if per_line:
+            flat_file = self.register_rows(flat_file, reference, apply=True)[1]
+        stack = np.stack([scan.data for scan in flat_file])
+        mean, variance, count, shifts = tf.average_directions(stack, reference=reference, reject=reject)
+        # The averaged image is the area of the reference direction that is covered by all the directions
+        xmin, xmax, ymin, ymax = tf.overlap_window(shifts, stack.shape[1:])
+        info = flat_file[reference].info
+        xreal_min = info.get('xreal_min', 0) + info['xinc'] * xmin
+        yreal_min = info.get('yreal_min', 0) + info['yinc'] * ymin
+        averaged = flat_file.replace(reference, mean, xres=xmax - xmin, yres=ymax - ymin,
+                                     xreal_min=xreal_min, yreal_min=yreal_min,
+                                     xreal=xreal_min + info['xinc'] * (xmax - xmin),
+                                     yreal=yreal_min + info['yinc'] * (ymax - ymin))
+        return averaged, variance, count
+
+    def height_statistics(self, flat_file, scan_dir=0):
+        """
+        Return the roughness statistics of a scan direction of the flat file, which are read from the height histogram
+        that is cached alongside its image pyramid, so they are only computed once for each image.
+
+        :param flat_file: An instance of an Omicron flat file.
+        :param scan_dir: Integer of the scan direction.
+        :return: Dictionary of the mean height, peak-to-valley height, Ra, Rq (all in nm) and the skewness.
+        """
+        return tf.image_pyramid(flat_file[scan_dir]).histogram().stats(PC["nano"])
+
+    def step_heights(self, flat_file=None, scan_dir=None, **kwargs):
+        """
+        Return the terrace levels and the step heights between them of a leveled scan direction, which are found from
+        a gaussian mixture fit to the height histogram of its flattest pixels (see 'topo_funcs.terrace_levels').
+
+        :param flat_file: An instance of an Omicron flat file (if None, the final data of the selected scan is used).
+        :param scan_dir: Integer of the scan direction (if None, the selected scan direction is used).
+        :param kwargs: Keyword arguments of 'topo_funcs.terrace_levels'.
+        :return: Dictionary of the levels, step heights and their uncertainties (all in nm) and the level weights.
+        """
+        if flat_file is None:
+            flat_file = self.final_data
+        if scan_dir is None:
+            scan_dir = self.scan_dir
+        terraces = tf.terrace_levels(flat_file[scan_dir].data, **kwargs)
+        return {key: (value if key == 'weights' else value / PC["nano"]) for key, value in terraces.items()
+                if key not in ('centres', 'counts')}
+
+    def detect_features(self, flat_file=None, scan_dir=None, **kwargs):
+        """
+        Return the features (adsorbates and defects) that protrude above the background of a leveled scan direction,
+        which are found by thresholding, labelling and a maximum filter (see 'topo_funcs.detect_features').
+
+        :param flat_file: An instance of an Omicron flat file (if None, the final data of the selected scan is used).
+        :param scan_dir: Integer of the scan direction (if None, the selected scan direction is used).
+        :param kwargs: Keyword arguments of 'topo_funcs.detect_features'.
+        :return: Dictionary of the positions, heights (all in nm), areas (in nm^2) and number of peaks of the features.
+        """
+        if flat_file is None:
+            flat_file = self.final_data
+        if scan_dir is None:
+            scan_dir = self.scan_dir
+        features = tf.detect_features(flat_file[scan_dir].data, flat_file[scan_dir].info, **kwargs)
+        return {key: (value / PC["nano"] if key in ('height', 'threshold', 'background') else value)
+                for key, value in features.items()}
+
+    def save_features(self, file_path, flat_file=None, scan_dir=None, **kwargs):
+        """
+        Save the features detected in a leveled scan direction to a table (in the csv format), with one row per
+        feature.
+
+        :param file_path: Path of the table.
+        :param flat_file: An instance of an Omicron flat file (if None, the final data of the selected scan is used).
+        :param scan_dir: Integer of the scan direction (if None, the selected scan direction is used).
+        :param kwargs: Keyword arguments of 'topo_funcs.detect_features'.
+        :return: The number of features.
+        """
+        features = self.detect_features(flat_file, scan_dir, **kwargs)
+        columns = ['x', 'y', 'peak x', 'peak y', 'height', 'area', 'peaks']
+        np.savetxt(file_path, np.column_stack([features[key] for key in columns]), delimiter=',', comments='',
+                   header="x [nm],y [nm],peak x [nm],peak y [nm],height [nm],area [nm^2],peaks",
+                   fmt=['%.6g'] * 6 + ['%d'])
+        return len(features['x'])
+
+    def cut_template(self, x0, y0, x1, y1, flat_file=None, scan_dir=None):
+        """
+        Cut a template (of a repeated motif) out of a scan direction, for the template matching of 'match_template'.
+
+        :param x0: x-axis initial co-ordinate of the template in real units.
+        :param y0: y-axis initial co-ordinate of the template in real units.
+        :param x1: x-axis final co-ordinate of the template in real units.
+        :param y1: y-axis final co-ordinate of the template in real units.
+        :param flat_file: An instance of an Omicron flat file (if None, the final data of the selected scan is used).
+        :param scan_dir: Integer of the scan direction (if None, the selected scan direction is used).
+        :return: 2D numpy array of the template (in metres).
+        """
+        if flat_file is None:
+            flat_file = self.final_data
+        if scan_dir is None:
+            scan_dir = self.scan_dir
+        scan = flat_file[scan_dir]
+        corners = np.round(tf.profile_pixels([[x0, y0], [x1, y1]], scan.info)).astype(int)
+        (c0, r0), (c1, r1) = np.sort(np.clip(corners, 0, np.array(scan.data.shape[::-1]) - 1), axis=0)
+        return np.array(scan.data[r0:r1 + 1, c0:c1 + 1])
+
+    def match_template(self, template, flat_file=None, scan_dir=None, **kwargs):
+        """
+        Find every instance of a template within a scan direction, by the normalized cross-correlation of the template
+        with the scan (see 'topo_spectrum.TemplateMatcher'). The transform of each scan direction is cached, so that
+        any number of templates can be matched against it cheaply.
+
+        :param template: 2D numpy array of the template, as returned by 'cut_template'.
+        :param flat_file: An instance of an Omicron flat file (if None, the final data of the selected scan is used).
+        :param scan_dir: Integer of the scan direction (if None, the selected scan direction is used).
+        :param kwargs: Keyword arguments of 'topo_spectrum.match_template'.
+        :return: Dictionary of the centres (in nm), top left pixels and scores of the matches, from the best match.
+        """
+        if flat_file is None:
+            flat_file = self.final_data
+        if scan_dir is None:
+            scan_dir = self.scan_dir
+        return ts.match_template(flat_file[scan_dir], template, **kwargs)
+
+    def export_deepzoom(self, path, flat_file=None, scan_dir=None, **kwargs):
+        """
+        Export a scan direction as a deep-zoom image, with a viewer page, in the colormap and colour scale of the main
+        topography plot (see 'topo_mosaic.export_deepzoom').
+
+        :param path: Path of the deep-zoom image, without the extension.
+        :param flat_file: An instance of an Omicron flat file (if None, the final data of the selected scan is used).
+        :param scan_dir: Integer of the scan direction (if None, the selected scan direction is used).
+        :param kwargs: Keyword arguments of 'topo_mosaic.export_deepzoom'.
+        :return: Path of the descriptor of the deep-zoom image.
+        """
+        if flat_file is None:
+            flat_file = self.final_data
+        if scan_dir is None:
+            scan_dir = self.scan_dir
+        if self.image_props is not None:
+            kwargs.setdefault('cmap', self.image_props["colormap"])
+            if not self.image_props["auto contrast"]:
+                vmin = tf.image_pyramid(flat_file[scan_dir]).min
+                kwargs.setdefault('vmin', vmin)
+                kwargs.setdefault('vmax', vmin + self.image_props["contrast"] * PC["nano"])
+        return tm.export_deepzoom(flat_file[scan_dir], path, **kwargs)
+
+    def topo_plot(self, flat_file, ax, scan_dir=0, cmap=None, vmin=None, vmax=None, smooth=None, artists=None):
+        """
+        Function to plot the main, selected STM topographic data. The artists are only created on the first call, and
+        are then updated in place on every subsequent call.
 
         Arguments
         :param flat_file: An instance of an Omicron topography flat file.
@@ -580,10 +659,16 @@ class STT(object):
         :param vmin:        Use to manually define the minimum value of the colour scale.
         :param vmax:        Use to manually define the maximum value of the colour scale.
         :param smooth:      If smoothing should be applied.
+        :param artists:     Dictionary of the artists returned by a previous call (if None, they are created).
+        :return: Dictionary of the artists of the plot.
         """
         # Initialising the constants to be used for plotting
         # - Set minimum value of the topography scan to zero and convert to nanometers
-        figure_data = (flat_file[scan_dir].data - np.amin(flat_file[scan_dir].data)) / PC["nano"]
+        # - The pyramid level that matches the size of the axes on screen is displayed, over the full resolution range
+        pyramid = tf.image_pyramid(flat_file[scan_dir])
+        figure_data = pyramid.display(fr.axes_pixel_shape(ax), PC["nano"])
+        # - The automatic colour scale spans the percentiles of the cached height histogram, so hot pixels are ignored
+        auto_vmin, auto_vmax = pyramid.histogram().contrast(scale=PC["nano"])
         # - Only allowing four x, y and z ticks to appear
         xy_ticks = 4
         z_ticks = 4
@@ -591,19 +676,24 @@ class STT(object):
         if cmap is None:
             cmap = 'hot'
         if vmin is None:
-            vmin = np.amin(figure_data)
+            vmin = auto_vmin if vmax is None else 0.
         if vmax is None:
-            vmax = 1.25 * np.amax(figure_data)
-            # - If no scan is performed such that vmax is globally zero, then to avoid an error, set it to unity
-            if vmax == 0:
-                vmax = 1
-
-        # Plotting the topography image
-        if smooth:
-            cax = ax.imshow(figure_data, origin='lower', cmap=cmap, vmin=vmin, vmax=vmax, aspect='auto',
-                            interpolation="gaussian")
-        else:
-            cax = ax.imshow(figure_data, origin='lower', cmap=cmap, vmin=vmin, vmax=vmax, aspect='auto')
+            vmax = auto_vmax
+
+        # Creating the artists of the topography image, only if they do not already exist
+        if artists is None:
+            artists = dict()
+            artists['image'] = ax.imshow(figure_data, origin='lower', cmap=cmap, vmin=vmin, vmax=vmax, aspect='auto')
+            artists['scale bar'], = ax.plot([], [], 'k-', linewidth=5)
+            artists['scale text'] = ax.text(0, 0, '', weight='bold', ha='center')
+            artists['colorbar'] = ax.figure.colorbar(artists['image'], ax=ax, fraction=0.025, pad=0.01)
+            artists['colorbar'].set_label('Height [nm]', size=18, weight='bold')          # Set colorbar label
+        # Updating the topography image
+        image = artists['image']
+        image.set_data(figure_data)
+        image.set_cmap(cmap)
+        image.set_clim(vmin, vmax)
+        image.set_interpolation("gaussian" if smooth else None)
         # Defining the x- and y-axes ticks
         # - Extract the x, y units from the flat file
         xy_units = flat_file[scan_dir].info['unitxy']
@@ -615,16 +705,20 @@ class STT(object):
         y_max = flat_file[scan_dir].info['yreal']
         x_min = flat_file[scan_dir].info['xreal_min']
         y_min = flat_file[scan_dir].info['yreal_min']
+        # - Setting the extent of the image to the new image size
+        image.set_extent((-0.5, x_res - 0.5, -0.5, y_res - 0.5))
+        ax.set_xlim(-0.5, x_res - 0.5)
+        ax.set_ylim(-0.5, y_res - 0.5)
         # - Setting the x-ticks locations by input
-        ax.set_xticks([x for x in np.arange(0, x_res + 1, x_res / xy_ticks)])
+        x_tick_locs = np.arange(0, x_res + 1, x_res / xy_ticks)
+        ax.set_xticks(x_tick_locs)
         # - Setting the x-tick labels by rounding the numbers to one decimal place
-        ax.set_xticklabels(
-            [str(np.round(x, 1)) for x in np.arange(x_min, x_max + 1, (x_max-x_min) / xy_ticks)], fontsize=13)
+        ax.set_xticklabels([str(np.round(x, 1)) for x in np.linspace(x_min, x_max, len(x_tick_locs))], fontsize=13)
         # - Setting the y-ticks locations by input
-        ax.set_yticks([y for y in np.arange(0, y_res + 1, y_res / xy_ticks)])
+        y_tick_locs = np.arange(0, y_res + 1, y_res / xy_ticks)
+        ax.set_yticks(y_tick_locs)
         # - Setting the y-tick labels by rounding the numbers to one decimal place
-        ax.set_yticklabels(
-            [str(np.round(y, 1)) for y in np.arange(y_min, y_max + 1, (y_max-y_min) / xy_ticks)], fontsize=13)
+        ax.set_yticklabels([str(np.round(y, 1)) for y in np.linspace(y_min, y_max, len(y_tick_locs))], fontsize=13)
         # Labelling the x- and y-axes with the units given from the flat file
         ax.set_xlabel('x /' + xy_units, size=18, weight='bold')
         ax.set_ylabel('y /' + xy_units, size=18, weight='bold')
@@ -636,24 +730,28 @@ class STT(object):
         sbar_xloc_max = x_res - 0.5 * (x_res / 10)
         sbar_xloc_min = x_res - 1.5 * (x_res / 10)
         sbar_loc_text = sbar_xloc_max - 0.5 * (x_res / 10)
-        # - Plotting the scale-bar and its unit text
-        ax.plot([sbar_xloc_min, sbar_xloc_max], [0.02 * y_res, 0.02 * y_res], 'k-', linewidth=5)
-        ax.text(sbar_loc_text, 0.03 * y_res, str(np.round(x_max / 10, 2)) + xy_units, weight='bold', ha='center')
+        # - Updating the scale-bar and its unit text
+        artists['scale bar'].set_data([sbar_xloc_min, sbar_xloc_max], [0.02 * y_res, 0.02 * y_res])
+        artists['scale text'].set_position((sbar_loc_text, 0.03 * y_res))
+        artists['scale text'].set_text(str(np.round(x_max / 10, 2)) + xy_units)
         # Setting the colorbar properties
         # - Define the colorbar ticks
-        cbar_ticks = [z for z in np.arange(vmin, vmax * 1.01, vmax / z_ticks)]
+        cbar_ticks = np.linspace(vmin, vmax, z_ticks + 1)
         # - Add labels to the colorbar ticks
-        cbar_ticklabels = [str(np.round(z, 2)) for z in
-                           np.arange(vmin, vmax + 1, vmax / z_ticks)]
-        # - Create the colorbar next to the primary topography image
-        cbar = plt.colorbar(cax, ticks=cbar_ticks, fraction=0.025, pad=0.01)
-        cbar.ax.set_yticklabels(cbar_ticklabels, size=16)                       # Set colorbar tick labels
-        cbar.set_label('Height [nm]', size=18, weight='bold')                   # Set colorbar label
+        cbar_ticklabels = [str(np.round(z, 2)) for z in cbar_ticks]
+        # - Update the colorbar next to the primary topography image
+        artists['colorbar'].set_ticks(cbar_ticks)
+        artists['colorbar'].ax.set_yticklabels(cbar_ticklabels, size=16)           # Set colorbar tick labels
+        # Recording everything that is drawn but not blitted, such that a change in it needs a full redraw
+        artists['layout'] = (flat_file[scan_dir].info['runcycle'], scan_dir, x_res, y_res, x_min, x_max, y_min,
+                             y_max, vmin, vmax, cmap)
+        return artists
 
-    def minimap_topo_plot(self, flat_file, ax, scan_dir=0, cmap=None, vmin=None, vmax=None):
+    def minimap_topo_plot(self, flat_file, ax, scan_dir=0, cmap=None, vmin=None, vmax=None, artists=None):
         """
         Function to plot the minimap version of the selected STM topographic data to show the area's over which 
-        cropping and plane-subtraction has been peformed.
+        cropping and plane-subtraction has been peformed. The artists are only created on the first call, and are then
+        updated in place on every subsequent call.
 
         Arguments
         :param flat_file: An instance of an Omicron topography flat file.
@@ -664,9 +762,15 @@ class STT(object):
         :param cmap:        Matplotlib colormap name.
         :param vmin:        Use to manually define the minimum value of the colour scale.
         :param vmax:        Use to manually define the maximum value of the colour scale.
+        :param artists:     Dictionary of the artists returned by a previous call (if None, they are created).
+        :return: Dictionary of the artists of the plot.
         """
         # Set minimum value of the topography scan to zero and convert to nanometers
-        figure_data = (flat_file[scan_dir].data - np.amin(flat_file[scan_dir].data)) / PC["nano"]
+        # - The pyramid level that matches the size of the axes on screen is displayed, over the full resolution range
+        pyramid = tf.image_pyramid(flat_file[scan_dir])
+        figure_data = pyramid.display(fr.axes_pixel_shape(ax), PC["nano"])
+        # - The automatic colour scale spans the percentiles of the cached height histogram, so hot pixels are ignored
+        auto_vmin, auto_vmax = pyramid.histogram().contrast(scale=PC["nano"])
         # - Only allowing four x, y and z ticks to appear
         xy_ticks = 4
         z_ticks = 4
@@ -674,32 +778,68 @@ class STT(object):
         if cmap is None:
             cmap = 'hot'
         if vmin is None:
-            vmin = np.amin(figure_data)
+            vmin = auto_vmin if vmax is None else 0.
         if vmax is None:
-            vmax = 1.25 * np.amax(figure_data)
-            # - If no scan is peformed such that vmax is zero, then to avoid an error, set it to one
-            if vmax == 0:
-                vmax = 1
-        # Plotting the topography image
-        cax = ax.imshow(figure_data, origin='lower', cmap=cmap, vmin=vmin, vmax=vmax, aspect='equal')
+            vmax = auto_vmax
+        # Creating the artists of the minimap, only if they do not already exist
+        fig = ax.figure
+        if artists is None:
+            artists = dict()
+            artists['image'] = ax.imshow(figure_data, origin='lower', cmap=cmap, vmin=vmin, vmax=vmax, aspect='equal')
+            artists['scale bar'], = ax.plot([], [], 'k-', linewidth=5)
+            artists['scale text'] = ax.text(0, 0, '', weight='bold', ha='center')
+            artists['colorbar'] = fig.colorbar(artists['image'], ax=ax, fraction=0.025, pad=0.00,
+                                               orientation="vertical")
+            # - Adding the area over which the plane subtraction is performed
+            artists['plane points'], = ax.plot([], [], 'bo', alpha=0.4)
+            artists['plane area'] = ax.add_patch(patch.Polygon(np.zeros((4, 2)), closed=True, color='blue',
+                                                               alpha=0.4, visible=False))
+            # - Adding the area over which the cropping is performed
+            artists['crop points'], = ax.plot([], [], 'go-', alpha=1, markersize=4, linewidth=2)
+            artists['crop area'] = ax.add_patch(patch.Polygon(np.zeros((4, 2)), closed=True, color='green',
+                                                              alpha=0.4, visible=False))
+            artists['crop arrow'] = ax.arrow(0, 0, 0, 0, head_width=7, head_length=5, fc='g', ec='g', linewidth=3,
+                                             visible=False)
+            # - Adding a legend to show the color of the plane and cropped polygons
+            ax.legend(handles=list([patch.Patch(color='blue', label='plane'),
+                                    patch.Patch(color='green', label='crop')]),
+                      loc='best', prop={'size': 8}, frameon=False)
+            # - Adding a grid to the minimap
+            ax.grid(True, color='gray')
+            # - Add text to the plot for all the important information
+            artists['info'] = [fig.text(0.35, 0.86, '', fontsize=14, weight='bold'),
+                               fig.text(0.35, 0.84, '', fontsize=14, weight='bold'),
+                               fig.text(0.35, 0.82, '', fontsize=14),
+                               fig.text(0.35, 0.75, '', fontsize=14),
+                               fig.text(0.35, 0.73, '', fontsize=14),
+                               fig.text(0.35, 0.71, '', fontsize=14),
+                               fig.text(0.35, 0.69, '', fontsize=14),
+                               fig.text(0.35, 0.67, '', fontsize=14),
+                               fig.text(0.35, 0.65, '', fontsize=14)]
+        # Updating the topography image
+        image = artists['image']
+        image.set_data(figure_data)
+        image.set_cmap(cmap)
+        image.set_clim(vmin, vmax)
         # Extract the x, y units from the flat file
         xy_units = flat_file[scan_dir].info['unitxy']
         # Extract the total number of x, y pixels from the flat file (total number of points in the scan)
         x_res = flat_file[scan_dir].info['xres']
         y_res = flat_file[scan_dir].info['yres']
+        image.set_extent((-0.5, x_res - 0.5, -0.5, y_res - 0.5))
         # Extract the x, y real units from the flat file (maximum size of the scan in real, integer units)
         x_max = int(flat_file[scan_dir].info['xreal'])
         y_max = int(flat_file[scan_dir].info['yreal'])
         # - Setting the x-ticks locations by input
-        ax.set_xticks([x for x in np.arange(0, x_res + 1, x_res / xy_ticks)])
+        x_tick_locs = np.arange(0, x_res + 1, x_res / xy_ticks)
+        ax.set_xticks(x_tick_locs)
         # - Setting the x-tick labels by rounding the numbers to one decimal place
-        ax.set_xticklabels(
-            [str(np.round(x, 1)) for x in np.arange(0, x_max + 1, x_max / xy_ticks)], fontsize=10)
+        ax.set_xticklabels([str(np.round(x, 1)) for x in np.linspace(0, x_max, len(x_tick_locs))], fontsize=10)
         # - Setting the y-ticks locations by input
-        ax.set_yticks([y for y in np.arange(0, y_res + 1, y_res / xy_ticks)])
+        y_tick_locs = np.arange(0, y_res + 1, y_res / xy_ticks)
+        ax.set_yticks(y_tick_locs)
         # - Setting the y-tick labels by rounding the numbers to one decimal place
-        ax.set_yticklabels(
-            [str(np.round(y, 1)) for y in np.arange(0, y_max + 1, y_max / xy_ticks)], fontsize=10)
+        ax.set_yticklabels([str(np.round(y, 1)) for y in np.linspace(0, y_max, len(y_tick_locs))], fontsize=10)
         # Labelling the x- and y-axes with the units given from the flat file
         ax.set_xlabel('x /' + xy_units, size=10, weight='bold')
         ax.set_ylabel('y /' + xy_units, size=10, weight='bold')
@@ -708,51 +848,75 @@ class STT(object):
         sbar_xloc_max = x_res - 0.5 * (x_res / 10)
         sbar_xloc_min = x_res - 1.5 * (x_res / 10)
         sbar_loc_text = sbar_xloc_max - 0.5 * (x_res / 10)
-        # - Plotting the scale-bar and its unit text
-        ax.plot([sbar_xloc_min, sbar_xloc_max], [0.02 * y_res, 0.02 * y_res], 'k-', linewidth=5)
-        ax.text(sbar_loc_text, 0.04 * y_res, str(np.round(x_max / 10, 2)) + xy_units, weight='bold', ha='center')
+        # - Updating the scale-bar and its unit text
+        artists['scale bar'].set_data([sbar_xloc_min, sbar_xloc_max], [0.02 * y_res, 0.02 * y_res])
+        artists['scale text'].set_position((sbar_loc_text, 0.04 * y_res))
+        artists['scale text'].set_text(str(np.round(x_max / 10, 2)) + xy_units)
         # Setting the colorbar properties
         # - Define the colorbar ticks
-        cbar_ticks = [z for z in np.arange(vmin, vmax * 1.01, vmax / z_ticks)]
+        cbar_ticks = np.linspace(vmin, vmax, z_ticks + 1)
         # - Add labels to the colorbar ticks
-        cbar_ticklabels = [str(np.round(z, 2)) for z in
-                           np.arange(vmin, vmax + 1, vmax / z_ticks)]
-        # - Create the colorbar next to the primary topography image
-        cbar = plt.colorbar(cax, ticks=cbar_ticks, fraction=0.025, pad=0.00, orientation="vertical")
-        cbar.ax.set_yticklabels(cbar_ticklabels, size=10)
+        cbar_ticklabels = [str(np.round(z, 2)) for z in cbar_ticks]
+        # - Update the colorbar next to the primary topography image
+        artists['colorbar'].set_ticks(cbar_ticks)
+        artists['colorbar'].ax.set_yticklabels(cbar_ticklabels, size=10)
         # Set the x-and y-limits to be equal to the size of the image
         ax.set_xlim(0, x_res)
         ax.set_ylim(0, y_res)
-        # Adding a legend to show the color of the plane and cropped polygons
-        ax.legend(handles=list([patch.Patch(color='blue', label='plane'),
-                                patch.Patch(color='green', label='crop')]),
-                  loc='best', prop={'size': 8}, frameon=False)
-        # Adding a grid to the minimap
-        ax.grid(True, color='gray')
-
-        #  Add text to the plot for all the important information
-        plt.gcf().text(0.35, 0.86, flat_file[scan_dir].info['runcycle'][:-1] + ' : ' +
-                       flat_file[scan_dir].info['direction'], fontsize=14, weight='bold')
-        plt.gcf().text(0.35, 0.84, flat_file[scan_dir].info['date'], fontsize=14, weight='bold')
-
-        plt.gcf().text(0.35, 0.82, 'Comments: ' + flat_file[scan_dir].info['comment'], fontsize=14)
-        plt.gcf().text(0.35, 0.75, 'Current set-point: ' + str(flat_file[scan_dir].info['current']) + str('A'),
-                       fontsize=14)
-        plt.gcf().text(0.35, 0.73, 'Voltage bias: ' + str(np.round(flat_file[scan_dir].info['vgap'], 2)) + str('V'),
-                       fontsize=14)
-        plt.gcf().text(0.35, 0.71, '[' + str(np.int(x_res)) + 'x' + str(np.int(y_res)) + '] $pts$',
-                       fontsize=14)
-        plt.gcf().text(0.35, 0.69, '[' + str(np.round(x_max, 1)) + 'x' + str(np.round(y_max, 1)) + '] $' + xy_units
-                       + '^2$', fontsize=14)
-        # Extract the x, y incremental real units from the flat file (resolution of the x-y scan directions)
-        x_inc = flat_file[scan_dir].info['xinc']
-        y_inc = flat_file[scan_dir].info['yinc']
-        plt.gcf().text(0.35, 0.67, '$\\Delta x$ = ' + str(np.round(x_inc, 4)) + xy_units, fontsize=14)
-        plt.gcf().text(0.35, 0.65, '$\\Delta y$ = ' + str(np.round(y_inc, 4)) + xy_units, fontsize=14)
-
-    def other_topo_plots(self, flat_file, ax, scan_dir=0, cmap=None, vmin=None, vmax=None):
-        """
-        Function to plot all the other STM topographic data that has not been selected.
+
+        # Update the text for all the important information
+        info = flat_file[scan_dir].info
+        x_inc = info['xinc']
+        y_inc = info['yinc']
+        info_text = [info['runcycle'][:-1] + ' : ' + info['direction'],
+                     info['date'],
+                     'Comments: ' + info['comment'],
+                     'Current set-point: ' + str(info['current']) + str('A'),
+                     'Voltage bias: ' + str(np.round(info['vgap'], 2)) + str('V'),
+                     '[' + str(int(x_res)) + 'x' + str(int(y_res)) + '] $pts$',
+                     '[' + str(np.round(x_max, 1)) + 'x' + str(np.round(y_max, 1)) + '] $' + xy_units + '^2$',
+                     '$\\Delta x$ = ' + str(np.round(x_inc, 4)) + xy_units,
+                     '$\\Delta y$ = ' + str(np.round(y_inc, 4)) + xy_units]
+        for text, string in zip(artists['info'], info_text):
+            text.set_text(string)
+        # Recording everything that is drawn but not blitted, such that a change in it needs a full redraw
+        artists['layout'] = tuple(info_text) + (x_res, y_res, vmin, vmax, cmap)
+        return artists
+
+    def minimap_areas_plot(self, artists, plane=None, crop=None):
+        """
+        Function to update the areas over which the plane subtraction and cropping are performed on the minimap.
+
+        :param artists: Dictionary of the artists returned by 'minimap_topo_plot'.
+        :param plane: Pixel co-ordinates [x0, x1, y0, y1] of the plane area (if None, it is hidden).
+        :param crop: Tuple (Px, Py, V) of the vertices and arrow of the cropped area (if None, it is hidden).
+        """
+        # Updating the area over which the plane subtraction is performed
+        if plane is None:
+            artists['plane points'].set_data([], [])
+            artists['plane area'].set_visible(False)
+        else:
+            x0, x1, y0, y1 = plane
+            artists['plane points'].set_data([x0, x1, x1, x0], [y0, y0, y1, y1])
+            artists['plane area'].set_xy(np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]]))
+            artists['plane area'].set_visible(True)
+        # Updating the area over which the cropping is performed
+        if crop is None:
+            artists['crop points'].set_data([], [])
+            artists['crop area'].set_visible(False)
+            artists['crop arrow'].set_visible(False)
+        else:
+            Px, Py, V = crop
+            artists['crop points'].set_data(np.append(Px, Px[0]), np.append(Py, Py[0]))
+            artists['crop area'].set_xy(np.transpose([Px, Py]))
+            artists['crop area'].set_visible(True)
+            artists['crop arrow'].set_data(x=V[0], y=V[1], dx=V[2], dy=V[3])
+            artists['crop arrow'].set_visible(True)
+
+    def other_topo_plots(self, flat_file, ax, scan_dir=0, cmap=None, vmin=None, vmax=None, artists=None):
+        """
+        Function to plot all the other STM topographic data that has not been selected. The artists are only created on
+        the first call, and are then updated in place on every subsequent call.
 
         Arguments
         :param flat_file: An instance of an Omicron topography flat file.
@@ -763,26 +927,42 @@ class STT(object):
         :param cmap:        Matplotlib colormap name.
         :param vmin:        Use to manually define the minimum value of the colour scale.
         :param vmax:        Use to manually define the maximum value of the colour scale.
+        :param artists:     Dictionary of the artists returned by a previous call (if None, they are created).
+        :return: Dictionary of the artists of the plot.
         """
         # Set minimum value of the topography scan to zero and convert to nanometers
-        figure_data = (flat_file[scan_dir].data - np.amin(flat_file[scan_dir].data)) / PC["nano"]
+        # - The pyramid level that matches the size of the axes on screen is displayed, over the full resolution range
+        pyramid = tf.image_pyramid(flat_file[scan_dir])
+        figure_data = pyramid.display(fr.axes_pixel_shape(ax), PC["nano"])
+        # - The automatic colour scale spans the percentiles of the cached height histogram, so hot pixels are ignored
+        auto_vmin, auto_vmax = pyramid.histogram().contrast(scale=PC["nano"])
         # Setting the default parameters for the color-map and color-scale
         if cmap is None:
             cmap = 'hot'
         if vmin is None:
-            vmin = np.amin(figure_data)
+            vmin = auto_vmin if vmax is None else 0.
         if vmax is None:
-            vmax = 1.25 * np.amax(figure_data)
-            # - If no scan is peformed such that vmax is zero, then to avoid an error, set it to one
-            if vmax == 0:
-                vmax = 1
-        # Plotting the topography image
-        cax = ax.imshow(figure_data, origin='lower', cmap=cmap, vmin=vmin, vmax=vmax, aspect='equal')
-        # Removing all the x- and y-axes ticks
-        ax.axis("off")
+            vmax = auto_vmax
+        # Creating the artists of the topography image, only if they do not already exist
+        if artists is None:
+            artists = dict()
+            artists['image'] = ax.imshow(figure_data, origin='lower', cmap=cmap, vmin=vmin, vmax=vmax, aspect='equal')
+            artists['scale bar'], = ax.plot([], [], 'k-', linewidth=3)
+            artists['no scan'] = ax.text(0, 0, 'NO SCAN TAKEN', fontsize=15, color=[1, 1, 1], weight='bold',
+                                         rotation=45, ha='center', va='center')
+            # - Removing all the x- and y-axes ticks
+            ax.axis("off")
+        # Updating the topography image
+        image = artists['image']
+        image.set_data(figure_data)
+        image.set_cmap(cmap)
+        image.set_clim(vmin, vmax)
         # Extract the total number of x, y pixels from the flat file (total number of points in the scan)
         x_res = flat_file[scan_dir].info['xres']
         y_res = flat_file[scan_dir].info['yres']
+        image.set_extent((-0.5, x_res - 0.5, -0.5, y_res - 0.5))
+        ax.set_xlim(-0.5, x_res - 0.5)
+        ax.set_ylim(-0.5, y_res - 0.5)
         # Adding a title to the graph
         ax.set_title(flat_file[scan_dir].info['runcycle'][:-1] + ' : ' + self.scan_dict_inv[scan_dir],
                      fontsize=8, weight='bold')
@@ -790,12 +970,14 @@ class STT(object):
         # - Defining the size and location of the scale bar
         sbar_xloc_max = x_res - 0.5 * int(x_res / 10)
         sbar_xloc_min = x_res - 1.5 * int(x_res / 10)
-        # - Plotting the scale-bar and its unit text
-        ax.plot([sbar_xloc_min, sbar_xloc_max], [0.02 * y_res, 0.02 * y_res], 'k-', linewidth=3)
+        # - Updating the scale-bar
+        artists['scale bar'].set_data([sbar_xloc_min, sbar_xloc_max], [0.02 * y_res, 0.02 * y_res])
         # If there is no scan performed, add text to say this
-        if np.sum(np.sum(figure_data)) == 0:
-            ax.text(0.5*x_res, 0.5*y_res, 'NO SCAN TAKEN', fontsize=15, color=[1, 1, 1], weight='bold', rotation=45,
-                    ha='center', va='center')
+        artists['no scan'].set_position((0.5 * x_res, 0.5 * y_res))
+        artists['no scan'].set_visible(bool(pyramid.max == pyramid.min))
+        # Recording everything that is drawn but not blitted, such that a change in it needs a full redraw
+        artists['layout'] = (flat_file[scan_dir].info['runcycle'], scan_dir, x_res, y_res)
+        return artists
 
     def get_widgets(self):
         """
@@ -815,11 +997,25 @@ class STT(object):
                                                           justify_content='center', height='90%', width="95%"))
 
         # Toggle Buttons widget to select the type of analysis to be performed
-        level_type_1 = ipy.ToggleButtons(options=['None', 'Line-wise', 'Local plane'], value='None',
+        level_type_1 = ipy.ToggleButtons(options=['None', 'Line-wise', 'Line median', 'Local plane'], value='None',
                                          description='$$Leveling:$$', continuous_update=False,
                                          layout=ipy.Layout(display='inline-flex', flex_flow='row',
                                                            align_items='stretch', align_content='stretch',
                                                            height='50%', width="100%"))
+        # Checkbox widget to remove the scan-line artifacts (streaks and scars) before the leveling
+        scars_1 = ipy.Checkbox(description="$$Remove\,scars:$$", value=False,
+                               layout=ipy.Layout(width='95%', height='auto', display='flex',
+                                                 flex_flow='row', align_items='stretch'))
+        # Toggle Buttons and slider widgets to choose the Fourier filter that is applied after the leveling
+        fourier_1 = ipy.ToggleButtons(options=['None', 'Low-pass', 'High-pass'], value='None',
+                                      description='$$Fourier\,filter:$$', continuous_update=False,
+                                      layout=ipy.Layout(display='inline-flex', flex_flow='row',
+                                                        align_items='stretch', align_content='stretch',
+                                                        height='auto', width="100%"))
+        cutoff_1 = ipy.FloatSlider(value=2., min=0.05, max=20., step=0.05, description="$f_c\,[nm^{-1}]$",
+                                   color='black', continuous_update=False,
+                                   layout=ipy.Layout(width='95%', height='', display='flex', flex_flow='row',
+                                                     align_items='stretch'))
         # Float text widgets to choose the x and y points for the local plane subtraction
         # - Defining all the x and y co-ordinate pairs for local-place selection
         x0_coord_1 = ipy.FloatSlider(value=0, min=0, max=500, description="$x_0$", color='black',
@@ -895,7 +1091,8 @@ class STT(object):
         # Creating a tab widget to hold all the operational information
         all_tabs = ipy.Tab([ipy.VBox([level_type_1,
                                       ipy.HBox([x0_coord_1, y0_coord_1]),
-                                      ipy.HBox([x1_coord_1, y1_coord_1])]
+                                      ipy.HBox([x1_coord_1, y1_coord_1]),
+                                      scars_1, fourier_1, cutoff_1]
                                      ),
                             ipy.VBox([label_2,
                                       ipy.HBox([x0_crop_2, y0_crop_2]),
@@ -916,17 +1113,72 @@ class STT(object):
                                                             width='15.5%', height='100%')),
                                  all_tabs])
 
+    def get_recipe(self, image_props):
+        """
+        Function to record the level and image operations, defined by the image properties, as a lazy pipeline.
+
+        :param image_props: Dictionary of the image properties, as defined in 'update_function'.
+        :return: The TopoPipeline instance of the scar removal, level, flip, rotate and crop operations.
+        """
+        return tp.recipe_from_props(image_props)
+
+    def set_fourier_terms(self, terms):
+        """
+        Function to set the Fourier filter terms (see 'topo_spectrum.filter_terms'), such as the Bragg masks from
+        'STT_fft.bragg_terms', which are applied together with the filter of the widgets from the next update onwards.
+
+        :param terms: List of the terms of the Fourier filter.
+        """
+        self.fourier_terms = list(ts.filter_terms(terms))
+
+    def save_recipe(self, file_path):
+        """
+        Function to save the image properties of the current session to a recipe file, which can then be applied to
+        whole folders of topography scans by the 'topo_batch.py' command-line tool.
+
+        :param file_path: Path of the recipe file.
+        """
+        tp.save_recipe(file_path, self.image_props)
+
+    def stages(self, file_path, flat_file, recipe):
+        """
+        Function to define the level and image stages of a recipe over the scan directions of a flat-file, where the
+        result of each stage is cached against its own inputs in the stage cache.
+
+        :param file_path: Path of the flat-file, which keys its cached stages.
+        :param flat_file: The TopoFile instance of the flat-file.
+        :param recipe: The TopoPipeline instance of the level and image operations.
+        :return: The functions that return the leveled TopoFile (where only the given scan direction is leveled) and
+        the final DataArray of a scan direction.
+        """
+        level_recipe, geometry_recipe = recipe.leveling(), recipe.geometry()
+
+        def level(scan_dir):
+            return self.stage_cache.get(
+                ('level', file_path, scan_dir, level_recipe.key()),
+                lambda: flat_file.replace(scan_dir, level_recipe.evaluate(flat_file, [scan_dir])[scan_dir].data))
+
+        def final(scan_dir):
+            return self.stage_cache.get(
+                ('geometry', file_path, scan_dir, recipe.key()),
+                lambda: geometry_recipe.evaluate(level(scan_dir), [scan_dir])[scan_dir])
+        return level, final
+
     def update_function(self, chosen_data, scan_dir, level_type, p_x0, p_x1, p_y0, p_y1,
                         c_x0, c_x1, c_y0, c_y1,
-                        rot, xflip, yflip, smooth, colormap, autocontrast, coarse_cont, fine_cont):
+                        rot, xflip, yflip, smooth, colormap, autocontrast, coarse_cont, fine_cont, scars=False,
+                        fourier='None', cutoff=2.):
         """
         Updates the topography scans and analysis using the defined widgets.
         """
+        # Start the measurement of the time taken to render this frame
+        self.figure_display.begin()
         # Obtain the file name selected by the user
         self.selected_file = chosen_data
 
         # Extracting the flat-file instances of the selected file and it's 'scan_dir' parameter
         self.selected_data_extract(scan_dir)
+        self.scheduler.check()
 
         # Defining all the properties for the main topography plot
         # - Converting from real units to pixel units for the local plane subtraction operation
@@ -935,8 +1187,16 @@ class STT(object):
         pix_p_y0 = self.nm2pnt(p_y0, self.selected_data, axis='y')
         pix_p_y1 = self.nm2pnt(p_y1, self.selected_data, axis='y')
 
+        # - Defining the terms of the Fourier filter, from the widgets and any terms that were set by the user
+        fourier_terms = list(self.fourier_terms)
+        if fourier == 'Low-pass':
+            fourier_terms.append(('lowpass', cutoff))
+        elif fourier == 'High-pass':
+            fourier_terms.append(('highpass', cutoff))
+
         # - Define a dictionary of all the image properties
-        self.image_props = {'leveling': level_type, "real plane": np.array([p_x0, p_x1, p_y0, p_y1]),
+        self.image_props = {'scars': scars, 'fourier': fourier_terms,
+                            'leveling': level_type, "real plane": np.array([p_x0, p_x1, p_y0, p_y1]),
                             "real crop": np.array([c_x0, c_x1, c_y0, c_y1]),
                             "rotation": rot, "x flip": xflip, "y flip": yflip, 'smooth': smooth,
                             "colormap": colormap, "auto contrast": autocontrast,
@@ -944,10 +1204,16 @@ class STT(object):
 
         # Writing labels to specify what analysis has been performed
         analysis_string = ''
+        if scars:
+            analysis_string += 'SR, \n'
         if level_type == 'Line-wise':
             analysis_string += 'LW, \n'
+        elif level_type == 'Line median':
+            analysis_string += 'LM, \n'
         elif level_type == 'Local plane':
             analysis_string += 'LP, \n'
+        if len(fourier_terms) > 0:
+            analysis_string += 'FF, \n'
         if rot != 0:
             analysis_string += 'R{' + str(rot) + 'deg}, \n'
         if xflip:
@@ -959,144 +1225,87 @@ class STT(object):
 
         # Defining all the properties for the minimap topography plot
         # - Extracting the vertices of the rectangle if the image is rotated and then cropped
-        Px, Py, V = self.minimap_crop(c_x0, c_x1, c_y0, c_y1, rot)
-
-        # If no background subtraction is performed
-        if level_type == 'None':
-            # Executing the level operations
-            self.leveled_data = self.selected_data
-
-            # Executing the image operations
-            topo_f = self.topo_flip(self.leveled_data, xflip, yflip)
-            topo_fr = self.topo_rotate(topo_f, rot)
-            topo_frc = self.topo_crop(topo_fr, c_x0, c_x1, c_y0, c_y1)
-            self.final_data = topo_frc
-
-            # Plotting the main topography scan selected
-            plt.subplots(figsize=(22, 10))
-            ax1 = plt.subplot(1, 2, 2)
-            if autocontrast:
-                self.topo_plot(self.final_data, ax1, self.scan_dir, colormap, None, None, smooth)
-            else:
-                self.topo_plot(self.final_data, ax1, self.scan_dir, colormap, None, self.image_props["contrast"],
-                               smooth)
-
-            # Plotting the minimap of the topography scan selected
-            ax2 = plt.subplot(2, 4, 6)
-            self.minimap_topo_plot(self.leveled_data, ax2, self.scan_dir, colormap)
-            # - Plotting the area over which the cropping is performed
-            if rot == 0 or rot == 90 or rot == 180 or rot == 270:
-                Px = np.append(Px, Px[0])
-                Py = np.append(Py, Py[0])
-                ax2.plot(Px, Py, 'go-', alpha=1, markersize=4, linewidth=2)
-                ax2.arrow(V[0], V[1], V[2], V[3], head_width=7, head_length=5, fc='g', ec='g', linewidth=3)
-                ax2.fill_between(Px, Py, color='green', alpha=0.4)
-            # Adding the analysis information
-            plt.gcf().text(0.35, 0.62, analysis_string, fontsize=12, va='top', ha='left')
-
-            # Plotting all the other topography scans
-            plt.subplots(figsize=(10, 3))
-            ax3 = plt.subplot(1, 3, 1)
-            self.other_topo_plots(self.leveled_data, ax3, self.scan_dir_not[0], colormap)
-            ax4 = plt.subplot(1, 3, 2)
-            self.other_topo_plots(self.leveled_data, ax4, self.scan_dir_not[1], colormap)
-            ax5 = plt.subplot(1, 3, 3)
-            self.other_topo_plots(self.leveled_data, ax5, self.scan_dir_not[2], colormap)
-
-        # If line-wise background subtraction is performed
-        elif level_type == "Line-wise":
-            # Executing the level operations
-            self.leveled_data = self.topo_linewise(self.selected_data, self.scan_dir)
-
-            # Executing the image operations
-            topo_f = self.topo_flip(self.leveled_data, xflip, yflip)
-            topo_fr = self.topo_rotate(topo_f, rot)
-            topo_frc = self.topo_crop(topo_fr, c_x0, c_x1, c_y0, c_y1)
-            self.final_data = topo_frc
-
-            # Plotting the main topography scan selected
-            plt.subplots(figsize=(22, 10))
-            ax1 = plt.subplot(1, 2, 2)
-            if autocontrast:
-                self.topo_plot(self.final_data, ax1, self.scan_dir, colormap, None, None, smooth)
-            else:
-                self.topo_plot(self.final_data, ax1, self.scan_dir, colormap, None, self.image_props["contrast"],
-                               smooth)
-
-            # Plotting the minimap of the topography scan selected
-            ax2 = plt.subplot(2, 4, 6)
-            self.minimap_topo_plot(self.leveled_data, ax2, self.scan_dir, colormap)
-            # - Plotting the area over which the cropping is performed
-            if rot == 0 or rot == 90 or rot == 180 or rot == 270:
-                Px = np.append(Px, Px[0])
-                Py = np.append(Py, Py[0])
-                ax2.plot(Px, Py, 'go-', alpha=1, markersize=4, linewidth=2)
-                ax2.arrow(V[0], V[1], V[2], V[3], head_width=7, head_length=5, fc='g', ec='g', linewidth=3)
-                ax2.fill_between(Px, Py, color='green', alpha=0.4)
-            # Adding the analysis information
-            plt.gcf().text(0.35, 0.62, analysis_string, fontsize=12, va='top', ha='left')
-
-            # Plotting all the other topography scans
-            plt.subplots(figsize=(10, 3))
-            ax3 = plt.subplot(1, 3, 1)
-            self.other_topo_plots(self.leveled_data, ax3, self.scan_dir_not[0], colormap)
-            ax4 = plt.subplot(1, 3, 2)
-            self.other_topo_plots(self.leveled_data, ax4, self.scan_dir_not[1], colormap)
-            ax5 = plt.subplot(1, 3, 3)
-            self.other_topo_plots(self.leveled_data, ax5, self.scan_dir_not[2], colormap)
-
-        # If local plane background subtraction is performed
-        elif level_type == "Local plane":
-            # Executing the level operations
-            self.leveled_data = self.topo_localplane(self.selected_data, self.scan_dir, p_x0, p_x1, p_y0, p_y1)
-
-            # Executing the image operations
-            topo_f = self.topo_flip(self.leveled_data, xflip, yflip)
-            topo_fr = self.topo_rotate(topo_f, rot)
-            topo_frc = self.topo_crop(topo_fr, c_x0, c_x1, c_y0, c_y1)
-            self.final_data = topo_frc
-
-            # Plotting the main topography scan selected
-            plt.subplots(figsize=(22, 10))
-            ax1 = plt.subplot(1, 2, 2)
-            if autocontrast:
-                self.topo_plot(self.final_data, ax1, self.scan_dir, colormap, None, None, smooth)
-            else:
-                self.topo_plot(self.final_data, ax1, self.scan_dir, colormap, None, self.image_props["contrast"],
-                               smooth)
-
-            # Plotting the minimap of the topography scan selected
-            ax2 = plt.subplot(2, 4, 6)
-            self.minimap_topo_plot(self.leveled_data, ax2, self.scan_dir, colormap)
-            # - Plotting the area over which the plane subtraction is performed
-            ax2.plot([pix_p_x0, pix_p_x1, pix_p_x1, pix_p_x0], [pix_p_y0, pix_p_y0, pix_p_y1, pix_p_y1], 'bo',
-                     alpha=0.4)
-            ax2.fill_between([pix_p_x0, pix_p_x1], [pix_p_y0, pix_p_y0], [pix_p_y1, pix_p_y1], color='blue',
-                             alpha=0.4)
-            # - Plotting the area over which the cropping is performed
-            if rot == 0 or rot == 90 or rot == 180 or rot == 270:
-                Px = np.append(Px, Px[0])
-                Py = np.append(Py, Py[0])
-                ax2.plot(Px, Py, 'go-', alpha=1, markersize=4, linewidth=2)
-                ax2.arrow(V[0], V[1], V[2], V[3], head_width=7, head_length=5, fc='g', ec='g', linewidth=3)
-                ax2.fill_between(Px, Py, color='green', alpha=0.4)
-            # Adding the analysis information
-            plt.gcf().text(0.35, 0.62, analysis_string, fontsize=12, va='top', ha='left')
-
-            # Plotting all the other topography scans
-            plt.subplots(figsize=(10, 3))
-            ax3 = plt.subplot(1, 3, 1)
-            self.other_topo_plots(self.leveled_data, ax3, self.scan_dir_not[0], colormap)
-            ax4 = plt.subplot(1, 3, 2, sharey=ax3)
-            self.other_topo_plots(self.leveled_data, ax4, self.scan_dir_not[1], colormap)
-            ax5 = plt.subplot(1, 3, 3, sharey=ax4)
-            self.other_topo_plots(self.leveled_data, ax5, self.scan_dir_not[2], colormap)
-
-        # Show the figure that has been created
-        plt.show()
+        Px, Py, V = self.minimap_crop(c_x0, c_x1, c_y0, c_y1, rot, xflip, yflip)
+
+        # Executing the level and image operations, where only the selected scan direction is evaluated
+        # - Recording the recipe of the level and image operations; flip, rotate and crop are fused into one transform
+        self.image_recipe = self.get_recipe(self.image_props)
+        # - Only the selected scan direction is evaluated now, whilst the others are evaluated when they are requested
+        # - Each stage is cached against its own inputs, so only the stages downstream of a change are re-evaluated
+        level, final = self.stages(self.flat_files[self.selected_pos], self.selected_data, self.image_recipe)
+        self.leveled_data = level(self.scan_dir)
+        self.scheduler.check()
+        self.final_data = tp.LazyScans(len(self.selected_data), final)
+        self.final_data[self.scan_dir]
+        self.scheduler.check()
+
+        # Appending the roughness statistics of the final image, which are read from its cached height histogram
+        self.height_stats = self.height_statistics(self.final_data, self.scan_dir)
+        analysis_string += '\n\nRa = {:.3f} nm\nRq = {:.3f} nm\nSkew = {:.2f}'.format(
+            self.height_stats['Ra'], self.height_stats['Rq'], self.height_stats['skew'])
+
+        # Rendering the figures, which are only built once and then have their artists updated in place
+        self.topo_render(level_type, [pix_p_x0, pix_p_x1, pix_p_y0, pix_p_y1], (Px, Py, V), smooth, colormap,
+                         autocontrast, analysis_string)
 
         return
 
+    def topo_render(self, level_type, plane, crop, smooth, colormap, autocontrast, analysis_string):
+        """
+        Renders the main topography scan, its minimap and all the other topography scans. The figures are only built on
+        the first call, after which the image data, colour scales, extents and lines are all updated in place and, where
+        only these have changed, blitted onto the figure.
+
+        :param level_type: The type of leveling performed.
+        :param plane: Pixel co-ordinates [x0, x1, y0, y1] of the plane area.
+        :param crop: Tuple (Px, Py, V) of the vertices and arrow of the cropped area.
+        :param smooth: If smoothing should be applied.
+        :param colormap: Matplotlib colormap name.
+        :param autocontrast: If the colour scale should be automatically set.
+        :param analysis_string: String of the analysis performed.
+        """
+        # Building the figures only if they do not already exist
+        if self.topo_figure is None:
+            self.topo_figure = fr.LiveFigure(figsize=(22, 10))
+            self.topo_figure.axes['main'] = self.topo_figure.fig.add_subplot(1, 2, 2)
+            self.topo_figure.axes['minimap'] = self.topo_figure.fig.add_subplot(2, 4, 6)
+            self.topo_figure.artists['analysis'] = self.topo_figure.fig.text(0.35, 0.62, '', fontsize=12, va='top',
+                                                                             ha='left')
+            self.other_figure = fr.LiveFigure(figsize=(10, 3))
+            for i in range(3):
+                self.other_figure.axes[i] = self.other_figure.fig.add_subplot(1, 3, i + 1)
+        main_fig, other_fig = self.topo_figure, self.other_figure
+
+        # Updating the main topography scan selected
+        vmax = None if autocontrast else self.image_props["contrast"]
+        main_fig.artists['main'] = self.topo_plot(self.final_data, main_fig.axes['main'], self.scan_dir, colormap,
+                                                  None, vmax, smooth, artists=main_fig.artists.get('main'))
+        # Updating the minimap of the topography scan selected
+        main_fig.artists['minimap'] = self.minimap_topo_plot(self.leveled_data, main_fig.axes['minimap'],
+                                                             self.scan_dir, colormap,
+                                                             artists=main_fig.artists.get('minimap'))
+        # - Updating the areas over which the plane subtraction and cropping are performed
+        self.minimap_areas_plot(main_fig.artists['minimap'], plane if level_type == "Local plane" else None, crop)
+        # Updating the analysis information
+        main_fig.artists['analysis'].set_text(analysis_string)
+        # Redrawing the figure, where only the images and areas are blitted if nothing else has changed
+        minimap = main_fig.artists['minimap']
+        main_fig.draw(layout_key=(main_fig.artists['main']['layout'], minimap['layout'], analysis_string),
+                      blit_artists=[main_fig.artists['main']['image'], minimap['image'], minimap['plane points'],
+                                    minimap['plane area'], minimap['crop points'], minimap['crop area'],
+                                    minimap['crop arrow']])
+
+        # Updating all the other topography scans
+        for i in range(3):
+            other_fig.artists[i] = self.other_topo_plots(self.leveled_data, other_fig.axes[i], self.scan_dir_not[i],
+                                                         colormap, artists=other_fig.artists.get(i))
+        other_fig.draw(layout_key=tuple(other_fig.artists[i]['layout'] for i in range(3)),
+                       blit_artists=[other_fig.artists[i]['image'] for i in range(3)])
+
+        # Show the figures that have been updated, only if no newer update has been requested in the meantime
+        self.scheduler.check()
+        self.figure_display.show(main_fig, other_fig)
+
     def user_interaction(self):
         """
         Function that allows the continuous interaction of the widgets to update the figure.
@@ -1114,6 +1323,9 @@ class STT(object):
         p_y0 = self.widgets.children[1].children[0].children[1].children[1]
         p_x1 = self.widgets.children[1].children[0].children[2].children[0]
         p_y1 = self.widgets.children[1].children[0].children[2].children[1]
+        scars = self.widgets.children[1].children[0].children[3]
+        fourier = self.widgets.children[1].children[0].children[4]
+        cutoff = self.widgets.children[1].children[0].children[5]
         # - IMAGE OPERATIONS widgets
         c_x0 = self.widgets.children[1].children[1].children[1].children[0]
         c_y0 = self.widgets.children[1].children[1].children[1].children[1]
@@ -1129,28 +1341,38 @@ class STT(object):
         fine_cont = self.widgets.children[1].children[1].children[9]
 
         # Define the attribute to continuously update the figure, given the user interaction
-        self.output = ipy.interactive(self.update_function, chosen_data=chosen_data, scan_dir=scan_dir,
-                                      level_type=level_type, p_x0=p_x0, p_x1=p_x1, p_y0=p_y0, p_y1=p_y1,
-                                      c_x0=c_x0, c_x1=c_x1, c_y0=c_y0, c_y1=c_y1,
-                                      rot=rot, xflip=xflip, yflip=yflip, smooth=smooth, colormap=colormap,
-                                      autocontrast=autocontrast, coarse_cont=coarse_cont, fine_cont=fine_cont,
-                                      continous_update=False)
+        # - The widget events are passed to the scheduler, which only runs the latest update in the background
+        self.output = ipy.interactive_output(self.scheduler.submit, {
+            'chosen_data': chosen_data, 'scan_dir': scan_dir, 'level_type': level_type,
+            'p_x0': p_x0, 'p_x1': p_x1, 'p_y0': p_y0, 'p_y1': p_y1,
+            'c_x0': c_x0, 'c_x1': c_x1, 'c_y0': c_y0, 'c_y1': c_y1,
+            'rot': rot, 'xflip': xflip, 'yflip': yflip, 'smooth': smooth, 'colormap': colormap,
+            'autocontrast': autocontrast, 'coarse_cont': coarse_cont, 'fine_cont': fine_cont, 'scars': scars,
+            'fourier': fourier, 'cutoff': cutoff})
 
-        # Display the final output of the widget interaction
-        display(self.output.children[-1])
+        # Display the final output of the widget interaction, followed by the figures that are updated in place
+        display(self.output)
+        display(self.figure_display.output)
 
 
 # 2.1 - Defining the class object that will use the analysed topography scan to determine its fast-fourier transform
 class STT_fft(object):
-    def __init__(self, topo_data):
+    def __init__(self, topo_data, window='Hann', alpha=0.25):
         """
         Defines the initialisation of the class object.
         topo_data:     The 'STT' class object of the selected, analysed and final topography data.
+        window:        The apodization window applied before the transform; 'None', 'Hann' or 'Tukey'.
+        alpha:         Fraction of each axis that is tapered by the 'Tukey' window.
         """
         # 2.2.1 - Extract the final stm topography image from the first stage of the analysis
         self.topo_data = topo_data
+        self.analysis = topo_data   # The 'STT' class object, whose leveled image sets the frame of the Fourier filter
         self.topo_scan_dir = self.topo_data.scan_dict_inv[self.topo_data.scan_dir]
         self.topo_data = self.topo_data.final_data[self.topo_data.scan_dir]
+        self.window = window
+        self.alpha = alpha
+        self.spectrum = None        # The cached PowerSpectrum instance of the final topography image
+        self.fft = None             # The full, centred power spectral density of the final topography image
 
         # 2.2.2 - Determine the FFT and plot it
         plt.subplots(figsize=(20,10))
@@ -1241,10 +1463,9 @@ class STT_fft(object):
         ax.text(sbar_loc_text, 0.03 * y_res, str(np.round(x_max / 10, 2)) + xy_units, weight='bold', ha='center')
         # Setting the colorbar properties
         # - Define the colorbar ticks
-        cbar_ticks = [z for z in np.arange(vmin, vmax * 1.01, vmax / z_ticks)]
+        cbar_ticks = np.linspace(vmin, vmax, z_ticks + 1)
         # - Add labels to the colorbar ticks
-        cbar_ticklabels = [str(np.round(z, 2)) for z in
-                           np.arange(vmin, vmax + 1, vmax / z_ticks)]
+        cbar_ticklabels = [str(np.round(z, 2)) for z in cbar_ticks]
         # - Create the colorbar next to the primary topography image
         cbar = plt.colorbar(cax, ticks=cbar_ticks, fraction=0.025, pad=0.01)
         cbar.ax.set_yticklabels(cbar_ticklabels, size=13)  # Set colorbar tick labels
@@ -1264,10 +1485,65 @@ class STT_fft(object):
         ax.grid(True, color='gray', alpha=0.6)
 
     def fft_finder(self):
-        f = np.fft.fft2(self.topo_data.data/PC['nano'])
-        fshift = np.fft.fftshift(f)
-        magnitude_spectrum = (np.abs(fshift))**2
-        self.fft = magnitude_spectrum
+        """
+        Obtain the power spectral density of the final topography image. The spectrum is cached against the image, so
+        it is only computed once for each leveled image and window, however many times it is plotted or analysed.
+        """
+        self.spectrum = ts.power_spectrum(self.topo_data, self.window, self.alpha)
+        self.fft = self.spectrum.full()
+
+    def radial_psd(self, bins=None):
+        """
+        Return the radially averaged power spectral density of the final topography image.
+
+        :param bins: Number of annuli (if None, one annulus per frequency step is used).
+        :return: The 1D arrays of the frequencies (in 1/nm) and of the averaged power spectral density (in nm^4).
+        """
+        return self.spectrum.radial(bins)
+
+    def azimuthal_psd(self, bins=180, fmin=None, fmax=None):
+        """
+        Return the azimuthally averaged power spectral density of the final topography image.
+
+        :param bins: Number of sectors between 0 and 180 degrees.
+        :param fmin: Smallest frequency that is averaged, in 1/nm (if None, the lowest frequencies are excluded).
+        :param fmax: Largest frequency that is averaged, in 1/nm (if None, the smaller Nyquist frequency is used).
+        :return: The 1D arrays of the angles (in degrees) and of the averaged power spectral density (in nm^4).
+        """
+        return self.spectrum.azimuthal(bins, fmin, fmax)
+
+    def lattice_parameters(self, count=12, min_ratio=None):
+        """
+        Extract the lattice of the final topography image from the peaks of its cached power spectrum.
+
+        :param count: Largest number of peaks that are used.
+        :param min_ratio: Smallest ratio of the power of a peak to the median power at the same frequency (if None, the
+        default of 'topo_spectrum.find_peaks' is used).
+        :return: Dictionary of the peaks, lattice vectors (in nm), lattice constants (in nm) and angles (in degrees).
+        """
+        return ts.lattice_parameters(self.spectrum, count, min_ratio=min_ratio)
+
+    def bragg_terms(self, radius=None, keep=True, count=12):
+        """
+        Return the Fourier filter terms that keep (or remove) spots around the peaks of the power spectrum, which can be
+        passed to 'STT.set_fourier_terms' or stored in a recipe. The filter is applied before the image (flip, rotate
+        and crop) operations, so the peaks are found in the spectrum of the leveled image, before the Fourier filter
+        and the image operations, rather than in the spectrum of the final image that is plotted.
+
+        :param radius: Radius of the spots in 1/nm (if None, three frequency steps are used).
+        :param keep: If True, only the spots are kept (a Bragg filter), otherwise they are removed (a notch filter).
+        :param count: Largest number of peaks that are used.
+        :return: List of the Fourier filter terms.
+        """
+        # The leveled image is read from the level stage of the analysis, which is shared when there is no filter yet
+        stt = self.analysis
+        level, _ = stt.stages(stt.flat_files[stt.selected_pos], stt.selected_data, stt.image_recipe.unfiltered())
+        leveled_data = level(stt.scan_dir)
+        spectrum = ts.power_spectrum(leveled_data[stt.scan_dir], self.window, self.alpha)
+        peaks, _ = ts.find_peaks(spectrum, count)
+        if radius is None:
+            radius = 3 * max(1. / (spectrum.shape[1] * spectrum.xinc), 1. / (spectrum.shape[0] * spectrum.yinc))
+        return [('bragg' if keep else 'notch', [tuple(peak) for peak in peaks], radius)]
 
     def fft_plot(self, ax, fft, cmap=None, vmin=None, vmax=None):
         """
@@ -1296,18 +1572,18 @@ class STT_fft(object):
         if cmap is None:
             cmap = 'jet'
         if vmin is None:
-            vmin = np.amin(fft)
+            # - The log-scale needs a positive minimum, so the zero power of the removed mean is skipped
+            positive = fft[fft > 0]
+            vmin = np.amin(positive) if positive.size > 0 else 1e-12
         if vmax is None:
             vmax = 1.25 * np.amax(fft)
             # - If no scan is performed such that vmax is globally zero, then to avoid an error, set it to unity
             if vmax == 0:
                 vmax = 1
 
-        x = 2 * (1 / np.abs(self.topo_data.info['xreal'] - self.topo_data.info['xreal_min']))
-        y = 2 * (1 / np.abs(self.topo_data.info['yreal'] - self.topo_data.info['yreal_min']))
-
-        cax = ax.imshow(fft, origin='center', cmap=cmap, aspect='auto', norm=LogNorm(vmin=vmin, vmax=vmax),
-                        extent=[-1*x, x, -1*y, y])
+        # The spectrum is centred on the zero frequency, with its axes in reciprocal nanometers
+        cax = ax.imshow(fft, origin='lower', cmap=cmap, aspect='auto', norm=LogNorm(vmin=vmin, vmax=vmax),
+                        extent=self.spectrum.extent())
 
         # Setting the colorbar properties
         # - Create the colorbar next to the primary topography image
@@ -1346,8 +1622,15 @@ class STT_lineprof(object):
         self.line_prof_z = None         # Defining the y-domain of the line-profile taken
         self.line_prof_dl = None
         self.line_prof_dz = None
+        self.line_prof_std = None       # Defining the standard deviation across the swath of the line-profile taken
+        self.line_prof_width = 0        # Defining the real width of the swath that is averaged (zero for a single line)
+
+        # 2.2.3 - Figure that is built once and then updated in place, in the background
+        self.profile_figure = None                  # Live figure of the topography scan and its line profile
+        self.figure_display = fr.FigureDisplay()    # Output that displays the figure and measures the frame times
+        self.scheduler = fr.RenderScheduler(self.update_function, self.figure_display)  # Background updates
 
-        # 2.2.3 - User interaction
+        # 2.2.4 - User interaction
         self.widgets = None         # Widget object to hold all pre-defined widgets
         self.get_widgets()          # Function to get all of the pre-defined widgets
         self.output = None          # Output to the user interaction with widgets
@@ -1380,7 +1663,7 @@ class STT_lineprof(object):
 
         return pnt
 
-    def profile(self, points, flat_file, num_points=1000):
+    def profile(self, points, flat_file, num_points=1000, order=1):
         """
         Extract a line profile from the given flat file and list of x, y co-ordinates.
 
@@ -1390,7 +1673,8 @@ class STT_lineprof(object):
 
         Optional Arguments
         :param num_points: Number of points in the line profile data.
-        :return: Line profile z-data, Line profile distance-data.
+        :param order: Order of the spline interpolation; 0 for the nearest pixel, 1 for bilinear and 3 for cubic.
+        :return: Line profile distance-data, Line profile z-data, distance and height uncertainties, total length.
         """
 
         # Finding the uncertainty in the line-profile dimensions
@@ -1401,54 +1685,40 @@ class STT_lineprof(object):
         # - Finding the uncertainty in the apparent height dimension in nanometers
         dz = 0.01
 
-        # If the points selected are identical, then return a zero array
-        if points[0][0] == points[1][0] and points[0][1] == points[1][1]:
-            z_data = np.zeros(num_points)
-            l_data = np.zeros(num_points)
-            return l_data, z_data, dl, dz
-
-        # Finding the total length of the line profile selected by the user
-        length = 0
-        for p in range(len(points) - 1):
-            length += np.sqrt((points[p + 1, 0] - points[p, 0]) ** 2 + (points[p + 1, 1] - points[p, 1]) ** 2)
-        # Finding the total number of pixels in the x- and y-direction
-        x_len = len(flat_file.data[0])
-        y_len = len(flat_file.data)
-        # Finding the points in terms of the x- and y-pixels
-        for point in range(len(points)):
-            points[point][0] = self.nm2pnt(points[point][0] - self.topo_xmin, flat_file, axis='x')
-            points[point][1] = self.nm2pnt(points[point][1] - self.topo_ymin, flat_file, axis='y')
-            if points[point][0] >= x_len:
-                points[point][0] = x_len - 1
-            if points[point][1] >= y_len:
-                points[point][1] = y_len - 1
-
-        # Defining a function that will determine the value of z for a given co-ordinate (x, y)
-        def line(coords, flat_file):
-
-            x0, y0 = coords[0]
-            x1, y1 = coords[1]
-            num = num_points
-            x, y = np.linspace(x0, x1, num), np.linspace(y0, y1, num)
-
-            zi = flat_file.data[y.astype(np.int), x.astype(np.int)]
-
-            return zi
-
-        # Determination of the line profile data
-        z_data = np.array([])
-        for pair in range(len(points) - 1):
-            z_data = np.append(z_data, line([points[pair], points[pair + 1]], flat_file))
-
-        # Determination of the domain of the line-profile data
-        l_data = np.linspace(0, length, len(z_data))
+        # Determination of the line profile data, sampled at equal steps along its length in real units
+        l_data, z_data, length = tf.line_profile(flat_file.data, points, flat_file.info, num_points, order)
 
         # Return the line profile data and its total length in real units
         return l_data, z_data, dl, dz, length
 
-    def profile_plot(self, ax, l_data, z_data, dl, dz):
+    def swath(self, points, flat_file, width, num_points=1000, order=1):
         """
-        Create a plot of the given line profile data.
+        Extract a swath profile, which is the line profile averaged across a band of the given width around the line.
+
+        Arguments
+        :param points: List of x, y co-ordinate pairs that define the line profile in real units.
+        :param flat_file: An instance of a Omicron flat file.
+        :param width: Width of the band in real units.
+
+        Optional Arguments
+        :param num_points: Number of points in the line profile data.
+        :param order: Order of the spline interpolation; 0 for the nearest pixel, 1 for bilinear and 3 for cubic.
+        :return: Line profile distance-data, mean and standard deviation of the z-data across the band, distance and
+        height uncertainties, total length.
+        """
+        # Finding the uncertainty in the line-profile dimensions, as for the single line profile
+        dl = np.round(np.sqrt(flat_file.info['xinc'] ** 2 + flat_file.info['yinc'] ** 2), 4)
+        dz = 0.01
+
+        # Determination of the swath profile data, sampled over the band with a single interpolation
+        l_data, z_mean, z_std, length = tf.swath_profile(flat_file.data, points, flat_file.info, width, num_points,
+                                                         order=order)
+        return l_data, z_mean, z_std, dl, dz, length
+
+    def profile_plot(self, ax, l_data, z_data, dl, dz, z_std=None, artists=None):
+        """
+        Create a plot of the given line profile data. The artists are only created on the first call, and are then
+        updated in place on every subsequent call.
 
         Arguments
         :param ax: The axes upon which to make the topography plot.
@@ -1459,32 +1729,48 @@ class STT_lineprof(object):
         Optional Arguments
         :param xticks: Number of x-axis ticks.
         :param yticks: Number of y-axis ticks.
-        :return:
+        :param z_std: Standard deviation across the swath of the line profile, which is shaded around it.
+        :param artists: Dictionary of the artists returned by a previous call (if None, they are created).
+        :return: Dictionary of the artists of the plot.
         """
         # Converting the apparent height in terms of nano-meters
         profile_data = z_data / PC['nano']
 
-        # Plot the line profile data
-        ax.errorbar(l_data, profile_data, xerr=dl, yerr=dz, fmt='ko-', ecolor='gray', capthick=2, markersize=1.5,
-                    linewidth=0.5)
-
-        # Set the x-axis label
-        ax.set_xlabel('L / nm', size=18, weight='bold')
-        # Set the y-axis label
-        ax.set_ylabel('Apparent height / nm', size=18, weight='bold')
-
-        # Add horizontal and vertical axes lines
-        ax.axhline(0, color='black', linewidth=1.5)
-        ax.axvline(0, color='black', linewidth=1.5)
-        # Adding a legend to show the color of the plane and cropped polygons
-        ax.legend(handles=list([patch.Patch(color='black', label='Line-profile')]),
-                  loc='best', prop={'size': 15}, frameon=False)
-        # Adding a grid
-        ax.grid(True, color='gray')
+        # Creating the artists of the line profile, only if they do not already exist
+        if artists is None:
+            artists = dict()
+            # - The shading of the standard deviation across the swath, which is empty for a single line profile
+            artists['swath'] = ax.fill_between([], [], [], color='gray', alpha=0.4, linewidth=0)
+            # - The line profile data
+            artists['profile'] = ax.errorbar(l_data, profile_data, xerr=dl, yerr=dz, fmt='ko-', ecolor='gray',
+                                             capthick=2, capsize=0, markersize=1.5, linewidth=0.5)
+            # Set the x-axis label
+            ax.set_xlabel('L / nm', size=18, weight='bold')
+            # Set the y-axis label
+            ax.set_ylabel('Apparent height / nm', size=18, weight='bold')
+            # Add horizontal and vertical axes lines
+            ax.axhline(0, color='black', linewidth=1.5)
+            ax.axvline(0, color='black', linewidth=1.5)
+            # Adding a legend to show the color of the plane and cropped polygons
+            ax.legend(handles=list([patch.Patch(color='black', label='Line-profile')]),
+                      loc='best', prop={'size': 15}, frameon=False)
+            # Adding a grid
+            ax.grid(True, color='gray')
+
+        # Updating the shading of the standard deviation across the swath
+        if z_std is not None:
+            fr.set_fill(artists['swath'], l_data, profile_data - z_std / PC['nano'], profile_data + z_std / PC['nano'])
+        else:
+            fr.set_fill(artists['swath'], [], [])
+        # Updating the line profile data and rescaling the axes to it
+        fr.set_errorbar(artists['profile'], l_data, profile_data, dl, dz)
+        fr.rescale(ax, [artists['swath']])
+        return artists
 
-    def topo_profile_plot(self, ax, flat_file, points, cmap=None, vmin=None, vmax=None):
+    def topo_profile_plot(self, ax, flat_file, points, cmap=None, vmin=None, vmax=None, band=None, artists=None):
         """
-        Create a plot of the topography image, with the given line profile locations overlaid.
+        Create a plot of the topography image, with the given line profile locations overlaid. The topography image is
+        only plotted on the first call, after which only the line profile locations are updated in place.
 
         Arguments
         :param ax: The axes upon which to make the topography plot.
@@ -1498,9 +1784,35 @@ class STT_lineprof(object):
         :param vmax: Z-axis maximum value.
         :param xy_ticks: Number of x-, y-axis ticks.
         :param z_ticks: Number of z-axis ticks.
-        :return:
+        :param band: Outline of the band of the swath profile, as x, y co-ordinate pairs in pixel units.
+        :param artists: Dictionary of the artists returned by a previous call (if None, they are created).
+        :return: Dictionary of the artists of the plot.
+        """
+        # Creating the topography image and the artists of the line profile locations, only if they do not exist
+        if artists is None:
+            artists = self.topo_image_plot(ax, flat_file, cmap, vmin, vmax)
+
+        # Updating the line profile points on the axis
+        artists['line'].set_data(points[:, 0], points[:, 1])
+        if band is not None:
+            artists['band'].set_data(band[:, 0], band[:, 1])
+        else:
+            artists['band'].set_data([], [])
+        artists['P0'].set_position((points[0, 0], points[0, 1]))
+        artists['P1'].set_position((points[1, 0], points[1, 1]))
+        return artists
+
+    def topo_image_plot(self, ax, flat_file, cmap=None, vmin=None, vmax=None):
         """
+        Create a plot of the topography image, with the empty artists of the line profile locations overlaid.
 
+        :param ax: The axes upon which to make the topography plot.
+        :param flat_file: An instance of an Omicron flat file.
+        :param cmap: Pyplot color scheme to use.
+        :param vmin: Z-axis minimum value.
+        :param vmax: Z-axis maximum value.
+        :return: Dictionary of the artists of the plot.
+        """
         # Initialising the constants to be used for plotting
         # - Set minimum value of the topography scan to zero and convert to nanometers
         figure_data = (flat_file.data - np.amin(flat_file.data)) / PC["nano"]
@@ -1520,10 +1832,13 @@ class STT_lineprof(object):
 
         # Plotting the topography image
         cax = ax.imshow(figure_data, origin='lower', cmap=cmap, vmin=vmin, vmax=vmax, aspect='auto')
-        # Plot the line profile points on the axis
-        ax.plot(points[:, 0], points[:, 1], 'bo-', markersize=8, linewidth=2.5)
-        ax.text(points[0, 0], points[0, 1], 'P0', color='white', weight='bold', fontsize=12)
-        ax.text(points[1, 0], points[1, 1], 'P1', color='white', weight='bold', fontsize=12)
+        # Plot the line profile points on the axis, which are updated in place
+        artists = dict()
+        artists['image'] = cax
+        artists['line'], = ax.plot([], [], 'bo-', markersize=8, linewidth=2.5)
+        artists['band'], = ax.plot([], [], 'b--', linewidth=1.5)
+        artists['P0'] = ax.text(0, 0, 'P0', color='white', weight='bold', fontsize=12)
+        artists['P1'] = ax.text(0, 0, 'P1', color='white', weight='bold', fontsize=12)
 
         # Defining the x- and y-axes ticks
         # - Extract the x, y units from the flat file
@@ -1567,9 +1882,10 @@ class STT_lineprof(object):
         cbar_ticklabels = [str(np.round(z, 2)) for z in
                            np.arange(vmin, vmax + 1, vmax / z_ticks)]
         # - Create the colorbar next to the primary topography image
-        cbar = plt.colorbar(cax, ticks=cbar_ticks, fraction=0.025, pad=0.01)
-        cbar.ax.set_yticklabels(cbar_ticklabels, size=13)  # Set colorbar tick labels
+        cbar = ax.figure.colorbar(cax, ax=ax, fraction=0.025, pad=0.01)
         cbar.set_label('Height [nm]', size=13, weight='bold')  # Set colorbar label
+        cbar.set_ticks(cbar_ticks)
+        cbar.ax.set_yticklabels(cbar_ticklabels[:len(cbar_ticks)], size=13)  # Set colorbar tick labels
 
         # Define the limits of the plot
         ax.set_xlim([0, x_res])
@@ -1583,6 +1899,7 @@ class STT_lineprof(object):
 
         # Adding a grid
         ax.grid(True, color='gray', alpha=0.6)
+        return artists
 
     def get_widgets(self):
         """
@@ -1606,6 +1923,12 @@ class STT_lineprof(object):
                                      color='black', continuous_update=False,
                                      layout=ipy.Layout(width='100%', height='', display='flex', flex_flow='row',
                                                        align_items='stretch'))
+        # - Defining the width of the swath that is averaged across the line (zero for a single line)
+        width_1 = ipy.FloatSlider(value=0, min=0, max=0.25 * (self.topo_xmax - self.topo_xmin),
+                                  step=self.topo_data.info['xinc'], description="$w$", color='black',
+                                  continuous_update=False,
+                                  layout=ipy.Layout(width='50%', height='', display='flex', flex_flow='row',
+                                                    align_items='stretch'))
 
         # all_tabs.set_title(1, 'Sinusoidal fitting')
         # all_tabs.set_title(0, 'Single peak fitting')
@@ -1613,14 +1936,17 @@ class STT_lineprof(object):
 
         # Defining a global widget box to hold all of the widgets
         self.widgets = ipy.HBox([ipy.VBox([ipy.HBox([x0_coord_1, y0_coord_1]),
-                                           ipy.HBox([x1_coord_1, y1_coord_1])])],
+                                           ipy.HBox([x1_coord_1, y1_coord_1]),
+                                           width_1])],
                                 layout=ipy.Layout(display='inline-flex', flex_flow='column', align_items='stretch',
                                                   width='60%', height=''))
 
-    def update_function(self, l_x0, l_y0, l_x1, l_y1):
+    def update_function(self, l_x0, l_y0, l_x1, l_y1, width=0):
         """
         Update the line-profile figure using the interactive widgets.
         """
+        # Start the measurement of the time taken to render this frame
+        self.figure_display.begin()
 
         # Defining the real x-, y-coords where the line profile will be taken
         points = np.array([[l_x0, l_y0],
@@ -1628,38 +1954,67 @@ class STT_lineprof(object):
         self.line_points = points
 
         # Extracting the line profile, line profile domain, length and pixel points over the defined points
-        self.line_prof_l, self.line_prof_z, self.line_prof_dl, self.line_prof_dz, self.line_prof_len = self.profile(points, self.topo_data)
-        self.line_pix_points = points
-
-        # Defining the figure size
-        plt.subplots(figsize=(22, 10))
-
-        # Plotting the main topography scan selected
-        ax1 = plt.subplot(1, 2, 1)
-        self.topo_profile_plot(ax1, self.topo_data, self.line_pix_points)
-
-        # Plotting the line profile data
-        ax2 = plt.subplot(2, 2, 4)
-        self.profile_plot(ax2, self.line_prof_l, self.line_prof_z, self.line_prof_dl, self.line_prof_dz)
-
-        # Adding the necessary text information
-        plt.gcf().text(0.55, 0.86, self.topo_data.info['runcycle'][:-1] + ' : ' +
-                       self.topo_data.info['direction'], fontsize=15, weight='bold')
-        plt.gcf().text(0.55, 0.84, self.topo_data.info['date'], fontsize=15, weight='bold')
-
-        plt.gcf().text(0.55, 0.82, 'Comments: ' + self.topo_data.info['comment'], fontsize=15)
-        plt.gcf().text(0.55, 0.75, 'Current set-point: ' + str(self.topo_data.info['current']) + str('A'),
-                       fontsize=15)
-        plt.gcf().text(0.55, 0.73, 'Voltage bias: ' + str(np.round(self.topo_data.info['vgap'], 2)) + str('V'),
-                       fontsize=15)
-        # Extract the x, y incremental real units from the flat file (resolution of the x-y scan directions)
-        plt.gcf().text(0.55, 0.67, '$h_{max}$ = ' + str(np.round(np.max(self.line_prof_z/PC['nano']), 3)) + 'nm',
-                       fontsize=15)
-        plt.gcf().text(0.55, 0.65, '$L_{max}$ = ' + str(np.round(self.line_prof_len, 3)) + 'nm', fontsize=14)
-        plt.gcf().text(0.55, 0.63, '$\\Delta L$ = ' + str(self.line_prof_dl) + 'nm', fontsize=15)
-        plt.gcf().text(0.55, 0.61, '$\\Delta h$ = ' + str(self.line_prof_dz) + 'nm', fontsize=15)
-        # Show the figure that has been created
-        plt.show()
+        # - A non-zero width averages the line profile across a swath, whose standard deviation is also kept
+        self.line_prof_width = width
+        if width > 0:
+            self.line_prof_l, self.line_prof_z, self.line_prof_std, self.line_prof_dl, self.line_prof_dz, \
+                self.line_prof_len = self.swath(points, self.topo_data, width)
+            band = tf.profile_pixels(tf.swath_outline(points, width), self.topo_data.info)
+        else:
+            self.line_prof_l, self.line_prof_z, self.line_prof_dl, self.line_prof_dz, self.line_prof_len = \
+                self.profile(points, self.topo_data)
+            self.line_prof_std, band = None, None
+        self.line_pix_points = tf.profile_pixels(points, self.topo_data.info)
+
+        self.scheduler.check()
+
+        # Building the figure only if it does not already exist
+        if self.profile_figure is None:
+            self.profile_figure = fr.LiveFigure(figsize=(22, 10))
+            fig = self.profile_figure.fig
+            self.profile_figure.axes['topo'] = fig.add_subplot(1, 2, 1)
+            self.profile_figure.axes['profile'] = fig.add_subplot(2, 2, 4)
+            # - Adding the text information, which is updated with each line profile
+            self.profile_figure.artists['info'] = [
+                fig.text(0.55, 0.86, '', fontsize=15, weight='bold'),
+                fig.text(0.55, 0.84, '', fontsize=15, weight='bold'),
+                fig.text(0.55, 0.82, '', fontsize=15), fig.text(0.55, 0.75, '', fontsize=15),
+                fig.text(0.55, 0.73, '', fontsize=15), fig.text(0.55, 0.67, '', fontsize=15),
+                fig.text(0.55, 0.65, '', fontsize=14), fig.text(0.55, 0.63, '', fontsize=15),
+                fig.text(0.55, 0.61, '', fontsize=15)]
+        live_fig = self.profile_figure
+        ax1, ax2 = live_fig.axes['topo'], live_fig.axes['profile']
+
+        # Updating the line profile locations over the topography scan, which is only plotted once
+        live_fig.artists['topo'] = self.topo_profile_plot(ax1, self.topo_data, self.line_pix_points, band=band,
+                                                          artists=live_fig.artists.get('topo'))
+
+        # Updating the line profile data
+        live_fig.artists['profile'] = self.profile_plot(ax2, self.line_prof_l, self.line_prof_z, self.line_prof_dl,
+                                                        self.line_prof_dz, self.line_prof_std,
+                                                        artists=live_fig.artists.get('profile'))
+
+        # Updating the necessary text information
+        info_text = [self.topo_data.info['runcycle'][:-1] + ' : ' + self.topo_data.info['direction'],
+                     self.topo_data.info['date'],
+                     'Comments: ' + self.topo_data.info['comment'],
+                     'Current set-point: ' + str(self.topo_data.info['current']) + str('A'),
+                     'Voltage bias: ' + str(np.round(self.topo_data.info['vgap'], 2)) + str('V'),
+                     '$h_{max}$ = ' + str(np.round(np.max(self.line_prof_z/PC['nano']), 3)) + 'nm',
+                     '$L_{max}$ = ' + str(np.round(self.line_prof_len, 3)) + 'nm',
+                     '$\\Delta L$ = ' + str(self.line_prof_dl) + 'nm',
+                     '$\\Delta h$ = ' + str(self.line_prof_dz) + 'nm']
+        for text, string in zip(live_fig.artists['info'], info_text):
+            text.set_text(string)
+
+        # Redraw and show the figure that has been updated, only if no newer update has been requested in the meantime
+        # - Only the line profile, its locations and the text are blitted, unless the limits of the profile changed
+        self.scheduler.check()
+        topo, profile = live_fig.artists['topo'], live_fig.artists['profile']
+        live_fig.draw(layout_key=(ax2.get_xlim(), ax2.get_ylim()),
+                      blit_artists=[topo['line'], topo['band'], topo['P0'], topo['P1'], profile['swath']] +
+                      list(profile['profile'].get_children()) + live_fig.artists['info'])
+        self.figure_display.show(live_fig)
 
         return
 
@@ -1675,12 +2030,16 @@ class STT_lineprof(object):
         l_y0 = self.widgets.children[0].children[0].children[1]
         l_x1 = self.widgets.children[0].children[1].children[0]
         l_y1 = self.widgets.children[0].children[1].children[1]
+        width = self.widgets.children[0].children[2]
 
         # Define the attribute to continuously update the figure, given the user interaction
-        self.output = ipy.interactive(self.update_function, l_x0=l_x0, l_y0=l_y0, l_x1=l_x1, l_y1=l_y1)
+        # - The widget events are passed to the scheduler, which only runs the latest update in the background
+        self.output = ipy.interactive_output(self.scheduler.submit, {'l_x0': l_x0, 'l_y0': l_y0,
+                                                                     'l_x1': l_x1, 'l_y1': l_y1, 'width': width})
 
-        # Display the final output of the widget interaction
-        display(self.output.children[-1])
+        # Display the final output of the widget interaction, followed by the figure that is updated in place
+        display(self.output)
+        display(self.figure_display.output)
 
 
 # TODO: Change the STS analysis so it is consistent with topography, in regards to using the raw flat file data, not extracting it
@@ -1726,7 +2085,11 @@ class STS(object):
         self.didv_avg_data = None                           # Derivative of the average I(V) curve
         self.didv_avgsq_data = None                         # Derivative of the average of the squares I(V) curve
         self.i_var = None                                   # Variance/uncertainty in the best estimation of dI/dV
-        # 3.3.4 User interaction
+        # 3.3.4 Figures that are built once and then updated in place
+        self.sts_figures = dict()                           # Dictionary of the live figures of each analysis type
+        self.figure_display = fr.FigureDisplay()            # Output that displays the figures and measures frame times
+        self.scheduler = fr.RenderScheduler(self.update_function, self.figure_display)  # Background updates
+        # 3.3.5 User interaction
         self.widgets = None                                 # Widget object to hold all pre-defined widgets
         self.get_widgets()                                  # Function to get all of the pre-defined widgets
         self.output = None                                  # Output to the user interaction with widgets
@@ -2186,134 +2549,185 @@ class STS(object):
         self.gap_info['Mean dIdV + 1 sigma'] = didv_sigma1
         self.gap_info['Mean dIdV + 2 sigma'] = didv_sigma2
 
-    def iv_plot(self, ax, retrace, axes_type, vbias_lims, i_lim):
-        """
-        Function to plot and format all the raw I(V) curves that have been selected.
-        """
-        # Formatting the I(V) curve plot
-        ax.set_title("Raw I(V) curves", fontsize=20, fontweight="bold")
-        ax.set_xlabel("Voltage bias [V]", fontsize=19)
-        ax.set_ylabel("Current [A]", fontsize=19)
-        ax.axhline(0, color='gray', linewidth=2.5)
-        ax.axvline(0, color='gray', linewidth=2.5)
-        ax.grid(True)
-        # Plot all of the raw I(V) curves that are selected
-        for i in range(self.num_of_selected_files):
-            trace_alpha = 0.6
-            retrace_alpha = 0.6
-            if retrace == "Trace only":
-                retrace_alpha = 0.05
-            elif retrace == "Retrace only":
-                trace_alpha = 0.05
-            ax.plot(self.xcrop_v_dat[i], self.xcrop_i_dat[i][0], 'k.-', linewidth=1.0, markersize=4.5,
-                    alpha=trace_alpha, label='Trace')
-            ax.plot(self.xcrop_v_dat[i], self.xcrop_i_dat[i][1], 'b.-', linewidth=1.0, markersize=4.5,
-                    alpha=retrace_alpha, label='Retrace')
+    def iv_plot(self, ax, retrace, axes_type, vbias_lims, i_lim, artists=None):
+        """
+        Function to plot and format all the raw I(V) curves that have been selected. The artists are only created on
+        the first call, and are then updated in place on every subsequent call, where the lines of the I(V) curves are
+        re-used as the number of I(V) curves that are selected changes.
+
+        :param artists: Dictionary of the artists returned by a previous call (if None, they are created).
+        :return: Dictionary of the artists of the plot.
+        """
+        # Creating the artists of the I(V) curve plot, only if they do not already exist
+        if artists is None:
+            artists = dict()
+            # - Formatting the I(V) curve plot
+            ax.set_title("Raw I(V) curves", fontsize=20, fontweight="bold")
+            ax.set_xlabel("Voltage bias [V]", fontsize=19)
+            ax.set_ylabel("Current [A]", fontsize=19)
+            ax.axhline(0, color='gray', linewidth=2.5)
+            ax.axvline(0, color='gray', linewidth=2.5)
+            ax.grid(True)
+            # - The raw I(V) traces and retraces, and the omitted outlier points
+            artists['trace'] = list()
+            artists['retrace'] = list()
+            # - The lines are drawn in order of their z-order, so the omitted points stay above the curves added later
+            artists['omitted'], = ax.plot([], [], '.', markersize=4.5, color='gray', alpha=0.2, label='Omitted',
+                                          zorder=2.1)
+            artists['legend'] = None
+        # Update all of the raw I(V) curves that are selected
+        trace_alpha = 0.6
+        retrace_alpha = 0.6
+        if retrace == "Trace only":
+            retrace_alpha = 0.05
+        elif retrace == "Retrace only":
+            trace_alpha = 0.05
+        v_dat = self.xcrop_v_dat[:self.num_of_selected_files]
+        i_dat = self.xcrop_i_dat[:self.num_of_selected_files]
+        artists['trace'] = fr.update_lines(ax, artists['trace'], v_dat, [i[0] for i in i_dat], 'k.-', linewidth=1.0,
+                                           markersize=4.5, label='Trace')
+        artists['retrace'] = fr.update_lines(ax, artists['retrace'], v_dat, [i[1] for i in i_dat], 'b.-',
+                                             linewidth=1.0, markersize=4.5, label='Retrace')
+        for line in artists['trace']:
+            line.set_alpha(trace_alpha)
+        for line in artists['retrace']:
+            line.set_alpha(retrace_alpha)
         # If there are outliers due to cross-correlation or restricted voltage domain, show them as grey points
-        if len(self.v_outliers) > 1:
-            ax.plot(self.v_outliers, self.i_outliers, '.', markersize=4.5,
-                    color='gray', alpha=0.2, label='Omitted')
-            ax.legend(handles=list([patch.Patch(color='black', label='Trace'),
-                                    patch.Patch(color='blue', label='Retrace'),
-                                    patch.Patch(color='gray', label='Omitted')]),
-                      loc='best', prop={'size': 12})
-        # If there are no outliers, just show the default legend
+        outliers = len(self.v_outliers) > 1
+        if outliers:
+            artists['omitted'].set_data(self.v_outliers, self.i_outliers)
         else:
-            ax.legend(handles=list([patch.Patch(color='black', label='Trace'),
-                                    patch.Patch(color='blue', label='Retrace')]),
-                      loc='best', prop={'size': 12})
-        # If axes limit is selected, plot the effects of this
+            artists['omitted'].set_data([], [])
+        # - The legend only shows the omitted points if there are any, so it is only replaced when this changes
+        if artists['legend'] != outliers:
+            handles = [patch.Patch(color='black', label='Trace'), patch.Patch(color='blue', label='Retrace')]
+            if outliers:
+                handles.append(patch.Patch(color='gray', label='Omitted'))
+            ax.legend(handles=handles, loc='best', prop={'size': 12})
+            artists['legend'] = outliers
+        # Rescale the axes to the curves, or plot the effects of the axes limit if it is selected
+        fr.rescale(ax)
         if axes_type == 'Axes limit':
             ax.set_xlim(vbias_lims[0], vbias_lims[1])
             ax.set_ylim(i_lim * -1e-9, i_lim * 1e-9)
+        return artists
 
-    def iv_int_plots(self, ax1, ax2, ax3, smooth, axes_type, vbias_lims, i_lim, didv_lim):
+    def iv_int_plots(self, ax1, ax2, ax3, smooth, axes_type, vbias_lims, i_lim, didv_lim, artists=None):
         """
-        Function to plot all the intermediate stages of the analysis.
+        Function to plot all the intermediate stages of the analysis. The artists are only created on the first call,
+        and are then updated in place on every subsequent call.
+
+        :param artists: Dictionary of the artists returned by a previous call (if None, they are created).
+        :return: Dictionary of the artists of the plot.
         """
         # Set the color of the intermediate curves
         col = '#006600'
-        # Plot and format the mean I(V) curve over all selected I(V) curves
-        ax1.set_title("1 - Averaged", fontsize=13, fontweight="bold")
-        ax1.set_ylabel("Current [$A$]", fontsize=19)
-        ax1.axhline(0, color='gray', linewidth=2.5)
-        ax1.axvline(0, color='gray', linewidth=2.5)
-        ax1.grid(True)
-        ax1.plot(self.xcrop_v_dat[0], self.avg_i_data, '.-', linewidth=1.5, markersize=4.5, color=col)
-        ax1.legend(handles=list([patch.Patch(color=col, label='Average I(V)')]),
-                   loc='best', prop={'size': 10})
-        # If axes limit is selected, plot the effects of this
+        # Creating the artists of the intermediate plots, only if they do not already exist
+        if artists is None:
+            artists = dict()
+            # - Format the mean I(V) curve over all selected I(V) curves
+            ax1.set_title("1 - Averaged", fontsize=13, fontweight="bold")
+            ax1.set_ylabel("Current [$A$]", fontsize=19)
+            ax1.axhline(0, color='gray', linewidth=2.5)
+            ax1.axvline(0, color='gray', linewidth=2.5)
+            ax1.grid(True)
+            artists['average'], = ax1.plot([], [], '.-', linewidth=1.5, markersize=4.5, color=col)
+            ax1.legend(handles=list([patch.Patch(color=col, label='Average I(V)')]),
+                       loc='best', prop={'size': 10})
+            # - Format the smoothed of the average I(V) curve
+            ax2.set_ylabel("Current [$A$]", fontsize=19)
+            ax2.axhline(0, color='gray', linewidth=2.5)
+            ax2.axvline(0, color='gray', linewidth=2.5)
+            ax2.grid(True)
+            artists['smooth'], = ax2.plot([], [], '.-', linewidth=1.5, markersize=4.5, color=col)
+            ax2.legend(handles=list([patch.Patch(color=col, label='Smoothed avgerage I(V)')]),
+                       loc='best', prop={'size': 10})
+            # - Deleting the x-axis ticks as they are all identical and shown by the bottom subplot
+            ax1.tick_params(labelbottom=False)
+            ax2.tick_params(labelbottom=False)
+            # - Format the final differentiated I(V) curve
+            ax3.set_title("3 - Differentiated", fontsize=13, fontweight="bold")
+            ax3.set_xlabel("Voltage bias [$V$]", fontsize=19)
+            ax3.set_ylabel("dI/dV [$A/V$]", fontsize=19)
+            ax3.axhline(0, color='gray', linewidth=2.5)
+            ax3.axvline(0, color='gray', linewidth=2.5)
+            ax3.grid(True)
+            artists['didv'], = ax3.plot([], [], '.-', linewidth=1.5, markersize=4.5, color=col)
+            ax3.legend(handles=list([patch.Patch(color=col, label='dI/dV(V)')]),
+                       loc='best', prop={'size': 10})
+        # Update the mean, smoothed and differentiated I(V) curves
+        artists['average'].set_data(self.xcrop_v_dat[0], self.avg_i_data)
+        ax2.set_title("2 -" + str(smooth) + " Smoothed", fontsize=13, fontweight="bold")
+        artists['smooth'].set_data(self.xcrop_v_dat[0], self.smooth_avg_i_data)
+        artists['didv'].set_data(self.xcrop_v_dat[0][1:], self.didv_avg_data)
+        # Rescale the axes to the curves, or plot the effects of the axes limit if it is selected
+        for ax in (ax1, ax2, ax3):
+            fr.rescale(ax)
         if axes_type == 'Axes limit':
             ax1.set_xlim(vbias_lims[0], vbias_lims[1])
             ax1.set_ylim(i_lim * -1e-9, i_lim * 1e-9)
-
-        # Plot and format the smoothed of the average I(V) curve
-        ax2.set_title("2 -" + str(smooth) + " Smoothed", fontsize=13, fontweight="bold")
-        ax2.set_ylabel("Current [$A$]", fontsize=19)
-        ax2.axhline(0, color='gray', linewidth=2.5)
-        ax2.axvline(0, color='gray', linewidth=2.5)
-        ax2.grid(True)
-        ax2.plot(self.xcrop_v_dat[0], self.smooth_avg_i_data, '.-', linewidth=1.5, markersize=4.5,
-                 color=col)
-        ax2.legend(handles=list([patch.Patch(color=col, label='Smoothed avgerage I(V)')]),
-                   loc='best', prop={'size': 10})
-        # If axes limit is selected, plot the effects of this
-        if axes_type == 'Axes limit':
             ax2.set_xlim(vbias_lims[0], vbias_lims[1])
             ax2.set_ylim(i_lim * -1e-9, i_lim * 1e-9)
-        # Deleting the x-axis ticks as they are all identical and shown by the bottom subplot
-        plt.setp(ax1.get_xticklabels(), visible=False)
-        plt.setp(ax2.get_xticklabels(), visible=False)
-
-        # Plot and format the final differentiated I(V) curve
-        ax3.set_title("3 - Differentiated", fontsize=13, fontweight="bold")
-        ax3.set_xlabel("Voltage bias [$V$]", fontsize=19)
-        ax3.set_ylabel("dI/dV [$A/V$]", fontsize=19)
-        ax3.axhline(0, color='gray', linewidth=2.5)
-        ax3.axvline(0, color='gray', linewidth=2.5)
-        ax3.grid(True)
-        ax3.plot(self.xcrop_v_dat[0][1:], self.didv_avg_data, '.-', linewidth=1.5, markersize=4.5,
-                 color=col)
-        ax3.legend(handles=list([patch.Patch(color=col, label='dI/dV(V)')]),
-                   loc='best', prop={'size': 10})
-        # If axes limit is selected, plot the effects of this
-        if axes_type == 'Axes limit':
             ax3.set_xlim(vbias_lims[0], vbias_lims[1])
-            ax3.set_ylim(ymax=didv_lim * 1e-12)
-
-    def didv_plot(self, ax, axes_type, vbias_lims, didv_lim, egap=False, stacked=False):
-        """
-        Function to plot and format the final dI/dV curve obtained from the raw I(V) curves.
-        """
-        # Formatting the dI/dV curve plot
-        ax.set_title("Analysed dI/dV curves", fontsize=20, fontweight="bold")
-        ax.set_xlabel("Voltage bias [$V$]", fontsize=19)
-        ax.set_ylabel("dI/dV [$A/V$]", fontsize=19)
-        ax.axvline(0, color='gray', linewidth=2.5)
-        ax.grid(True, which='minor')
-        ax.grid(True, which='major')
-        # Plot all the selected dI/dV curves stacked on top of each other if stacked is True
+            ax3.set_ylim(top=didv_lim * 1e-12)
+        return artists
+
+    def didv_plot(self, ax, axes_type, vbias_lims, didv_lim, egap=False, stacked=False, artists=None):
+        """
+        Function to plot and format the final dI/dV curve obtained from the raw I(V) curves. The artists are only
+        created on the first call, and are then updated in place on every subsequent call, where the lines of the
+        stacked dI/dV curves are re-used as the number of I(V) curves that are selected changes.
+
+        :param artists: Dictionary of the artists returned by a previous call (if None, they are created).
+        :return: Dictionary of the artists of the plot.
+        """
+        # Creating the artists of the dI/dV curve plot, only if they do not already exist
+        if artists is None:
+            artists = dict()
+            # - Formatting the dI/dV curve plot
+            ax.set_title("Analysed dI/dV curves", fontsize=20, fontweight="bold")
+            ax.set_xlabel("Voltage bias [$V$]", fontsize=19)
+            ax.set_ylabel("dI/dV [$A/V$]", fontsize=19)
+            ax.set_yscale('log')
+            ax.axvline(0, color='gray', linewidth=2.5)
+            ax.grid(True, which='minor')
+            ax.grid(True, which='major')
+            # - All the selected dI/dV curves stacked on top of each other, if stacked is True
+            handles = [patch.Patch(color='black', label='dI/dV'),
+                       patch.Patch(color=[0.3, 0.3, 0.3], alpha=0.3, label='Variance')]
+            if stacked:
+                artists['stacked'] = list()
+                handles.append(patch.Patch(color='#90046C', alpha=0.3, label='Selected dI/dV'))
+            ax.legend(handles=handles, loc='best', prop={'size': 12})
+            # - The dI/dV curve and the variance associated with it
+            artists['didv'], = ax.plot([], [], 'k.-', linewidth=2.0, markersize=4.5)
+            artists['variance'], = ax.plot([], [], '-', linewidth=1.0, color=[0.3, 0.3, 0.3], alpha=0.3)
+            artists['variance area'] = ax.fill_between([], [], [], color=[0.6, 0.6, 0.6], alpha=0.3)
+            if egap:
+                # - The band-gap lines, middle, VBM and CBM position points and the areas between the lines
+                artists['gap lines'] = [ax.plot([], [], '-', linewidth=width, markersize=size, color=color)[0]
+                                        for width, size, color in [(6, 10, [0, 0, 0.3]), (5, 10, [0, 0, 0.6]),
+                                                                   (4, 8, [0, 0, 0.9])]]
+                artists['gap points'] = [ax.plot([], [], 'o', markersize=10, color=color)[0]
+                                         for color in [[0, 0, 0.3], [0, 0, 0.6], [0, 0, 0.9], [0, 0.3, 0],
+                                                       [0, 0.6, 0], [0, 0.9, 0], [0.3, 0, 0], [0.6, 0, 0],
+                                                       [0.9, 0, 0]]]
+                artists['gap areas'] = [ax.fill_between([], [], color=[0, 0, 0.6], alpha=0.3),
+                                        ax.fill_between([], [], color=[0, 0, 0.9], alpha=0.3)]
+        # Update all the selected dI/dV curves stacked on top of each other if stacked is True
         if stacked:
-            for i in range(self.num_of_selected_files):
-                ax.semilogy(self.xcrop_v_dat[0][1:], self.didv_data[i], '.-', linewidth=2.0, markersize=4.5, alpha=0.4,
-                            color='#90046C')
-                plt.legend(handles=list([patch.Patch(color='black', label='dI/dV'),
-                                         patch.Patch(color=[0.3, 0.3, 0.3], alpha=0.3, label='Variance'),
-                                         patch.Patch(color='#90046C', alpha=0.3, label='Selected dI/dV')]),
-                           loc='best', prop={'size': 12})
-        else:
-            plt.legend(handles=list([patch.Patch(color='black', label='dI/dV'),
-                                     patch.Patch(color=[0.3, 0.3, 0.3], alpha=0.3, label='Variance')]),
-                       loc='best', prop={'size': 12})
-        # Plot the dI/dV curve
-        plt.semilogy(self.xcrop_v_dat[0][1:], self.didv_avg_data, 'k.-', linewidth=2.0, markersize=4.5)
-        # Plotting the variance associated with dIdV
-        plt.semilogy(self.xcrop_v_dat[0][1:], self.didv_avg_data + self.i_var, '-', linewidth=1.0,
-                     color=[0.3, 0.3, 0.3], alpha=0.3)
-        plt.fill_between(self.xcrop_v_dat[0][1:], self.didv_avg_data, self.didv_avg_data + self.i_var,
-                         color=[0.6, 0.6, 0.6], alpha=0.3)
+            artists['stacked'] = fr.update_lines(ax, artists['stacked'], self.xcrop_v_dat[0][1:],
+                                                 self.didv_data[:self.num_of_selected_files], '.-', linewidth=2.0,
+                                                 markersize=4.5, alpha=0.4, color='#90046C', zorder=1.9)
+        # Update the dI/dV curve
+        artists['didv'].set_data(self.xcrop_v_dat[0][1:], self.didv_avg_data)
+        # Updating the variance associated with dIdV
+        artists['variance'].set_data(self.xcrop_v_dat[0][1:], self.didv_avg_data + self.i_var)
+        fr.set_fill(artists['variance area'], self.xcrop_v_dat[0][1:], self.didv_avg_data,
+                    self.didv_avg_data + self.i_var)
+        fills = [artists['variance area']]
         if egap:
-            # Plot the best estimates for the band-gap, VBM and CBM edges
+            # Update the best estimates for the band-gap, VBM and CBM edges
             # - Extracting the average band-gap line
             v_gap = np.array([self.gap_info['VBM'], self.gap_info['Egap centre'], self.gap_info['CBM']])
             didv_gap = np.ones(len(v_gap)) * self.gap_info['Mean dIdV']
@@ -2325,84 +2739,91 @@ class STS(object):
             v_gap_sigma2 = np.array(
                 [self.gap_info['VBM + 2 sigma'], self.gap_info['Egap centre'], self.gap_info['CBM + 2 sigma']])
             didv_gap_sigma2 = np.ones(len(v_gap_sigma2)) * self.gap_info['Mean dIdV + 2 sigma']
-            # - Plot the band-gap lines and middle position points
-            plt.plot(v_gap, didv_gap, '-', linewidth=6, markersize=10, color=[0, 0, 0.3])
-            plt.plot(v_gap_sigma1, didv_gap_sigma1, '-', linewidth=5, markersize=10, color=[0, 0, 0.6])
-            plt.plot(v_gap_sigma2, didv_gap_sigma2, '-', linewidth=4, markersize=8, color=[0, 0, 0.9])
-            plt.plot(self.gap_info['Egap centre'], self.gap_info['Mean dIdV'], 'o', markersize=10, color=[0, 0, 0.3])
-            plt.plot(self.gap_info['Egap centre'], self.gap_info['Mean dIdV + 1 sigma'], 'o', markersize=10,
-                     color=[0, 0, 0.6])
-            plt.plot(self.gap_info['Egap centre'], self.gap_info['Mean dIdV + 2 sigma'], 'o', markersize=10,
-                     color=[0, 0, 0.9])
-            # - Plot the VBM position points
-            plt.plot(self.gap_info['VBM'], self.gap_info['Mean dIdV'], 'o', markersize=10, color=[0, 0.3, 0])
-            plt.plot(self.gap_info['VBM + 1 sigma'], self.gap_info['Mean dIdV + 1 sigma'], 'o', markersize=10,
-                     color=[0, 0.6, 0])
-            plt.plot(self.gap_info['VBM + 2 sigma'], self.gap_info['Mean dIdV + 2 sigma'], 'o', markersize=10,
-                     color=[0, 0.9, 0])
-            # - Plot the CBM position points
-            plt.plot(self.gap_info['CBM'], self.gap_info['Mean dIdV'], 'o', markersize=10, color=[0.3, 0, 0])
-            plt.plot(self.gap_info['CBM + 1 sigma'], self.gap_info['Mean dIdV + 1 sigma'], 'o', markersize=10,
-                     color=[0.6, 0, 0])
-            plt.plot(self.gap_info['CBM + 2 sigma'], self.gap_info['Mean dIdV + 2 sigma'], 'o', markersize=10,
-                     color=[0.9, 0, 0])
+            # - Update the band-gap lines
+            for line, v_data, didv_data in zip(artists['gap lines'], [v_gap, v_gap_sigma1, v_gap_sigma2],
+                                               [didv_gap, didv_gap_sigma1, didv_gap_sigma2]):
+                line.set_data(v_data, didv_data)
+            # - Update the middle, VBM and CBM position points
+            points = list()
+            for edge in ['Egap centre', 'VBM', 'CBM']:
+                for sigma in ['', ' + 1 sigma', ' + 2 sigma']:
+                    v_edge = self.gap_info[edge if edge == 'Egap centre' else edge + sigma]
+                    points.append((v_edge, self.gap_info['Mean dIdV' + sigma]))
+            for point, (v_edge, didv_edge) in zip(artists['gap points'], points):
+                point.set_data([v_edge], [didv_edge])
             # Shade in the areas between the band-gap uncertainty lines
             xshade1 = np.array([v_gap[0], v_gap_sigma1[0], v_gap_sigma1[-1], v_gap[-1]])
             yshade1 = np.array([didv_gap[0], didv_gap_sigma1[0], didv_gap_sigma1[-1], didv_gap[-1]])
-            plt.fill_between(xshade1, yshade1, color=[0, 0, 0.6], alpha=0.3)
+            fr.set_fill(artists['gap areas'][0], xshade1, yshade1)
             xshade2 = np.array([v_gap_sigma1[0], v_gap_sigma2[0], v_gap_sigma2[-1], v_gap_sigma1[-1]])
             yshade2 = np.array([didv_gap_sigma1[0], didv_gap_sigma2[0], didv_gap_sigma2[-1], didv_gap_sigma1[-1]])
-            plt.fill_between(xshade2, yshade2, color=[0, 0, 0.9], alpha=0.3)
-        # Limit the axes if selected by the user
+            fr.set_fill(artists['gap areas'][1], xshade2, yshade2)
+            fills += artists['gap areas']
+        # Rescale the axes to the curves, or limit the axes if selected by the user
+        fr.rescale(ax, fills)
         if axes_type == 'Axes limit':
-            plt.xlim(vbias_lims[0], vbias_lims[1])
-            plt.ylim(ymax=didv_lim * 1e-12)
+            ax.set_xlim(vbias_lims[0], vbias_lims[1])
+            ax.set_ylim(top=didv_lim * 1e-12)
+        return artists
 
-    def didv_image(self, ax, axes_type, vbias_lims, didv_lim):
+    def didv_image(self, ax, axes_type, vbias_lims, didv_lim, artists=None):
         """
-        Function to plot the mean dI/dV curve and all the stacked dI/dV curves from all the selected I(V) files.
+        Function to plot the mean dI/dV curve and all the stacked dI/dV curves from all the selected I(V) files. The
+        artists are only created on the first call, and are then updated in place on every subsequent call.
+
+        :param artists: Dictionary of the artists returned by a previous call (if None, they are created).
+        :return: Dictionary of the artists of the plot.
         """
-        # Formatting the dI/dV image
-        ax.set_title("Train of dI/dV curves", fontsize=20, fontweight="bold")
-        ax.set_ylabel("Voltage bias [$V$]", fontsize=19)
-        ax.set_xlabel("Index", fontsize=19)
-        ax.axhline(0, color='white', linewidth=2.5, linestyle='--')
+        img = np.matrix.transpose(self.didv_data)
+        extent = [0, self.num_of_selected_files, np.min(self.xcrop_v_dat[0]), np.max(self.xcrop_v_dat[0])]
+        # Setting the contrast of the CITS slice from the multiple I(V) curves selected
+        if axes_type == 'Axes limit' or axes_type == 'Image contrast':
+            vmax = didv_lim * 1e-12
+        else:
+            vmax = 1e-11
+        # Creating the artists of the dI/dV image, only if they do not already exist
+        if artists is None:
+            artists = dict()
+            # - Formatting the dI/dV image
+            ax.set_title("Train of dI/dV curves", fontsize=20, fontweight="bold")
+            ax.set_ylabel("Voltage bias [$V$]", fontsize=19)
+            ax.set_xlabel("Index", fontsize=19)
+            ax.axhline(0, color='white', linewidth=2.5, linestyle='--')
+            ax.yaxis.grid(which="major")
+            # - The CITS slice from the multiple I(V) curves selected, with its associated colorbar
+            artists['image'] = ax.imshow(img, cmap="viridis", aspect='auto', interpolation='gaussian', origin='lower',
+                                         norm=LogNorm(vmin=1e-14, vmax=vmax), extent=extent)
+            artists['colorbar'] = ax.figure.colorbar(artists['image'], ax=ax, fraction=0.046, pad=0.01)
+            artists['colorbar'].ax.set_ylabel('dI/dV [A/V]', fontsize=14)
+            # - The areas between the band-gap uncertainty lines, and the text of the VBM and CBM locations
+            artists['VBM area'] = ax.fill_between([], [], [], color=[0, 0.6, 0], alpha=0.3)
+            artists['CBM area'] = ax.fill_between([], [], [], color=[0.6, 0, 0], alpha=0.3)
+            artists['VBM text'] = ax.text(0, 0, 'VBM 2 $\\sigma$', fontsize=14, color='white')
+            artists['CBM text'] = ax.text(0, 0, 'CBM 2 $\\sigma$', fontsize=14, color='white')
+        # Updating the ticks to the voltage range and the number of selected files
         ax.set_yticks(np.arange(np.round(np.min(self.xcrop_v_dat[0]), 0), np.round(np.max(self.xcrop_v_dat[0]), 0),
                                 0.2))
         if self.num_of_selected_files < 150:
             ax.set_xticks(np.arange(0, self.num_of_selected_files, 5))
         else:
             ax.set_xticks(np.arange(0, self.num_of_selected_files, 20))
-        ax.yaxis.grid(which="major")
-        img = np.matrix.transpose(self.didv_data)
-        # Plotting the CITS slice from the multiple I(V) curves selected
-        if axes_type == 'Axes limit' or axes_type == 'Image contrast':
-            cits_slice = ax.imshow(img, cmap="viridis", aspect='auto', interpolation='gaussian', origin='lower',
-                                   norm=LogNorm(vmin=1e-14, vmax=didv_lim*1e-12),
-                                   extent=[0, self.num_of_selected_files, np.min(self.xcrop_v_dat[0]),
-                                           np.max(self.xcrop_v_dat[0])])
-        else:
-            cits_slice = ax.imshow(img, cmap="viridis", aspect='auto', interpolation='gaussian', origin='lower',
-                                   norm=LogNorm(vmin=1e-14, vmax=1e-11),
-                                   extent=[0, self.num_of_selected_files, np.min(self.xcrop_v_dat[0]),
-                                           np.max(self.xcrop_v_dat[0])])
-        # Plotting the associated colorbar
-        cbar = plt.colorbar(cits_slice, fraction=0.046, pad=0.01)
-        cbar.ax.set_ylabel('dI/dV [A/V]', fontsize=14)
+        # Updating the CITS slice, where the colorbar follows the colour scale of the image
+        image = artists['image']
+        image.set_data(img)
+        image.set_extent(extent)
+        image.set_clim(1e-14, vmax)
         # Shade in the areas between the band-gap uncertainty lines
         X = np.array([0, self.num_of_selected_files])
-        vbm = np.array([self.gap_info['VBM'], self.gap_info['VBM']])
-        vbm2s = np.array([self.gap_info['VBM + 2 sigma'], self.gap_info['VBM + 2 sigma']])
-        cbm = np.array([self.gap_info['CBM'], self.gap_info['CBM']])
-        cbm2s = np.array([self.gap_info['CBM + 2 sigma'], self.gap_info['CBM + 2 sigma']])
-        plt.fill_between(X, vbm, vbm2s, color=[0, 0.6, 0], alpha=0.3)
-        plt.fill_between(X, cbm, cbm2s, color=[0.6, 0, 0], alpha=0.3)
-        # Add text for the VBM and CBM locations
-        plt.text(0, self.gap_info['VBM + 2 sigma'], 'VBM 2 $\\sigma$', fontsize=14, color='white')
-        plt.text(0, self.gap_info['CBM + 2 sigma'], 'CBM 2 $\\sigma$', fontsize=14, color='white')
-        # Limit the axes if selected by the user
+        fr.set_fill(artists['VBM area'], X, self.gap_info['VBM'], self.gap_info['VBM + 2 sigma'])
+        fr.set_fill(artists['CBM area'], X, self.gap_info['CBM'], self.gap_info['CBM + 2 sigma'])
+        # Update the text for the VBM and CBM locations
+        artists['VBM text'].set_position((0, self.gap_info['VBM + 2 sigma']))
+        artists['CBM text'].set_position((0, self.gap_info['CBM + 2 sigma']))
+        # Rescale the axes to the image, or limit the axes if selected by the user
+        fr.rescale(ax, [artists['VBM area'], artists['CBM area']])
         if axes_type == 'Axes limit':
-            plt.ylim(vbias_lims[0], vbias_lims[1])
+            ax.set_ylim(vbias_lims[0], vbias_lims[1])
+        return artists
 
     def get_widgets(self):
         """
@@ -2501,14 +2922,18 @@ class STS(object):
         """
         Updates the I(V) curves and analysis using the defined widgets.
         """
+        # Start the measurement of the time taken to render this frame
+        self.figure_display.begin()
 
         # Obtain the files that have been selected by the user
         self.selected_files = chosen_data
 
         # Extracting the data from the files
         self.selected_data_extract()
+        self.scheduler.check()
         # Perform cross-correlation analysis between different I(V) curves
         self.selected_data_cross_correlation()
+        self.scheduler.check()
         # Perform additional data cropping over the voltage domain selected by the user
         self.selected_data_crop(vbias_crop)
 
@@ -2517,77 +2942,104 @@ class STS(object):
         self.sts_analysis(retrace, smooth, smooth_order)
         # Update the band-gap information based on the user interaction
         self.sts_egap_finder(e_gap)
+        self.scheduler.check()
+
+        # Rendering the figure of the analysis type, which is only built once and then updated in place
+        self.sts_render(analysis_type, retrace, smooth, axes_type, vbias_lims, i_lim, didv_lim)
 
-        # Define a figure object with a certain size
-        plt.subplots(figsize=(20, 10))
+        return
+
+    def sts_render(self, analysis_type, retrace, smooth, axes_type, vbias_lims, i_lim, didv_lim):
+        """
+        Renders the figure of the selected analysis type. Each figure, with its axes, colorbar and text, is only built
+        the first time its analysis type is selected. Thereafter, the artists of each axes are updated in place, where
+        the lines of the curves are re-used as the number of I(V) files that are selected changes.
+        """
+        # Building the figure of the analysis type only if it does not already exist
+        if analysis_type not in self.sts_figures:
+            live_fig = fr.LiveFigure(figsize=(20, 10))
+            fig = live_fig.fig
+            # 1 - Defining the figure when intermediate plots is selected
+            if analysis_type == 'Intermediate plots':
+                live_fig.axes['iv'] = fig.add_subplot(1, 3, 1)
+                live_fig.axes['avg'] = fig.add_subplot(3, 3, 2)
+                live_fig.axes['smooth'] = fig.add_subplot(3, 3, 5, sharex=live_fig.axes['avg'],
+                                                          sharey=live_fig.axes['avg'])
+                live_fig.axes['diff'] = fig.add_subplot(3, 3, 8, sharex=live_fig.axes['smooth'])
+                live_fig.axes['didv'] = fig.add_subplot(1, 3, 3)
+            # 2 - Defining the figure when point sts is selected
+            elif analysis_type == 'Point STS':
+                live_fig.axes['iv'] = fig.add_subplot(1, 2, 1)
+                live_fig.axes['didv'] = fig.add_subplot(1, 2, 2)
+                # - Add the text that gives the band-gap, VBM, CBM and conductance information
+                text_props = [(0.85, [0, 0, 0.3]), (0.82, [0, 0, 0.6]), (0.79, [0, 0, 0.9]),
+                              (0.74, [0, 0.3, 0]), (0.71, [0, 0.6, 0]), (0.68, [0, 0.9, 0]),
+                              (0.63, [0.3, 0, 0]), (0.60, [0.6, 0, 0]), (0.57, [0.9, 0, 0]),
+                              (0.52, 'black'), (0.49, 'black')]
+                live_fig.artists['gap text'] = [fig.text(0.95, y, '', fontsize=15, color=col) for y, col in text_props]
+            # 3 - Defining the figure when line sts is selected
+            elif analysis_type == 'Line STS':
+                live_fig.axes['didv'] = fig.add_subplot(1, 2, 1)
+                live_fig.axes['image'] = fig.add_subplot(1, 2, 2)
+            self.sts_figures[analysis_type] = live_fig
+        live_fig = self.sts_figures[analysis_type]
+        axes, artists = live_fig.axes, live_fig.artists
+        # The curves of each axes are updated in place, where the dI/dV axes are only formatted when they are built
+        new_didv = 'didv' in axes and 'didv' not in artists
 
         # 1 - Defining the analysis stream when intermediate plots is selected
         if analysis_type == 'Intermediate plots':
-            # - Plot the raw spectroscopy curves
-            ax1 = plt.subplot(1, 3, 1)
-            self.iv_plot(ax1, retrace, axes_type, vbias_lims, i_lim)
-            # - Plot the intermediate analysis curves
-            ax2 = plt.subplot(3, 3, 2)
-            ax3 = plt.subplot(3, 3, 5, sharex=ax2, sharey=ax2)
-            ax4 = plt.subplot(3, 3, 8, sharex=ax3)
-            self.iv_int_plots(ax2, ax3, ax4, smooth, axes_type, vbias_lims, i_lim, didv_lim)
-            # - Plot the final dIdV curve
-            ax5 = plt.subplot(1, 3, 3)
-            self.didv_plot(ax5, axes_type, vbias_lims, didv_lim)
-            ax5.yaxis.tick_right()
-            ax5.yaxis.set_label_position("right")
-            ax5.set_title('Average dI/dV curve', fontsize=20, fontweight="bold")
+            # - Update the raw spectroscopy curves
+            artists['iv'] = self.iv_plot(axes['iv'], retrace, axes_type, vbias_lims, i_lim, artists.get('iv'))
+            # - Update the intermediate analysis curves
+            artists['intermediate'] = self.iv_int_plots(axes['avg'], axes['smooth'], axes['diff'], smooth, axes_type,
+                                                        vbias_lims, i_lim, didv_lim, artists.get('intermediate'))
+            # - Update the final dIdV curve
+            artists['didv'] = self.didv_plot(axes['didv'], axes_type, vbias_lims, didv_lim,
+                                             artists=artists.get('didv'))
 
         # 2 - Defining the analysis stream when point sts is selected
         elif analysis_type == 'Point STS':
-            # - Plot the raw spectroscopy curves
-            ax6 = plt.subplot(1, 2, 1)
-            self.iv_plot(ax6, retrace, axes_type, vbias_lims, i_lim)
-            # - Plot the final dIdV curve
-            ax7 = plt.subplot(1, 2, 2)
-            self.didv_plot(ax7, axes_type, vbias_lims, didv_lim, True)
-            ax7.yaxis.tick_right()
-            ax7.yaxis.set_label_position("right")
-            ax7.set_title('Average dI/dV curve', fontsize=20, fontweight="bold")
-            # - Add some text that gives the band-gap information
-            plt.gcf().text(0.95, 0.85, '$E_{GAP}$ + $0\\sigma$ = ' + str(self.gap_info['Egap']) + 'V',
-                           fontsize=15, color=[0, 0, 0.3])
-            plt.gcf().text(0.95, 0.82, '$E_{GAP}$ + $1\\sigma$ = ' + str(self.gap_info['Egap + 1 sigma']) + 'V',
-                           fontsize=15, color=[0, 0, 0.6])
-            plt.gcf().text(0.95, 0.79, '$E_{GAP}$ + $2\\sigma$ = ' + str(self.gap_info['Egap + 2 sigma']) + 'V',
-                           fontsize=15, color=[0, 0, 0.9])
-            # - Add some text that gives the VBM information
-            plt.gcf().text(0.95, 0.74, '$VBM$ = ' + str(self.gap_info['VBM']) + 'V', fontsize=15, color=[0, 0.3, 0])
-            plt.gcf().text(0.95, 0.71, '$VBM$ + $1\\sigma$ = ' + str(self.gap_info['VBM + 1 sigma']) + 'V',
-                           fontsize=15, color=[0, 0.6, 0])
-            plt.gcf().text(0.95, 0.68, '$VBM$ + $2\\sigma$ = ' + str(self.gap_info['VBM + 2 sigma']) + 'V',
-                           fontsize=15, color=[0, 0.9, 0])
-            # - Add some text that gives the CBM information
-            plt.gcf().text(0.95, 0.63, '$CBM$ = ' + str(self.gap_info['CBM']) + 'V', fontsize=15, color=[0.3, 0, 0])
-            plt.gcf().text(0.95, 0.60, '$CBM$ + $1\\sigma$ = ' + str(self.gap_info['CBM + 1 sigma']) + 'V',
-                           fontsize=15, color=[0.6, 0, 0])
-            plt.gcf().text(0.95, 0.57, '$CBM$ + $2\\sigma$ = ' + str(self.gap_info['CBM + 2 sigma']) + 'V',
-                           fontsize=15, color=[0.9, 0, 0])
-            # - Add some text about the conductance information
+            # - Update the raw spectroscopy curves
+            artists['iv'] = self.iv_plot(axes['iv'], retrace, axes_type, vbias_lims, i_lim, artists.get('iv'))
+            # - Update the final dIdV curve
+            artists['didv'] = self.didv_plot(axes['didv'], axes_type, vbias_lims, didv_lim, True,
+                                             artists=artists.get('didv'))
+            # - Update the text that gives the band-gap, VBM, CBM and conductance information
             didv_avg = self.gap_info['Mean dIdV']
             didv_sigma = self.gap_info['Mean dIdV + 1 sigma'] - self.gap_info['Mean dIdV']
-            plt.gcf().text(0.95, 0.52, '$dI/dV_{avg}$ = %.2e A/V' % didv_avg, fontsize=15)
-            plt.gcf().text(0.95, 0.49, '$dI/dV_{\\sigma}$ = %.2e A/V' % didv_sigma, fontsize=15)
+            gap_text = ['$E_{GAP}$ + $0\\sigma$ = ' + str(self.gap_info['Egap']) + 'V',
+                        '$E_{GAP}$ + $1\\sigma$ = ' + str(self.gap_info['Egap + 1 sigma']) + 'V',
+                        '$E_{GAP}$ + $2\\sigma$ = ' + str(self.gap_info['Egap + 2 sigma']) + 'V',
+                        '$VBM$ = ' + str(self.gap_info['VBM']) + 'V',
+                        '$VBM$ + $1\\sigma$ = ' + str(self.gap_info['VBM + 1 sigma']) + 'V',
+                        '$VBM$ + $2\\sigma$ = ' + str(self.gap_info['VBM + 2 sigma']) + 'V',
+                        '$CBM$ = ' + str(self.gap_info['CBM']) + 'V',
+                        '$CBM$ + $1\\sigma$ = ' + str(self.gap_info['CBM + 1 sigma']) + 'V',
+                        '$CBM$ + $2\\sigma$ = ' + str(self.gap_info['CBM + 2 sigma']) + 'V',
+                        '$dI/dV_{avg}$ = %.2e A/V' % didv_avg,
+                        '$dI/dV_{\\sigma}$ = %.2e A/V' % didv_sigma]
+            for text, string in zip(live_fig.artists['gap text'], gap_text):
+                text.set_text(string)
 
         # 3 - Defining the analysis stream when line sts is selected
         elif analysis_type == 'Line STS':
-            # Plot all the final dIdV curves
-            ax8 = plt.subplot(1, 2, 1)
-            # - Plot the average dI/dV curve
-            self.didv_plot(ax8, axes_type, vbias_lims, didv_lim, True, True)
-            # Plot and format the
-            ax9 = plt.subplot(1, 2, 2)
-            self.didv_image(ax9, axes_type, vbias_lims, didv_lim)
-
-        # Show the figure that has been created
-        plt.show()
-
-        return
+            # - Update the average dI/dV curve, with all the selected dI/dV curves stacked
+            artists['didv'] = self.didv_plot(axes['didv'], axes_type, vbias_lims, didv_lim, True, True,
+                                             artists=artists.get('didv'))
+            # - Update the train of dI/dV curves
+            artists['image'] = self.didv_image(axes['image'], axes_type, vbias_lims, didv_lim, artists.get('image'))
+
+        # Formatting the average dI/dV axes, only when they have just been built
+        if new_didv and analysis_type != 'Line STS':
+            axes['didv'].yaxis.tick_right()
+            axes['didv'].yaxis.set_label_position("right")
+            axes['didv'].set_title('Average dI/dV curve', fontsize=20, fontweight="bold")
+
+        # Redraw and show the figure that has been updated, only if no newer update has been requested in the meantime
+        self.scheduler.check()
+        live_fig.draw()
+        self.figure_display.show(live_fig)
 
     def user_interaction(self):
         """
@@ -2610,13 +3062,15 @@ class STS(object):
         didv_lim = self.widgets.children[2].children[3]
 
         # Define the attribute to continuously update the figure, given the user interaction
-        self.output = ipy.interactive(self.update_function, chosen_data=chosen_data,
-                                      analysis_type=analysis_type, vbias_crop=bias_restrict, retrace=retrace,
-                                      smooth=smooth, smooth_order=smooth_order, e_gap=e_gap, axes_type=axes_type,
-                                      vbias_lims=vbias_lims, i_lim=i_lim, didv_lim=didv_lim)
-
-        # Display the final output of the widget interaction
-        display(self.output.children[-1])
+        # - The widget events are passed to the scheduler, which only runs the latest update in the background
+        self.output = ipy.interactive_output(self.scheduler.submit, {
+            'chosen_data': chosen_data, 'analysis_type': analysis_type, 'vbias_crop': bias_restrict,
+            'retrace': retrace, 'smooth': smooth, 'smooth_order': smooth_order, 'e_gap': e_gap,
+            'axes_type': axes_type, 'vbias_lims': vbias_lims, 'i_lim': i_lim, 'didv_lim': didv_lim})
+
+        # Display the final output of the widget interaction, followed by the figure that is updated in place
+        display(self.output)
+        display(self.figure_display.output)
 
 
 # 4.0 - Defining the class object that will import the '.I(Z)_flat' files and perform all the necessary I(Z) analysis
@@ -0,0 +1,478 @@
+import os                                   # Standard os module to find the flat-files and write the outputs
+import sys                                  # Standard sys module to write the progress reports
+import glob                                 # Module to find all the topography flat-files within the folders
+import time                                 # Standard time module to report the time taken for each flat-file
+import json                                 # Standard json module to write the resume markers
+import csv                                  # Standard csv module to write the tables of the lattice parameters
+import hashlib                              # Standard hashlib module to identify the recipe that made each output
+import argparse                             # Standard argparse module for the command-line interface
+import multiprocessing                      # Standard multiprocessing module to process the flat-files in parallel
+import numpy as np                          # Standard numpy module
+import matplotlib                           # Standard matplotlib module
+matplotlib.use('Agg')
+import matplotlib.image as mpimg            # Standard matplotlib module to save the rendered images
+from scipy import ndimage                   # Standard scipy module to smooth the rendered images
+import flatfile_3 as ff                     # Module that loads in MATRIX flat-files into python class objects
+import topo_funcs as tf                     # Module that holds the vectorised topography image operations
+import topo_pipeline as tp                  # Module that holds the lazy pipeline of the topography operations
+import topo_spectrum as ts                  # Module that holds the power spectra and the lattice peak detection
+
+# Information about the "topo_batch.py" module
+__version__ = "1.00"
+__date__ = "19th October 2026"
+__status__ = "Pending"
+
+__authors__ = "Procopi Constantinou & Tobias Gill"
+__email__ = "procopios.constantinou.16@ucl.ac.uk"
+
+# Names of the scan directions, used as the suffix of each output file
+SCAN_DIRS = ["up-fwd", "up-bwd", "down-fwd", "down-bwd"]
+
+
+# 1.0 - Defining the rendering of a topography scan, which matches the main topography plot of the STT analysis
+def render_png(file_path, topo_data, image_props):
+    """
+    Render the topography scan to an image file, using the colour scale and smoothing of the image properties.
+
+    :param file_path: Path of the image file.
+    :param topo_data: The 2D topography data (in metres).
+    :param image_props: Dictionary of the image properties.
+    """
+    # - Set minimum value of the topography scan to zero and convert to nanometers
+    figure_data = (topo_data - np.min(topo_data)) * 1e9
+    # - Setting the colour scale in the same way as the main topography plot
+    if image_props["auto contrast"]:
+        vmin, vmax = tf.HeightHistogram(topo_data).contrast(scale=1e-9)
+    else:
+        vmin, vmax = 0, image_props["contrast"]
+    # - The gaussian interpolation of the displayed image is replaced by a gaussian smoothing of the pixels
+    if image_props["smooth"]:
+        figure_data = ndimage.gaussian_filter(figure_data, sigma=1)
+    mpimg.imsave(file_path, figure_data, cmap=image_props["colormap"], vmin=vmin, vmax=vmax, origin='lower',
+                 format='png')
+
+
+# 2.0 - Defining the processing of a single flat-file, which is performed by each worker of the process pool
+def recipe_hash(image_props):
+    """
+    Return a short hash that identifies the image properties, so that the outputs of a different recipe are re-made.
+
+    :param image_props: Dictionary of the image properties.
+    :return: Hexadecimal string of the hash.
+    """
+    recipe = {key: (np.asarray(value).tolist() if isinstance(value, np.ndarray) else value)
+              for key, value in image_props.items()}
+    return hashlib.sha1(json.dumps(recipe, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def output_stem(file_path, out_dir):
+    """
+    Return the path, without the extension, of the outputs of a flat-file. The outputs of each input folder are kept
+    in a sub-folder of the same name, so that flat-files of the same name in different folders never collide.
+
+    :param file_path: Path of the flat-file.
+    :param out_dir: Output directory.
+    :return: Path stem of the outputs.
+    """
+    folder = os.path.basename(os.path.dirname(os.path.abspath(file_path)))
+    return os.path.join(out_dir, folder, os.path.splitext(os.path.basename(file_path))[0])
+
+
+def is_done(file_path, out_dir, key, scan_dirs):
+    """
+    Return True if the flat-file has already been processed with the same recipe and for all the scan directions.
+
+    :param file_path: Path of the flat-file.
+    :param out_dir: Output directory.
+    :param key: Hash of the recipe.
+    :param scan_dirs: List of the scan directions to be processed.
+    :return: True if the flat-file can be skipped.
+    """
+    marker = output_stem(file_path, out_dir) + '.done'
+    try:
+        with open(marker, 'r') as marker_file:
+            done = json.load(marker_file)
+    except (IOError, OSError, ValueError):
+        return False
+    return done.get('recipe') == key and set(scan_dirs) <= set(done.get('scan dirs', []))
+
+
+def process_file(args):
+    """
+    Apply the recipe to all the chosen scan directions of a flat-file, then save the leveled arrays (.npy) and the
+    rendered images (.png). Each output is written to a temporary file that is then renamed, and the resume marker is
+    only written once all the outputs exist, so an interrupted run never leaves behind an output that is skipped.
+
+    :param args: Tuple (file_path, out_dir, image_props, scan_dirs, key, average) of the processing parameters, where
+    'average' determines whether the scan directions are also combined into a signal-averaged image.
+    :return: Tuple (file_path, error, time taken) of the result, where error is None if the processing succeeded.
+    """
+    file_path, out_dir, image_props, scan_dirs, key, average = args
+    t0 = time.time()
+    try:
+        stem = output_stem(file_path, out_dir)
+        if not os.path.isdir(os.path.dirname(stem)):
+            os.makedirs(os.path.dirname(stem))
+        flat_file = tf.TopoFile(ff.load(file_path))
+        present = [scan_dir for scan_dir in scan_dirs if scan_dir < len(flat_file)]
+        final_data = tp.recipe_from_props(image_props).evaluate(flat_file, present)
+        # Saving the outputs of each scan direction
+        for scan_dir in present:
+            topo_data = np.asarray(final_data[scan_dir].data)
+            path = stem + '_' + SCAN_DIRS[scan_dir]
+            with open(path + '.npy.tmp', 'wb') as npy_file:
+                np.save(npy_file, topo_data)
+            os.replace(path + '.npy.tmp', path + '.npy')
+            render_png(path + '.png.tmp', topo_data, image_props)
+            os.replace(path + '.png.tmp', path + '.png')
+        # Saving the signal-averaged image of the scan directions, with its per-pixel variance
+        if average and len(present) > 1:
+            stack = np.stack([final_data[scan_dir].data for scan_dir in present])
+            mean, variance, _, _ = tf.average_directions(stack)
+            for suffix, topo_data in (('_variance', variance), ('_average', mean)):
+                with open(stem + suffix + '.npy.tmp', 'wb') as npy_file:
+                    np.save(npy_file, topo_data)
+                os.replace(stem + suffix + '.npy.tmp', stem + suffix + '.npy')
+            render_png(stem + '_average.png.tmp', mean, image_props)
+            os.replace(stem + '_average.png.tmp', stem + '_average.png')
+        # Writing the resume marker
+        with open(stem + '.done', 'w') as marker_file:
+            json.dump({'recipe': key, 'scan dirs': scan_dirs}, marker_file)
+        return file_path, None, time.time() - t0
+    except Exception as error:
+        return file_path, '{}: {}'.format(type(error).__name__, error), time.time() - t0
+
+
+# 3.0 - Defining the batch processing of all the flat-files within the folders
+def batch_process(recipe_path, folders, out_dir, scan_dirs=None, workers=None, average=False, resume=True,
+                  stream=sys.stdout):
+    """
+    Apply a saved STT recipe to every topography flat-file (.Z_flat) within the folders, using a pool of processes.
+
+    :param recipe_path: Path of the recipe file, as saved by 'STT.save_recipe'.
+    :param folders: List of the folders that hold the flat-files.
+    :param out_dir: Output directory.
+    :param scan_dirs: List of the scan directions to be processed (if None, all four are used).
+    :param workers: Number of worker processes (if None, the number of CPUs is used).
+    :param average: If True, the scan directions of each flat-file are also combined into a signal-averaged image.
+    :param resume: If True, flat-files that have already been processed with the same recipe are skipped.
+    :param stream: Stream onto which the progress is written.
+    :return: List of the (file_path, error) pairs of the flat-files that failed.
+    """
+    image_props = tp.load_recipe(recipe_path)
+    key = recipe_hash(image_props) + ('-average' if average else '')
+    if scan_dirs is None:
+        scan_dirs = range(len(SCAN_DIRS))
+    scan_dirs = [int(scan_dir) for scan_dir in scan_dirs]
+    # Finding all the flat-files, and skipping those that have already been processed
+    flat_files = list()
+    for folder in folders:
+        flat_files += sorted(glob.glob(os.path.join(folder, '*.Z_flat')))
+    todo = [file_path for file_path in flat_files if not (resume and is_done(file_path, out_dir, key, scan_dirs))]
+    stream.write('{} flat-files found, {} already done, {} to process\n'.format(
+        len(flat_files), len(flat_files) - len(todo), len(todo)))
+    if len(todo) == 0:
+        return []
+    # Processing the flat-files in parallel, reporting the progress as each one is completed
+    jobs = [(file_path, out_dir, image_props, scan_dirs, key, average) for file_path in todo]
+    failed = list()
+    t0 = time.time()
+    pool = multiprocessing.Pool(workers)
+    try:
+        for i, (file_path, error, dt) in enumerate(pool.imap_unordered(process_file, jobs)):
+            status = 'done' if error is None else 'FAILED ' + error
+            stream.write('[{}/{}] {} - {} ({:.2f}s, {:.1f}s elapsed)\n'.format(
+                i + 1, len(todo), os.path.basename(file_path), status, dt, time.time() - t0))
+            stream.flush()
+            if error is not None:
+                failed.append((file_path, error))
+    finally:
+        pool.close()
+        pool.join()
+    return failed
+
+
+# 4.0 - Defining the batch tables of the measurements (lattice parameters, step heights) of every flat-file
+def lattice_rows(scan, file_path, scan_dir, window='Hann'):
+    """
+    Return the table row of the lattice parameters of a single scan direction, from the peaks of its power spectrum.
+
+    :param scan: The DataArray instance of the final scan direction.
+    :param file_path: Path of the flat-file.
+    :param scan_dir: Integer of the scan direction.
+    :param window: Name of the apodization window of the power spectrum; 'None', 'Hann' or 'Tukey'.
+    :return: List of the table rows.
+    """
+    lattice = ts.lattice_parameters(ts.power_spectrum(scan, window, workers=1))
+    return [[file_path, SCAN_DIRS[scan_dir], lattice['a'], lattice['b'], lattice['gamma'], lattice['angle'],
+             lattice['a1'][0], lattice['a1'][1], lattice['a2'][0], lattice['a2'][1], lattice['order'],
+             len(lattice['peaks'])]]
+
+
+def step_rows(scan, file_path, scan_dir):
+    """
+    Return the table rows of the step heights of a single scan direction, with one row per step between adjacent
+    terrace levels (or a single row without a step if only one level is found).
+
+    :param scan: The DataArray instance of the final scan direction.
+    :param file_path: Path of the flat-file.
+    :param scan_dir: Integer of the scan direction.
+    :return: List of the table rows.
+    """
+    terraces = tf.terrace_levels(scan.data)
+    levels, errors = terraces['levels'] * 1e9, terraces['level errors'] * 1e9
+    if len(levels) < 2:
+        return [[file_path, SCAN_DIRS[scan_dir], len(levels), 0, levels[0], errors[0], np.nan, np.nan, np.nan, np.nan]]
+    return [[file_path, SCAN_DIRS[scan_dir], len(levels), i + 1, levels[i], errors[i], levels[i + 1], errors[i + 1],
+             step * 1e9, error * 1e9]
+            for i, (step, error) in enumerate(zip(terraces['steps'], terraces['step errors']))]
+
+
+def feature_rows(scan, file_path, scan_dir, threshold=None):
+    """
+    Return the table rows of the features detected above the background of a single scan direction, with one row
+    per feature.
+
+    :param scan: The DataArray instance of the final scan direction.
+    :param file_path: Path of the flat-file.
+    :param scan_dir: Integer of the scan direction.
+    :param threshold: Height (in nm) above the median height at which a pixel belongs to a feature (if None, three
+    robust standard deviations are used).
+    :return: List of the table rows.
+    """
+    if threshold is not None:
+        threshold = tf.HeightHistogram(scan.data).percentile(50) + threshold * 1e-9
+    features = tf.detect_features(scan.data, scan.info, threshold)
+    return [[file_path, SCAN_DIRS[scan_dir], i + 1, x, y, peak_x, peak_y, height * 1e9, area, peaks]
+            for i, (x, y, peak_x, peak_y, height, area, peaks) in enumerate(zip(
+                features['x'], features['y'], features['peak x'], features['peak y'], features['height'],
+                features['area'], features['peaks']))]
+
+
+def match_rows(scan, file_path, scan_dir, template, min_score=0.6):
+    """
+    Return the table rows of the matches of a template within a single scan direction, with one row per match.
+
+    :param scan: The DataArray instance of the final scan direction.
+    :param file_path: Path of the flat-file.
+    :param scan_dir: Integer of the scan direction.
+    :param template: 2D numpy array of the template, as returned by 'STT.cut_template'.
+    :param min_score: Smallest normalized cross-correlation of a match.
+    :return: List of the table rows.
+    """
+    matches = ts.match_template(scan, template, min_score)
+    return [[file_path, SCAN_DIRS[scan_dir], i + 1, x, y, row, col, score]
+            for i, (x, y, row, col, score) in enumerate(zip(matches['x'], matches['y'], matches['row'], matches['col'],
+                                                            matches['scores']))]
+
+
+# - Dictionary of the tables that can be made, with the function that makes the rows of each scan and their columns
+TABLES = {'lattice': (lattice_rows, ["file", "scan dir", "a [nm]", "b [nm]", "gamma [deg]", "angle [deg]",
+                                     "a1 x [nm]", "a1 y [nm]", "a2 x [nm]", "a2 y [nm]", "order", "peaks"]),
+          'steps': (step_rows, ["file", "scan dir", "levels", "step", "lower [nm]", "lower error [nm]", "upper [nm]",
+                                "upper error [nm]", "height [nm]", "height error [nm]"]),
+          'features': (feature_rows, ["file", "scan dir", "feature", "x [nm]", "y [nm]", "peak x [nm]", "peak y [nm]",
+                                      "height [nm]", "area [nm^2]", "peaks"]),
+          'matches': (match_rows, ["file", "scan dir", "match", "x [nm]", "y [nm]", "row", "column", "score"])}
+
+
+def table_file(args):
+    """
+    Apply the recipe to all the chosen scan directions of a flat-file, then make the table rows of each scan direction.
+
+    :param args: Tuple (file_path, image_props, scan_dirs, table, options) of the processing parameters, where table
+    is the name of the table and options is the dictionary of the keyword arguments of its row function.
+    :return: Tuple (file_path, rows, error, time taken) of the result, where rows is the list of the table rows and
+    error is None if the processing succeeded.
+    """
+    file_path, image_props, scan_dirs, table, options = args
+    t0 = time.time()
+    try:
+        flat_file = tf.TopoFile(ff.load(file_path))
+        present = [scan_dir for scan_dir in scan_dirs if scan_dir < len(flat_file)]
+        final_data = tp.recipe_from_props(image_props).evaluate(flat_file, present)
+        rows = list()
+        for scan_dir in present:
+            rows += TABLES[table][0](final_data[scan_dir], file_path, scan_dir, **options)
+        return file_path, rows, None, time.time() - t0
+    except Exception as error:
+        return file_path, [], '{}: {}'.format(type(error).__name__, error), time.time() - t0
+
+
+def batch_table(table, recipe_path, folders, out_path, scan_dirs=None, workers=None, stream=sys.stdout, **options):
+    """
+    Make a table (in the csv format) of the measurements of every topography flat-file (.Z_flat) within the folders,
+    using a pool of processes, with the rows of each scan direction.
+
+    :param table: Name of the table, which is a key of 'TABLES'; 'lattice', 'steps', 'features' or 'matches'.
+    :param recipe_path: Path of the recipe file, as saved by 'STT.save_recipe'.
+    :param folders: List of the folders that hold the flat-files.
+    :param out_path: Path of the table.
+    :param scan_dirs: List of the scan directions to be processed (if None, all four are used).
+    :param workers: Number of worker processes (if None, the number of CPUs is used).
+    :param stream: Stream onto which the progress is written.
+    :param options: Keyword arguments of the row function of the table.
+    :return: List of the (file_path, error) pairs of the flat-files that failed.
+    """
+    image_props = tp.load_recipe(recipe_path)
+    if scan_dirs is None:
+        scan_dirs = range(len(SCAN_DIRS))
+    scan_dirs = [int(scan_dir) for scan_dir in scan_dirs]
+    flat_files = list()
+    for folder in folders:
+        flat_files += sorted(glob.glob(os.path.join(folder, '*.Z_flat')))
+    stream.write('{} flat-files found\n'.format(len(flat_files)))
+    # Processing the flat-files in parallel, where each worker transforms with a single thread
+    jobs = [(file_path, image_props, scan_dirs, table, options) for file_path in flat_files]
+    results, failed = dict(), list()
+    t0 = time.time()
+    pool = multiprocessing.Pool(workers)
+    try:
+        for i, (file_path, rows, error, dt) in enumerate(pool.imap_unordered(table_file, jobs)):
+            status = 'done' if error is None else 'FAILED ' + error
+            stream.write('[{}/{}] {} - {} ({:.2f}s, {:.1f}s elapsed)\n'.format(
+                i + 1, len(jobs), os.path.basename(file_path), status, dt, time.time() - t0))
+            stream.flush()
+            results[file_path] = rows
+            if error is not None:
+                failed.append((file_path, error))
+    finally:
+        pool.close()
+        pool.join()
+    # Writing the table in the order of the flat-files, so that it does not depend on the order of completion
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    if not os.path.isdir(out_dir):
+        os.makedirs(out_dir)
+    with open(out_path + '.tmp', 'w') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(TABLES[table][1])
+        for file_path in flat_files:
+            writer.writerows(results.get(file_path, []))
+    os.replace(out_path + '.tmp', out_path)
+    return failed
+
+
+def batch_lattice(recipe_path, folders, out_path, scan_dirs=None, workers=None, window='Hann', stream=sys.stdout):
+    """
+    Extract the lattice parameters of every topography flat-file (.Z_flat) within the folders, using a pool of
+    processes, and write them to a table (in the csv format) with one row per scan direction.
+
+    :param recipe_path: Path of the recipe file, as saved by 'STT.save_recipe'.
+    :param folders: List of the folders that hold the flat-files.
+    :param out_path: Path of the table.
+    :param scan_dirs: List of the scan directions to be processed (if None, all four are used).
+    :param workers: Number of worker processes (if None, the number of CPUs is used).
+    :param window: Name of the apodization window of the power spectra; 'None', 'Hann' or 'Tukey'.
+    :param stream: Stream onto which the progress is written.
+    :return: List of the (file_path, error) pairs of the flat-files that failed.
+    """
+    return batch_table('lattice', recipe_path, folders, out_path, scan_dirs, workers, stream, window=window)
+
+
+def batch_steps(recipe_path, folders, out_path, scan_dirs=None, workers=None, stream=sys.stdout):
+    """
+    Measure the step heights between the terrace levels of every topography flat-file (.Z_flat) within the folders,
+    using a pool of processes, and write them to a table (in the csv format) with one row per step.
+
+    :param recipe_path: Path of the recipe file, as saved by 'STT.save_recipe'.
+    :param folders: List of the folders that hold the flat-files.
+    :param out_path: Path of the table.
+    :param scan_dirs: List of the scan directions to be processed (if None, all four are used).
+    :param workers: Number of worker processes (if None, the number of CPUs is used).
+    :param stream: Stream onto which the progress is written.
+    :return: List of the (file_path, error) pairs of the flat-files that failed.
+    """
+    return batch_table('steps', recipe_path, folders, out_path, scan_dirs, workers, stream)
+
+
+def batch_features(recipe_path, folders, out_path, scan_dirs=None, workers=None, threshold=None, stream=sys.stdout):
+    """
+    Detect and measure the features (adsorbates and defects) of every topography flat-file (.Z_flat) within the
+    folders, using a pool of processes, and write them to a table (in the csv format) with one row per feature.
+
+    :param recipe_path: Path of the recipe file, as saved by 'STT.save_recipe'.
+    :param folders: List of the folders that hold the flat-files.
+    :param out_path: Path of the table.
+    :param scan_dirs: List of the scan directions to be processed (if None, all four are used).
+    :param workers: Number of worker processes (if None, the number of CPUs is used).
+    :param threshold: Height (in nm) above the median height at which a pixel belongs to a feature (if None, three
+    robust standard deviations are used).
+    :param stream: Stream onto which the progress is written.
+    :return: List of the (file_path, error) pairs of the flat-files that failed.
+    """
+    return batch_table('features', recipe_path, folders, out_path, scan_dirs, workers, stream, threshold=threshold)
+
+
+def batch_matches(recipe_path, folders, out_path, template, scan_dirs=None, workers=None, min_score=0.6,
+                  stream=sys.stdout):
+    """
+    Find the matches of a template within every topography flat-file (.Z_flat) within the folders, using a pool of
+    processes, and write them to a table (in the csv format) with one row per match.
+
+    :param recipe_path: Path of the recipe file, as saved by 'STT.save_recipe'.
+    :param folders: List of the folders that hold the flat-files.
+    :param out_path: Path of the table.
+    :param template: 2D numpy array of the template, as returned by 'STT.cut_template'.
+    :param scan_dirs: List of the scan directions to be processed (if None, all four are used).
+    :param workers: Number of worker processes (if None, the number of CPUs is used).
+    :param min_score: Smallest normalized cross-correlation of a match.
+    :param stream: Stream onto which the progress is written.
+    :return: List of the (file_path, error) pairs of the flat-files that failed.
+    """
+    return batch_table('matches', recipe_path, folders, out_path, scan_dirs, workers, stream,
+                       template=np.asarray(template, dtype=float), min_score=min_score)
+
+
+def main(argv=None):
+    """
+    Command-line interface of the batch processing.
+
+    :param argv: List of the command-line arguments (if None, those of the script are used).
+    """
+    parser = argparse.ArgumentParser(description="Apply a saved STT recipe to every '.Z_flat' file in the folders.")
+    parser.add_argument('recipe', help="Recipe file, as saved by 'STT.save_recipe'.")
+    parser.add_argument('folders', nargs='+', help="Folders that hold the '.Z_flat' files.")
+    parser.add_argument('-o', '--out-dir', default='batch_output', help="Output directory.")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="Number of worker processes.")
+    parser.add_argument('-s', '--scan-dirs', type=int, nargs='+', choices=range(len(SCAN_DIRS)), default=None,
+                        help="Scan directions to process (0: up-fwd, 1: up-bwd, 2: down-fwd, 3: down-bwd).")
+    parser.add_argument('-a', '--average', action='store_true',
+                        help="Also combine the scan directions into a signal-averaged image, with its variance.")
+    parser.add_argument('--no-resume', action='store_true', help="Re-process the flat-files that are already done.")
+    parser.add_argument('-l', '--lattice', default=None, metavar='TABLE',
+                        help="Instead of the images, write the lattice parameters of every scan to this csv table.")
+    parser.add_argument('-w', '--window', default='Hann', choices=ts.WINDOWS,
+                        help="Apodization window of the power spectra of the lattice parameters.")
+    parser.add_argument('--steps', default=None, metavar='TABLE',
+                        help="Instead of the images, write the terrace step heights of every scan to this csv table.")
+    parser.add_argument('--features', default=None, metavar='TABLE',
+                        help="Instead of the images, write the features detected in every scan to this csv table.")
+    parser.add_argument('-t', '--threshold', type=float, default=None,
+                        help="Height (in nm) above the median at which a pixel belongs to a feature.")
+    parser.add_argument('--matches', default=None, metavar='TABLE',
+                        help="Instead of the images, write the template matches of every scan to this csv table.")
+    parser.add_argument('--template', default=None,
+                        help="Template of the matches, saved by 'numpy.save' from 'STT.cut_template'.")
+    parser.add_argument('--min-score', type=float, default=0.6,
+                        help="Smallest normalized cross-correlation of a template match.")
+    args = parser.parse_args(argv)
+    if args.matches is not None and args.template is None:
+        parser.error("the --matches table needs a --template")
+    if args.lattice is not None:
+        failed = batch_lattice(args.recipe, args.folders, args.lattice, args.scan_dirs, args.workers, args.window)
+    elif args.steps is not None:
+        failed = batch_steps(args.recipe, args.folders, args.steps, args.scan_dirs, args.workers)
+    elif args.features is not None:
+        failed = batch_features(args.recipe, args.folders, args.features, args.scan_dirs, args.workers, args.threshold)
+    elif args.matches is not None:
+        failed = batch_matches(args.recipe, args.folders, args.matches, np.load(args.template), args.scan_dirs,
+                               args.workers, args.min_score)
+    else:
+        failed = batch_process(args.recipe, args.folders, args.out_dir, args.scan_dirs, args.workers, args.average,
+                               resume=not args.no_resume)
+    if len(failed) > 0:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,1239 @@
+import weakref                              # Standard weakref module to cache the image pyramids of each scan
+import numpy as np                          # Standard numpy module
+from scipy import ndimage, special          # Standard scipy modules for the image resampling and exact trig functions
+from scipy import signal                    # Standard scipy module to find the peaks of the height histograms
+try:
+    from . import kernels as kn             # Module that holds the pixel-loop kernels, with optional compiled backend
+except ImportError:
+    import kernels as kn                    # - Sibling import, when the 'stm_analysis' folder itself is on the path
+
+# Information about the "topo_funcs.py" module
+__version__ = "1.00"
+__date__ = "19th October 2026"
+__status__ = "Pending"
+
+__authors__ = "Procopi Constantinou & Tobias Gill"
+__email__ = "procopios.constantinou.16@ucl.ac.uk"
+
+
+# 1.0 - Polynomial surface fitting used for the plane (and higher-order) background subtraction of topography scans
+def poly_surface_terms(order=1):
+    """
+    Return the (x, y) exponent pairs of every term in a polynomial surface of the given order. The terms are sorted by
+    their total order, such that the first order surface is given by the terms [1, x, y].
+
+    :param order: Order of the polynomial surface (1 = plane, 2 = quadratic surface, ...).
+    :return: List of (x-exponent, y-exponent) tuples.
+    """
+    return [(total - j, j) for total in range(order + 1) for j in range(total + 1)]
+
+
+def _surface_coords(res, order):
+    """
+    Return the Vandermonde matrix of the normalised pixel co-ordinates along one axis. The pixel co-ordinates are
+    mapped onto [-1, 1] over the full image, so that the normal equations remain well-conditioned for higher orders.
+
+    :param res: Total number of pixels along the axis.
+    :param order: Highest power of the co-ordinate to be returned.
+    :return: 2D array of shape (res, order + 1), where column k holds the normalised co-ordinates to the power k.
+    """
+    half = 0.5 * (res - 1)
+    u = (np.arange(res) - half) / max(half, 1.)
+    return np.vander(u, order + 1, increasing=True)
+
+
+def poly_surface_fit(topo_data, order=1, roi=None, mask=None):
+    """
+    Fit a polynomial surface to the topography data by solving the least-squares normal equations directly. The
+    moments of the normal equations are built from separable matrix products over the fitted area, so neither the
+    design matrix nor any Python loop over the pixels is required.
+
+    :param topo_data: 2D numpy array of the topography data.
+    :param order: Order of the polynomial surface (1 = plane, 2 = quadratic surface, ...).
+    :param roi: Pixel area to be fitted as [x0, x1, y0, y1]. If None, the full image is fitted.
+    :param mask: Boolean 2D array of the same shape as topo_data, where only the True pixels are used in the fit.
+    :return: 1D array of the surface coefficients, ordered as in 'poly_surface_terms' (normalised co-ordinates).
+    """
+    y_res, x_res = np.shape(topo_data)
+    # Defining the area over which the surface fit is performed
+    if roi is None:
+        x0, x1, y0, y1 = 0, x_res, 0, y_res
+    else:
+        x0, x1, y0, y1 = [int(r) for r in roi]
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+    z = np.asarray(topo_data, dtype=float)[y0:y1, x0:x1]
+    # Defining the weights of each pixel; masked and non-finite pixels are omitted from the fit
+    weights = np.isfinite(z).astype(float)
+    if mask is not None:
+        weights *= np.asarray(mask, dtype=bool)[y0:y1, x0:x1]
+    z = np.where(weights > 0, z, 0.)
+    # Extracting the Vandermonde matrices of the fitted area, up to twice the order for the normal matrix moments
+    vx = _surface_coords(x_res, 2 * order)[x0:x1]
+    vy = _surface_coords(y_res, 2 * order)[y0:y1]
+    # - Moments sum(w * x^a * y^b) for all a, b <= 2*order, and projections sum(w * z * x^a * y^b) for a, b <= order
+    moments = np.dot(np.dot(vy.T, weights), vx)
+    projections = np.dot(np.dot(vy[:, :order + 1].T, weights * z), vx[:, :order + 1])
+    # Building and solving the normal equations
+    terms = poly_surface_terms(order)
+    normal_matrix = np.array([[moments[bi + bj, ai + aj] for (aj, bj) in terms] for (ai, bi) in terms])
+    normal_vector = np.array([projections[b, a] for (a, b) in terms])
+    return np.linalg.lstsq(normal_matrix, normal_vector, rcond=None)[0]
+
+
+def poly_surface_eval(coeffs, shape, order=1):
+    """
+    Evaluate a polynomial surface over a full image by broadcasting the separable x- and y-axis co-ordinates.
+
+    :param coeffs: 1D array of the surface coefficients returned from 'poly_surface_fit'.
+    :param shape: Shape (y_res, x_res) of the image over which the surface is evaluated.
+    :param order: Order of the polynomial surface.
+    :return: 2D array of the evaluated surface.
+    """
+    y_res, x_res = shape
+    # Collating the coefficients into a matrix C, such that the surface is given by Vy . C . Vx^T
+    coeff_matrix = np.zeros((order + 1, order + 1))
+    for c, (a, b) in zip(coeffs, poly_surface_terms(order)):
+        coeff_matrix[b, a] = c
+    return np.dot(np.dot(_surface_coords(y_res, order), coeff_matrix), _surface_coords(x_res, order).T)
+
+
+def poly_surface_subtract(topo_data, order=1, roi=None, mask=None):
+    """
+    Subtract the best fit polynomial surface from the topography data and zero the bottom of the resulting scan.
+
+    :param topo_data: 2D numpy array of the topography data.
+    :param order: Order of the polynomial surface (1 = plane, 2 = quadratic surface, ...).
+    :param roi: Pixel area to be fitted as [x0, x1, y0, y1]. If None, the full image is fitted.
+    :param mask: Boolean 2D array of the same shape as topo_data, where only the True pixels are used in the fit.
+    :return: 2D array of the surface subtracted topography data.
+    """
+    coeffs = poly_surface_fit(topo_data, order, roi, mask)
+    topo_data_flattened = topo_data - poly_surface_eval(coeffs, np.shape(topo_data), order)
+    return topo_data_flattened - np.nanmin(topo_data_flattened)
+
+
+# 2.0 - Defining the copy-on-write handle of a topography flat-file, that is shared between all image operations
+class TopoFile(tuple):
+    """
+    Immutable handle to the scan directions of an Omicron topography flat-file. It behaves like the list of DataArray
+    instances returned from 'flatfile_3.load', but every image operation returns a new handle that shares all of the
+    untouched scan directions and their info dictionaries, such that only the arrays that are modified are ever
+    allocated. The image data held by the handle is a read-only view, so that shared data can not be changed in-place.
+    """
+    def __new__(cls, data_arrays):
+        """
+        Defines the initialisation of the handle.
+        data_arrays:    List of DataArray instances (one per scan direction) or another TopoFile handle.
+        """
+        # If the flat-file is already a handle, there is nothing to wrap
+        if isinstance(data_arrays, TopoFile):
+            return data_arrays
+        return tuple.__new__(cls, [cls._freeze(scan) for scan in data_arrays])
+
+    @staticmethod
+    def _freeze(scan, data=None, info=None):
+        """
+        Return a DataArray of the same type as 'scan', whose image data is a read-only view.
+
+        :param scan: The DataArray instance of a single scan direction.
+        :param data: The new image data (if None, the data of 'scan' is shared).
+        :param info: The new info dictionary (if None, the info of 'scan' is shared).
+        :return: The new DataArray instance.
+        """
+        data = np.asarray(scan.data if data is None else data).view()
+        data.flags.writeable = False
+        frozen = scan.__class__(data, scan.info if info is None else info)
+        # Share the info dictionary rather than the copy made by the DataArray initialisation, if it is unchanged
+        if info is None:
+            frozen.info = scan.info
+        return frozen
+
+    def replace(self, scan_dir, data=None, **info):
+        """
+        Return a new handle where only a single scan direction has been replaced.
+
+        :param scan_dir: Integer of the scan direction to be replaced.
+        :param data: The new image data of the scan direction (if None, the old data is shared).
+        :param info: Keyword arguments of the info entries to be updated for the scan direction.
+        :return: The new TopoFile handle.
+        """
+        scans = list(self)
+        scan_info = None
+        if info:
+            scan_info = dict(self[scan_dir].info)
+            scan_info.update(info)
+        scans[scan_dir] = self._freeze(self[scan_dir], data, scan_info)
+        return tuple.__new__(TopoFile, scans)
+
+    def apply(self, func, scan_dirs=None, info_func=None):
+        """
+        Return a new handle where the image operation 'func' has been applied over the given scan directions.
+
+        :param func: Function that takes the image data of a scan direction and returns the new image data.
+        :param scan_dirs: List of the scan directions to be operated on (if None, all the scan directions are used).
+        :param info_func: Function that takes the old info dictionary and new image data, and returns a dictionary of
+        the info entries to be updated (if None, the info dictionaries are shared).
+        :return: The new TopoFile handle.
+        """
+        if scan_dirs is None:
+            scan_dirs = range(len(self))
+        scans = list(self)
+        for scan_dir in scan_dirs:
+            data = func(self[scan_dir].data)
+            scan_info = None
+            if info_func is not None:
+                scan_info = dict(self[scan_dir].info)
+                scan_info.update(info_func(self[scan_dir].info, data))
+            scans[scan_dir] = self._freeze(self[scan_dir], data, scan_info)
+        return tuple.__new__(TopoFile, scans)
+
+
+# 3.0 - Defining the vectorised kernels of the topography level and image operations
+def nm2pnt(nm, info, axis='x'):
+    """
+    Convert between nanometers and corresponding pixel number, given the info dictionary of a scan direction.
+
+    :param nm: Nanometer value.
+    :param info: Info dictionary of a scan direction in an Omicron flat file.
+    :param axis: Plot axis of nm point. Must be either 'x' or 'y'.
+    :return: Pixel number for nanometer value, restricted to lie within the image.
+    """
+    pnt = int(np.round(nm / info[axis + 'inc']))
+    return min(max(pnt, 0), info[axis + 'res'])
+
+
+def linewise_subtract(topo_data):
+    """
+    Subtract the line of best fit from every scan line of the topography data, for all the lines at once, and zero the
+    bottom of the resulting scan.
+
+    :param topo_data: 2D numpy array of the topography data.
+    :return: 2D array of the line-wise subtracted topography data.
+    """
+    # The least-squares line through each row is given by its mean and slope about the centre of the x-axis
+    x = np.arange(np.shape(topo_data)[1]) - 0.5 * (np.shape(topo_data)[1] - 1)
+    z = topo_data - np.mean(topo_data, axis=1, keepdims=True)
+    slope = np.dot(z, x) / max(np.dot(x, x), 1.)
+    topo_flat_data = z - slope[:, None] * x[None, :]
+    return topo_flat_data - np.amin(topo_flat_data)
+
+
+def rotation_matrix(angle, shape):
+    """
+    Return the affine transform of 'scipy.ndimage.rotate' (with reshape=True), which maps the pixel co-ordinates of
+    the rotated image back onto the pixel co-ordinates of the original image.
+
+    :param angle: Rotation angle in degrees.
+    :param shape: Shape (y_res, x_res) of the image before the rotation.
+    :return: matrix, offset, out_shape; such that the original (row, column) = matrix . (row, column) + offset.
+    """
+    c, s = special.cosdg(angle), special.sindg(angle)
+    matrix = np.array([[c, s], [-s, c]])
+    in_shape = np.asarray(shape)
+    # Compute the shape of the rotated image from the rotated image corners
+    out_bounds = np.dot(matrix, [[0, 0, in_shape[0], in_shape[0]], [0, in_shape[1], 0, in_shape[1]]])
+    out_shape = (np.ptp(out_bounds, axis=1) + 0.5).astype(int)
+    # Rotate about the centre of both images
+    offset = (in_shape - 1) / 2. - np.dot(matrix, (out_shape - 1) / 2.)
+    return matrix, offset, tuple(out_shape)
+
+
+def affine_resample(topo_data, matrix, offset, out_shape, order=3):
+    """
+    Resample the topography data over the output pixel grid, where each output pixel (row, column) is sampled from
+    the input at matrix . (row, column) + offset. Only the area of the input that is mapped into the output window
+    is spline-filtered and sampled, so a small window of a large image is cheap.
+
+    :param topo_data: 2D numpy array of the topography data.
+    :param matrix: 2x2 array of the linear part of the transform.
+    :param offset: Length 2 array of the offset of the transform.
+    :param out_shape: Shape (y_res, x_res) of the output image.
+    :param order: Order of the spline interpolation.
+    :return: 2D array of the resampled data, where samples from outside the input image are zero.
+    """
+    out_shape = tuple(int(n) for n in out_shape)
+    if out_shape[0] < 1 or out_shape[1] < 1:
+        return np.zeros(out_shape)
+    matrix = np.asarray(matrix, dtype=float)
+    offset = np.asarray(offset, dtype=float)
+    # Find the bounding box of the input co-ordinates that are sampled, padded by the spline filter support
+    corners = np.dot(matrix, [[0, 0, out_shape[0] - 1, out_shape[0] - 1],
+                              [0, out_shape[1] - 1, 0, out_shape[1] - 1]]) + offset[:, None]
+    margin = 4 * order + 2
+    lower = np.clip(np.floor(np.amin(corners, axis=1)).astype(int) - margin, 0, np.shape(topo_data))
+    upper = np.clip(np.ceil(np.amax(corners, axis=1)).astype(int) + margin + 1, 0, np.shape(topo_data))
+    if np.any(upper <= lower):
+        return np.zeros(out_shape)
+    window = np.asarray(topo_data, dtype=float)[lower[0]:upper[0], lower[1]:upper[1]]
+    return ndimage.affine_transform(window, matrix, offset - lower, out_shape, order=order, mode='constant',
+                                    cval=0.0, prefilter=order > 1)
+
+
+def affine_view(topo_data, matrix, offset, out_shape, tol=1e-9):
+    """
+    Return the output of an affine transform as a strided view of the input, if the transform is only composed of
+    flips, transposes and integer shifts (i.e. flips, crops and rotations by multiples of 90 degrees).
+
+    :param topo_data: 2D numpy array of the topography data.
+    :param matrix: 2x2 array of the linear part of the transform.
+    :param offset: Length 2 array of the offset of the transform.
+    :param out_shape: Shape (y_res, x_res) of the output image.
+    :param tol: Tolerance used to decide whether the transform is an exact pixel permutation.
+    :return: The view of the input data, or None if the transform requires interpolation.
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    offset = np.asarray(offset, dtype=float)
+    if np.any(np.abs(matrix - np.round(matrix)) > tol) or np.any(np.abs(offset - np.round(offset)) > tol):
+        return None
+    matrix = np.round(matrix).astype(int)
+    offset = np.round(offset).astype(int)
+    # A transposed transform is turned into a diagonal one by transposing the input (which is also a view)
+    if matrix[0, 0] == 0 and matrix[1, 1] == 0 and abs(matrix[0, 1]) == 1 and abs(matrix[1, 0]) == 1:
+        topo_data = np.transpose(topo_data)
+        steps, offset = (matrix[1, 0], matrix[0, 1]), offset[::-1]
+    elif matrix[0, 1] == 0 and matrix[1, 0] == 0 and abs(matrix[0, 0]) == 1 and abs(matrix[1, 1]) == 1:
+        steps = (matrix[0, 0], matrix[1, 1])
+    else:
+        return None
+    # Build the strided slice along each axis, provided it lies fully within the input
+    slices = list()
+    for start, step, n, res in zip(offset, steps, out_shape, np.shape(topo_data)):
+        stop = start + step * (n - 1)
+        if min(start, stop) < 0 or max(start, stop) >= res:
+            return None
+        end = stop + step
+        slices.append(slice(start, None if end < 0 else end, step))
+    return topo_data[tuple(slices)]
+
+
+def rotate_crop(topo_data, angle, window=None, order=3):
+    """
+    Rotate the topography data by the given angle (identically to 'scipy.ndimage.rotate' with reshape=True) and crop
+    the rotated image, by only resampling the pixels that lie within the crop window.
+
+    :param topo_data: 2D numpy array of the topography data.
+    :param angle: Rotation angle in degrees.
+    :param window: Pixel crop window [x0, x1, y0, y1] in the rotated image. If None, the full rotated image is returned.
+    :param order: Order of the spline interpolation.
+    :return: 2D array of the rotated and cropped topography data.
+    """
+    matrix, offset, out_shape = rotation_matrix(angle, np.shape(topo_data))
+    if window is not None:
+        x0, x1, y0, y1 = window
+        offset = offset + np.dot(matrix, [y0, x0])
+        out_shape = (y1 - y0, x1 - x0)
+    view = affine_view(topo_data, matrix, offset, out_shape)
+    if view is not None:
+        return view
+    return affine_resample(topo_data, matrix, offset, out_shape, order)
+
+
+# 4.0 - Defining the multi-resolution image pyramid that is used to display the topography scans
+def mean_pool(topo_data):
+    """
+    Downsample the topography data by a factor of two along both axes, by taking the mean over each 2x2 block. An odd
+    number of rows or columns is padded by repeating the last row or column, so the full image is always covered.
+
+    :param topo_data: 2D numpy array of the topography data.
+    :return: 2D array of the downsampled topography data.
+    """
+    rows, cols = np.shape(topo_data)
+    topo_data = np.pad(topo_data, ((0, rows % 2), (0, cols % 2)), mode='edge')
+    return topo_data.reshape(topo_data.shape[0] // 2, 2, topo_data.shape[1] // 2, 2).mean(axis=(1, 3))
+
+
+class ImagePyramid(object):
+    """
+    Mean-pooled pyramid of the topography data of a single scan direction, where each level is half the size of the
+    level before it. The minimum and maximum of the full resolution data are retained, so that a plot of any level
+    uses the same colour scale as the full resolution image.
+    """
+    def __init__(self, topo_data, min_size=16):
+        """
+        Defines the initialisation of the class object.
+        topo_data:  2D numpy array of the full resolution topography data.
+        min_size:   Size (in pixels) below which no further levels are made.
+        """
+        self.levels = [np.asarray(topo_data)]       # List of the pyramid levels, from the full resolution downwards
+        while min(np.shape(self.levels[-1])) >= 2 * min_size:
+            self.levels.append(mean_pool(self.levels[-1]))
+        self.min = np.amin(self.levels[0])          # Minimum value of the full resolution data
+        self.max = np.amax(self.levels[0])          # Maximum value of the full resolution data
+        self._histogram = None                      # Height histogram of the full resolution data, once it is made
+        self._display = dict()                      # Dictionary of the normalised levels that have been displayed
+
+    def level(self, shape):
+        """
+        Return the smallest level that still has at least the given number of (rows, columns), such that no detail is
+        lost when it is displayed over that many screen pixels.
+
+        :param shape: The (rows, columns) of screen pixels over which the image is displayed.
+        :return: 2D array of the pyramid level.
+        """
+        for level in reversed(self.levels):
+            if np.shape(level)[0] >= shape[0] and np.shape(level)[1] >= shape[1]:
+                return level
+        return self.levels[0]
+
+    def display(self, shape, scale=1.):
+        """
+        Return the level for the given screen size, with its minimum set to zero and divided by the scale (such as to
+        convert it into nm). Each normalised level is only made once, so a redraw of the same level (such as for a
+        change of the colour scale) does not allocate a new image.
+
+        :param shape: The (rows, columns) of screen pixels over which the image is displayed.
+        :param scale: Factor that the heights are divided by.
+        :return: 2D array of the normalised pyramid level.
+        """
+        level = self.level(shape)
+        key = (len(level), scale)
+        if key not in self._display:
+            self._display[key] = (level - self.min) / scale
+        return self._display[key]
+
+    def histogram(self):
+        """
+        Return the height histogram of the full resolution data, which is only made the first time it is requested.
+
+        :return: The HeightHistogram instance.
+        """
+        if self._histogram is None:
+            self._histogram = HeightHistogram(self.levels[0])
+        return self._histogram
+
+
+# - Dictionary of the image pyramids, which are discarded along with the scan directions that they were made from
+_pyramids = weakref.WeakKeyDictionary()
+
+
+def image_pyramid(scan):
+    """
+    Return the image pyramid of a single scan direction, which is only made the first time it is requested. As the
+    scan directions of a TopoFile are shared between its copies, so are their pyramids.
+
+    :param scan: The DataArray instance of a single scan direction.
+    :return: The ImagePyramid instance of the scan direction.
+    """
+    pyramid = _pyramids.get(scan)
+    if pyramid is None or pyramid.levels[0] is not scan.data:
+        pyramid = ImagePyramid(scan.data)
+        _pyramids[scan] = pyramid
+    return pyramid
+
+
+# 5.0 - Defining the phase correlation registration of a stack of topography frames
+def _registration_spectra(stack, window=True):
+    """
+    Return the 2D real Fourier transforms of a stack of frames, after their mean is removed and (optionally) a Hann
+    window is applied to suppress the edges of each frame.
+
+    :param stack: 3D numpy array of the frames, of shape (frames, rows, columns).
+    :param window: If True, a Hann window is applied to each frame.
+    :return: 3D complex array of the real Fourier transforms of the frames.
+    """
+    frames = stack - np.mean(stack, axis=(1, 2), keepdims=True)
+    if window:
+        frames = frames * np.outer(np.hanning(stack.shape[1]), np.hanning(stack.shape[2]))
+    return np.fft.rfft2(frames)
+
+
+def _parabolic_offset(c_minus, c_peak, c_plus):
+    """
+    Return the sub-pixel offset of the vertex of the parabola through three equally spaced samples around a peak.
+
+    :param c_minus: Array of the samples before the peak.
+    :param c_peak: Array of the samples at the peak.
+    :param c_plus: Array of the samples after the peak.
+    :return: Array of the offsets, between -0.5 and 0.5 pixels.
+    """
+    denom = c_minus - 2 * c_peak + c_plus
+    safe = np.where(denom == 0, 1, denom)
+    return np.where(denom == 0, 0, np.clip(0.5 * (c_minus - c_plus) / safe, -0.5, 0.5))
+
+
+def phase_correlation(stack, reference=0, window=True, power=0.5, lowpass=0.1, chunk=64):
+    """
+    Estimate the sub-pixel shifts that register every frame of a stack onto a reference frame, from the peak of their
+    phase correlation. All the frames of each chunk are transformed, correlated and peak-fitted together, so hundreds
+    of frames are registered without a loop over the frames. The pure phase correlation (power of 1) weights the noisy
+    high frequencies as much as the signal, so by default the cross-power spectrum is only partially normalised and is
+    weighted by a gaussian low-pass filter, which keeps a sharp peak whilst being far less sensitive to the noise.
+
+    :param stack: 3D numpy array of the frames, of shape (frames, rows, columns), or a list of 2D frames.
+    :param reference: Integer index of the reference frame, a 2D array of the same shape as the frames, or a 3D
+    array that holds a separate reference for each frame.
+    :param window: If True, a Hann window is applied to each frame before the transform.
+    :param power: Exponent of the magnitude that the cross-power spectrum is normalised by (1 is the pure phase
+    correlation and 0 is the plain cross-correlation).
+    :param lowpass: Standard deviation of the gaussian low-pass filter, in cycles per pixel (if None, no filter).
+    :param chunk: Number of frames that are transformed together, which bounds the memory used.
+    :return: 2D array of the (dy, dx) shifts, in pixels, that register each frame onto the reference.
+    """
+    stack = np.asarray(stack, dtype=float)
+    if stack.ndim == 2:
+        stack = stack[np.newaxis]
+    num, rows, cols = stack.shape
+    # The spectrum of a single reference frame is found once and shared by all the chunks
+    ref = stack[reference] if np.ndim(reference) == 0 else np.asarray(reference, dtype=float)
+    if ref.ndim == 2:
+        ref_spectrum = _registration_spectra(ref[np.newaxis], window)[0]
+    weight = 1.
+    if lowpass is not None:
+        freq2 = np.fft.fftfreq(rows)[:, np.newaxis] ** 2 + np.fft.rfftfreq(cols)[np.newaxis, :] ** 2
+        weight = np.exp(-0.5 * freq2 / lowpass ** 2)
+    shifts = np.zeros((num, 2))
+    for start in range(0, num, chunk):
+        spectra = _registration_spectra(stack[start:start + chunk], window)
+        if ref.ndim == 3:
+            ref_spectrum = _registration_spectra(ref[start:start + chunk], window)
+        # - The normalised cross-power spectrum, whose inverse transform peaks at the shift of each frame
+        cross = ref_spectrum * np.conj(spectra) * weight
+        if power != 0:
+            cross /= np.maximum(np.abs(cross), 1e-300) ** power
+        corr = np.fft.irfft2(cross, s=(rows, cols))
+        # - Locating the integer peak of each frame, then refining it with a parabola along each axis
+        n = np.arange(corr.shape[0])
+        py, px = np.unravel_index(np.argmax(corr.reshape(corr.shape[0], -1), axis=1), (rows, cols))
+        peak = corr[n, py, px]
+        dy = py + _parabolic_offset(corr[n, (py - 1) % rows, px], peak, corr[n, (py + 1) % rows, px])
+        dx = px + _parabolic_offset(corr[n, py, (px - 1) % cols], peak, corr[n, py, (px + 1) % cols])
+        # - Shifts beyond half the frame are wrapped around to negative shifts
+        shifts[start:start + chunk, 0] = np.where(dy > rows / 2, dy - rows, dy)
+        shifts[start:start + chunk, 1] = np.where(dx > cols / 2, dx - cols, dx)
+    return shifts
+
+
+def overlap_window(shifts, shape):
+    """
+    Return the window of pixels that is covered by every frame once they have been shifted.
+
+    :param shifts: 2D array of the (dy, dx) shifts of each frame, in pixels.
+    :param shape: The (rows, columns) of the frames.
+    :return: The window [x0, x1, y0, y1] of the common area, in the pixel co-ordinates of the shifted frames.
+    """
+    shifts = np.atleast_2d(shifts)
+    y0 = int(np.ceil(max(np.max(shifts[:, 0]), 0)))
+    y1 = int(np.floor(min(shape[0] - 1 + np.min(shifts[:, 0]), shape[0] - 1))) + 1
+    x0 = int(np.ceil(max(np.max(shifts[:, 1]), 0)))
+    x1 = int(np.floor(min(shape[1] - 1 + np.min(shifts[:, 1]), shape[1] - 1))) + 1
+    return [x0, max(x1, x0), y0, max(y1, y0)]
+
+
+def apply_shifts(stack, shifts, crop=False, method='fourier', chunk=64):
+    """
+    Shift every frame of a stack by its sub-pixel shift. The Fourier method applies the Fourier shift theorem over all
+    the frames of each chunk together, where the shifted frames wrap around their edges. The linear method gathers the
+    four neighbouring pixels of every frame at once, and is local, so a scar in one line does not ring into the lines
+    around it. In both cases, the area that is covered by every frame can be cropped out.
+
+    :param stack: 3D numpy array of the frames, of shape (frames, rows, columns), or a list of 2D frames.
+    :param shifts: 2D array of the (dy, dx) shifts of each frame, in pixels, as returned from 'phase_correlation'.
+    :param crop: If True, the frames are cropped to the area that is covered by every frame.
+    :param method: Method of the sub-pixel shifts; 'fourier' or 'linear'.
+    :param chunk: Number of frames that are transformed together, which bounds the memory used.
+    :return: 3D array of the shifted frames.
+    """
+    stack = np.asarray(stack, dtype=float)
+    if stack.ndim == 2:
+        stack = stack[np.newaxis]
+    shifts = np.atleast_2d(shifts)
+    num, rows, cols = stack.shape
+    if method == 'linear':
+        # - The source co-ordinates of each output pixel, with the edge pixels repeated beyond the frame
+        src_y = np.arange(rows)[np.newaxis, :] - shifts[:, 0:1]
+        src_x = np.arange(cols)[np.newaxis, :] - shifts[:, 1:2]
+        y0, x0 = np.floor(src_y), np.floor(src_x)
+        wy, wx = (src_y - y0)[:, :, np.newaxis], (src_x - x0)[:, np.newaxis, :]
+        y0, x0 = y0.astype(int), x0.astype(int)
+        iy0, iy1 = np.clip(y0, 0, rows - 1), np.clip(y0 + 1, 0, rows - 1)
+        ix0, ix1 = np.clip(x0, 0, cols - 1), np.clip(x0 + 1, 0, cols - 1)
+        n = np.arange(num)[:, np.newaxis, np.newaxis]
+        shifted = ((1 - wy) * ((1 - wx) * stack[n, iy0[:, :, np.newaxis], ix0[:, np.newaxis, :]] +
+                               wx * stack[n, iy0[:, :, np.newaxis], ix1[:, np.newaxis, :]]) +
+                   wy * ((1 - wx) * stack[n, iy1[:, :, np.newaxis], ix0[:, np.newaxis, :]] +
+                         wx * stack[n, iy1[:, :, np.newaxis], ix1[:, np.newaxis, :]]))
+    elif method == 'fourier':
+        ky = np.fft.fftfreq(rows)[np.newaxis, :, np.newaxis]
+        kx = np.fft.rfftfreq(cols)[np.newaxis, np.newaxis, :]
+        shifted = np.empty_like(stack)
+        for start in range(0, num, chunk):
+            dy = shifts[start:start + chunk, 0][:, np.newaxis, np.newaxis]
+            dx = shifts[start:start + chunk, 1][:, np.newaxis, np.newaxis]
+            phase = np.exp(-2j * np.pi * (ky * dy + kx * dx))
+            shifted[start:start + chunk] = np.fft.irfft2(np.fft.rfft2(stack[start:start + chunk]) * phase,
+                                                         s=(rows, cols))
+    else:
+        raise ValueError("Unknown shift method '{}'; use 'fourier' or 'linear'.".format(method))
+    if crop:
+        x0, x1, y0, y1 = overlap_window(shifts, (rows, cols))
+        shifted = shifted[:, y0:y1, x0:x1]
+    return shifted
+
+
+# 6.0 - Defining the signal-averaging of the aligned scan directions of a topography scan
+def average_directions(stack, reference=0, reject=3.0, register=True):
+    """
+    Combine the scan directions of a topography scan into a single image of higher signal-to-noise. The directions are
+    first registered onto the reference direction (removing the offset of the backward directions from the piezo
+    hysteresis) with a local linear shift, and cropped to their common area. Any line of a direction that deviates
+    from the median of all the directions by more than 'reject' robust standard deviations is rejected, and the
+    remaining lines are averaged with their per-pixel variance. Every operation is vectorised over the direction axis
+    and any leading axes, so a whole batch of scans of the same shape can be averaged at once.
+
+    :param stack: Numpy array of the scan directions, of shape (..., directions, rows, columns).
+    :param reference: Integer index of the direction that the others are registered onto.
+    :param reject: Threshold for the rejection of outlier lines, in robust standard deviations (if None, no lines are
+    rejected).
+    :param register: If True, the directions are registered before they are averaged.
+    :return: The averaged image and its per-pixel variance, of shape (..., rows, columns), the number of directions
+    averaged at each pixel, and the (dy, dx) shifts of each direction in pixels, of shape (..., directions, 2).
+    """
+    stack = np.asarray(stack, dtype=float)
+    lead, (num, rows, cols) = stack.shape[:-3], stack.shape[-3:]
+    frames = stack.reshape((-1, num, rows, cols))
+    # Registering each direction onto the reference direction of its own scan
+    shifts = np.zeros(frames.shape[:2] + (2,))
+    if register:
+        references = np.repeat(frames[:, reference], num, axis=0)
+        shifts = phase_correlation(frames.reshape((-1, rows, cols)), reference=references).reshape(shifts.shape)
+        # - The shifted directions are cropped to the area that is covered by every direction of every scan
+        x0, x1, y0, y1 = overlap_window(shifts.reshape((-1, 2)), (rows, cols))
+        frames = apply_shifts(frames.reshape((-1, rows, cols)), shifts.reshape((-1, 2)), method='linear')
+        frames = frames[:, y0:y1, x0:x1]
+        frames = frames.reshape(shifts.shape[:2] + frames.shape[-2:])
+    # Rejecting the outlier lines, from the median deviation of each line from the median of all the directions
+    keep = np.ones(frames.shape[:-1], dtype=bool)
+    if reject is not None and num > 2:
+        score = np.median(np.abs(frames - np.median(frames, axis=1, keepdims=True)), axis=-1)
+        centre = np.median(score, axis=-1, keepdims=True)
+        spread = 1.4826 * np.median(np.abs(score - centre), axis=-1, keepdims=True)
+        keep = score <= centre + reject * np.maximum(spread, 1e-300)
+    weights = np.broadcast_to(keep[..., np.newaxis], frames.shape)
+    # Averaging the remaining lines, with the median of all the directions used wherever every line is rejected
+    count = np.sum(weights, axis=1)
+    mean = np.sum(np.where(weights, frames, 0), axis=1) / np.maximum(count, 1)
+    mean = np.where(count > 0, mean, np.median(frames, axis=1))
+    resid = np.where(weights, frames - mean[:, np.newaxis], 0)
+    variance = np.sum(resid ** 2, axis=1) / np.maximum(count - 1, 1)
+    shape = lead + mean.shape[-2:]
+    return mean.reshape(shape), variance.reshape(shape), count.reshape(shape), shifts.reshape(lead + (num, 2))
+
+
+# 7.0 - Defining the height histogram, which gives the auto-contrast and roughness statistics of a topography scan
+class HeightHistogram(object):
+    """
+    Histogram of the heights of a topography scan, with its moments, made once from the full resolution data. All the
+    percentiles of the colour scale and the roughness statistics are then read from the histogram, without the image
+    being scanned or copied again.
+    """
+    def __init__(self, topo_data, bins=65536):
+        """
+        Defines the initialisation of the class object.
+        topo_data:  2D numpy array of the topography data.
+        bins:       Number of bins of the histogram, spread evenly between the minimum and maximum heights.
+        """
+        topo_data = np.asarray(topo_data, dtype=float).ravel()
+        self._accumulate(lambda: [topo_data], bins)
+
+    @classmethod
+    def from_blocks(cls, blocks, bins=65536):
+        """
+        Make the histogram of the heights of an image that is too large to be held in memory, such as a mosaic store,
+        from two passes over its blocks. The NaN pixels of the blocks, where there is no scan, are omitted.
+
+        :param blocks: Function that returns an iterable of the blocks (of any shape) of the image, on every call.
+        :param bins: Number of bins of the histogram, spread evenly between the minimum and maximum heights.
+        :return: The HeightHistogram instance of all the pixels of the blocks.
+        """
+        def finite_blocks():
+            for block in blocks():
+                block = np.asarray(block, dtype=float).ravel()
+                yield block[np.isfinite(block)]
+        histogram = cls.__new__(cls)
+        histogram._accumulate(finite_blocks, bins)
+        return histogram
+
+    def _accumulate(self, blocks, bins):
+        """
+        Fill the histogram and the moments from two passes over the 1D blocks of heights; the first finds the extent
+        and mean of the heights, and the second the bin counts and the central moments.
+        """
+        self.size, total = 0, 0.                    # Total number of pixels
+        self.min, self.max = np.inf, -np.inf        # Minimum and maximum heights
+        for block in blocks():
+            if block.size > 0:
+                self.size += block.size
+                self.min, self.max = min(self.min, np.amin(block)), max(self.max, np.amax(block))
+                total += np.sum(block)
+        self.mean = total / self.size               # Mean height
+        # - The bin of every pixel, where the maximum height is held in the last bin
+        width = (self.max - self.min) / bins if self.max > self.min else 1.
+        self.counts = np.zeros(bins, dtype=np.intp)                            # Number of pixels in each bin
+        self.edges = self.min + width * np.arange(bins + 1)                    # Edges of the bins
+        # - The central moments of the heights, where the sums of powers are found as dot products of the deviations
+        sum_square, sum_cube, sum_abs = 0., 0., 0.
+        for block in blocks():
+            index = np.minimum(((block - self.min) / width).astype(np.intp), bins - 1)
+            self.counts += np.bincount(index, minlength=bins)
+            deviation = block - self.mean
+            square = deviation * deviation
+            sum_square += np.sum(square)
+            sum_cube += np.dot(square, deviation)
+            sum_abs += np.sum(np.abs(deviation, out=deviation))
+        self.rq = np.sqrt(sum_square / self.size)                               # Root mean square roughness
+        self.skew = sum_cube / self.size / self.rq ** 3 if self.rq > 0 else 0.  # Skewness
+        self.ra = sum_abs / self.size                                           # Arithmetic mean roughness
+
+    def percentile(self, q):
+        """
+        Return the heights below which the given percentages of the pixels lie, interpolated within each bin.
+
+        :param q: Percentage (or array of percentages) between 0 and 100.
+        :return: The height (or array of heights) at the percentages.
+        """
+        cumulative = np.concatenate(([0], np.cumsum(self.counts))) / float(self.size)
+        return np.interp(np.asarray(q) / 100., cumulative, self.edges)
+
+    def contrast(self, lower=0.5, upper=99.5, scale=1.):
+        """
+        Return the automatic colour scale of the scan, which spans the given percentiles of the heights so that a few
+        outlying pixels do not set the contrast. The colour scale is relative to the minimum height, in the same way as
+        the normalised levels of the image pyramid.
+
+        :param lower: Percentage of the pixels that lie below the colour scale.
+        :param upper: Percentage of the pixels that lie within or below the colour scale.
+        :param scale: Factor that the heights are divided by.
+        :return: The (vmin, vmax) of the colour scale.
+        """
+        vmin, vmax = (self.percentile([lower, upper]) - self.min) / scale
+        if vmax <= vmin:
+            vmax = vmin + 1
+        return vmin, vmax
+
+    def distribution(self, scale=1.):
+        """
+        Return the height distribution of the scan.
+
+        :param scale: Factor that the heights are divided by.
+        :return: Arrays of the bin centres, relative to the minimum height, and the fraction of the pixels in each bin.
+        """
+        centres = 0.5 * (self.edges[1:] + self.edges[:-1])
+        return (centres - self.min) / scale, self.counts / float(self.size)
+
+    def stats(self, scale=1.):
+        """
+        Return the roughness statistics of the scan.
+
+        :param scale: Factor that the heights are divided by.
+        :return: Dictionary of the mean height, peak-to-valley height, Ra, Rq and the skewness.
+        """
+        return {'mean': (self.mean - self.min) / scale, 'peak to valley': (self.max - self.min) / scale,
+                'Ra': self.ra / scale, 'Rq': self.rq / scale, 'skew': self.skew}
+
+
+# 8.0 - Defining the detection and removal of the scan-line artifacts (scars and streaks) from tip changes
+def _robust_spread(values, axis):
+    """
+    Return the median and the robust standard deviation (from the median absolute deviation) along the given axes.
+    """
+    centre = np.median(values, axis=axis, keepdims=True)
+    spread = 1.4826 * np.median(np.abs(values - centre), axis=axis, keepdims=True)
+    return centre, np.maximum(spread, np.finfo(float).tiny)
+
+
+def interpolate_rows(stack, mask):
+    """
+    Replace the masked pixels of every image of a stack by linear interpolation along each column, between the nearest
+    unmasked pixels above and below them. Masked pixels at the top or bottom of a column take the nearest unmasked
+    pixel, and columns that are entirely masked are left unchanged.
+
+    :param stack: Numpy array of the images, of shape (..., rows, columns).
+    :param mask: Boolean array of the same shape, which is True for the pixels to be replaced.
+    :return: Array of the images with the masked pixels replaced.
+    """
+    stack = np.asarray(stack, dtype=float)
+    mask = np.broadcast_to(mask, stack.shape)
+    rows = stack.shape[-2]
+    index = np.arange(rows).reshape((rows, 1))
+    # The nearest unmasked rows above and below every pixel, found by running maxima and minima along each column
+    below = np.maximum.accumulate(np.where(mask, -1, index), axis=-2)
+    above = np.flip(np.minimum.accumulate(np.flip(np.where(mask, rows, index), axis=-2), axis=-2), axis=-2)
+    has_below, has_above = below >= 0, above < rows
+    z_below = np.take_along_axis(stack, np.clip(below, 0, rows - 1), axis=-2)
+    z_above = np.take_along_axis(stack, np.clip(above, 0, rows - 1), axis=-2)
+    weight = np.where(has_below & has_above, (index - below) / np.maximum(above - below, 1.), 0.)
+    filled = np.where(has_below, z_below + weight * (z_above - z_below), z_above)
+    return np.where(mask & (has_below | has_above), filled, stack)
+
+
+def _streak_runs(steps, limit, max_lines):
+    """
+    Return the mask of the lines that belong to a streak, given the steps between each line and the line before it.
+    A streak of 'w' lines is entered by a step above the limit and left by a step of the opposite sign, 'w' lines later.
+
+    :param steps: Array of the steps, of shape (..., rows - 1, columns), along the second-to-last axis.
+    :param limit: Array of the step limits, which broadcasts against the steps.
+    :param max_lines: Largest number of adjacent lines that a streak may cover.
+    :return: Boolean array of the streak lines, of shape (..., rows, columns).
+    """
+    rows = steps.shape[-2] + 1
+    mask = np.zeros(steps.shape[:-2] + (rows, steps.shape[-1]), dtype=bool)
+    for width in range(1, min(max_lines, rows - 2) + 1):
+        enter, leave = steps[..., :-width, :], steps[..., width:, :]
+        found = (np.minimum(enter, -leave) > limit) | (np.minimum(-enter, leave) > limit)
+        # - Marking all the lines of each streak that was found, which start one line after the entering step
+        for offset in range(width):
+            mask[..., 1 + offset:rows - width + offset, :] |= found
+    return mask
+
+
+def line_artifact_mask(stack, threshold=4.0, min_length=8, max_lines=5):
+    """
+    Find the scan-line artifacts of every image of a stack. A streak is a group of up to 'max_lines' adjacent lines
+    that are offset from the lines on either side of it, so it is entered by a step between two lines and left by a
+    step of the opposite sign (whereas a genuine terrace step is not followed by the opposite step). Whole anomalous
+    lines are found from the median steps between the lines, compared to their spread over the image. Partial scars
+    are then found from the steps between the pixels of adjacent lines, as runs of at least 'min_length' pixels along
+    a line, once the whole anomalous lines have been replaced.
+
+    :param stack: Numpy array of the images, of shape (..., rows, columns).
+    :param threshold: Threshold of the steps, in robust standard deviations.
+    :param min_length: Minimum number of consecutive pixels along a line for a partial scar (if None, partial scars
+    are not searched for).
+    :param max_lines: Largest number of adjacent lines that a streak may cover.
+    :return: Boolean array of the artifact pixels, of the same shape as the stack.
+    """
+    stack = np.asarray(stack, dtype=float)
+    rows, cols = stack.shape[-2:]
+    frames = stack.reshape((-1, rows, cols))
+    if rows < 3:
+        return np.zeros(stack.shape, dtype=bool)
+    # Whole anomalous lines, from the median step between each line and the line before it
+    steps = np.median(np.diff(frames, axis=1), axis=2)[:, :, np.newaxis]
+    centre, spread = _robust_spread(steps, axis=(1, 2))
+    line_mask = _streak_runs(steps - centre, threshold * spread, max_lines)
+    mask = np.broadcast_to(line_mask, frames.shape).copy()
+    # Partial scars, from the steps between the pixels of adjacent lines, once the whole lines have been replaced
+    if min_length is not None:
+        steps = np.diff(interpolate_rows(frames, mask), axis=1)
+        centre, spread = _robust_spread(steps, axis=(1, 2))
+        scars = _streak_runs(steps - centre, threshold * spread, max_lines)
+        mask |= kn.run_mask(scars.reshape((-1, cols)), min_length).reshape(frames.shape)
+    return mask.reshape(stack.shape)
+
+
+def remove_line_artifacts(stack, threshold=4.0, min_length=8, max_lines=5):
+    """
+    Detect the scan-line artifacts of every image of a stack and replace them by interpolation from the lines above
+    and below, for all the images at once.
+
+    :param stack: Numpy array of the images, of shape (..., rows, columns).
+    :param threshold: Threshold of the deviations, in robust standard deviations.
+    :param min_length: Minimum number of consecutive pixels along a line for a partial scar (if None, only whole lines
+    are replaced).
+    :param max_lines: Largest number of adjacent lines that a streak may cover.
+    :return: The array of the repaired images, and the boolean array of the replaced pixels.
+    """
+    mask = line_artifact_mask(stack, threshold, min_length, max_lines)
+    return interpolate_rows(stack, mask), mask
+
+
+# 9.0 - Defining the line profiles, which sample any number of polylines with a single interpolation
+def profile_pixels(points, info):
+    """
+    Convert the points of a polyline from real units into (x, y) pixel co-ordinates, where the pixel centres lie on
+    the integer co-ordinates and the real co-ordinates are measured from the origin of the (possibly cropped) image.
+
+    :param points: Array of the x, y co-ordinate pairs of the polyline in real units, of shape (points, 2).
+    :param info: The info dictionary of the scan direction.
+    :return: Array of the x, y pixel co-ordinates, of shape (points, 2).
+    """
+    points = np.asarray(points, dtype=float)
+    origin = np.array([info.get('xreal_min', 0), info.get('yreal_min', 0)])
+    return (points - origin) / np.array([info['xinc'], info['yinc']])
+
+
+def _polyline_samples(points, info, num_points):
+    """
+    Return the samples that are equally spaced along the arc length of a polyline; their arc lengths and x, y positions
+    in real units, the unit normals (in real units) of the segments that they lie on and the total length.
+    """
+    points = np.asarray(points, dtype=float)
+    # - The cumulative arc length of the vertices in real units, along which the samples are equally spaced
+    segments = np.diff(points, axis=0)
+    segment_lengths = np.hypot(segments[:, 0], segments[:, 1])
+    vertex_arc = np.concatenate(([0.], np.cumsum(segment_lengths)))
+    l_data = np.linspace(0., vertex_arc[-1], int(num_points))
+    x_data = np.interp(l_data, vertex_arc, points[:, 0])
+    y_data = np.interp(l_data, vertex_arc, points[:, 1])
+    # - The normal of each sample is that of its segment, pointing to the left of the direction of the polyline
+    index = np.clip(np.searchsorted(vertex_arc, l_data, side='right') - 1, 0, len(segments) - 1)
+    safe = np.where(segment_lengths == 0, 1., segment_lengths)
+    normals = np.stack([-segments[:, 1] / safe, segments[:, 0] / safe], axis=1)[index]
+    return l_data, x_data, y_data, normals, vertex_arc[-1]
+
+
+def line_profiles(topo_data, polylines, info, num_points=1000, order=1):
+    """
+    Sample the topography data along any number of polylines, with all their samples interpolated by a single call.
+    The samples of each polyline are equally spaced along its arc length in real units, so that segments of different
+    lengths are sampled at the same density.
+
+    :param topo_data: 2D numpy array of the topography data.
+    :param polylines: List of the polylines, each an array of the x, y co-ordinate pairs in real units.
+    :param info: The info dictionary of the scan direction.
+    :param num_points: Number of samples along each polyline (or a list of the number of samples of each polyline).
+    :param order: Order of the spline interpolation; 0 for the nearest pixel, 1 for bilinear and 3 for cubic.
+    :return: List of the (l_data, z_data, length) of each polyline; the arc length of each sample (in real units),
+    the sampled topography data and the total length of the polyline.
+    """
+    if np.ndim(num_points) == 0:
+        num_points = [num_points] * len(polylines)
+    samples = [_polyline_samples(points, info, num) for points, num in zip(polylines, num_points)]
+    pixels = profile_pixels(np.concatenate([np.stack([sample[1], sample[2]], axis=1) for sample in samples]), info)
+    # All the samples of all the polylines are interpolated together, where the samples beyond the image are clamped
+    z_all = ndimage.map_coordinates(np.asarray(topo_data, dtype=float), [pixels[:, 1], pixels[:, 0]], order=order,
+                                    mode='nearest')
+    z_split = np.split(z_all, np.cumsum([len(sample[0]) for sample in samples])[:-1])
+    return [(sample[0], z_data, sample[4]) for sample, z_data in zip(samples, z_split)]
+
+
+def line_profile(topo_data, points, info, num_points=1000, order=1):
+    """
+    Sample the topography data along a single polyline (see 'line_profiles').
+
+    :param topo_data: 2D numpy array of the topography data.
+    :param points: Array of the x, y co-ordinate pairs of the polyline in real units, of shape (points, 2).
+    :param info: The info dictionary of the scan direction.
+    :param num_points: Number of samples along the polyline.
+    :param order: Order of the spline interpolation; 0 for the nearest pixel, 1 for bilinear and 3 for cubic.
+    :return: The arc length of each sample (in real units), the sampled topography data and the total length.
+    """
+    return line_profiles(topo_data, [points], info, num_points, order)[0]
+
+
+def swath_profile(topo_data, points, info, width, num_points=1000, num_across=None, order=1):
+    """
+    Sample the topography data over a band of the given width around a polyline, and average across the band. The
+    samples form a grid of lines that are parallel to the polyline, which are all interpolated by a single call.
+
+    :param topo_data: 2D numpy array of the topography data.
+    :param points: Array of the x, y co-ordinate pairs of the polyline in real units, of shape (points, 2).
+    :param info: The info dictionary of the scan direction.
+    :param width: Width of the band in real units.
+    :param num_points: Number of samples along the polyline.
+    :param num_across: Number of samples across the band (if None, one sample per pixel is used).
+    :param order: Order of the spline interpolation; 0 for the nearest pixel, 1 for bilinear and 3 for cubic.
+    :return: The arc length of each sample (in real units), the mean and the standard deviation of the topography data
+    across the band and the total length.
+    """
+    l_data, x_data, y_data, normals, length = _polyline_samples(points, info, num_points)
+    if num_across is None:
+        num_across = int(np.round(width / min(info['xinc'], info['yinc']))) + 1
+    offsets = np.linspace(-0.5 * width, 0.5 * width, max(int(num_across), 1))[:, np.newaxis]
+    # The grid of the samples, of shape (num_across, num_points), is mapped into pixels and sampled in one call
+    grid = np.stack([x_data + offsets * normals[:, 0], y_data + offsets * normals[:, 1]], axis=-1)
+    pixels = profile_pixels(grid.reshape((-1, 2)), info)
+    z_grid = ndimage.map_coordinates(np.asarray(topo_data, dtype=float), [pixels[:, 1], pixels[:, 0]], order=order,
+                                     mode='nearest').reshape(grid.shape[:2])
+    return l_data, np.mean(z_grid, axis=0), np.std(z_grid, axis=0), length
+
+
+def swath_outline(points, width):
+    """
+    Return the outline of the band of the given width around a polyline, as a closed polygon of the x, y co-ordinates
+    (in the same units as the points), where each segment contributes its own offset end points.
+
+    :param points: Array of the x, y co-ordinate pairs of the polyline, of shape (points, 2).
+    :param width: Width of the band.
+    :return: Array of the x, y co-ordinates of the outline, of shape (4 * segments + 1, 2).
+    """
+    points = np.asarray(points, dtype=float)
+    segments = np.diff(points, axis=0)
+    lengths = np.hypot(segments[:, 0], segments[:, 1])
+    normals = np.stack([-segments[:, 1], segments[:, 0]], axis=1) / np.where(lengths == 0, 1., lengths)[:, np.newaxis]
+    offset = 0.5 * width * np.repeat(normals, 2, axis=0)
+    ends = np.stack([points[:-1], points[1:]], axis=1).reshape((-1, 2))
+    outline = np.concatenate([ends + offset, (ends - offset)[::-1]])
+    return np.concatenate([outline, outline[:1]])
+
+
+# 10.0 - Defining the step-height analysis, from the terrace levels of the height histogram of a leveled topography scan
+def _gaussian_mixture(centres, counts, means, sigmas, weights, min_sigma, iterations=200, tol=1e-6):
+    """
+    Fit a mixture of gaussians to a histogram by expectation-maximisation, where every bin is weighted by its count, so
+    all the pixels are fitted at the cost of the number of bins.
+
+    :param centres: 1D array of the centres of the bins.
+    :param counts: 1D array of the counts of the bins.
+    :param means: 1D array of the initial means of the gaussians.
+    :param sigmas: 1D array of the initial standard deviations of the gaussians.
+    :param weights: 1D array of the initial weights of the gaussians.
+    :param min_sigma: Smallest standard deviation of a gaussian.
+    :param iterations: Largest number of iterations.
+    :param tol: Relative change of the log-likelihood at which the iterations stop.
+    :return: The 1D arrays of the fitted means, standard deviations and weights.
+    """
+    total = float(np.sum(counts))
+    x = centres[:, np.newaxis]
+    previous = -np.inf
+    for _ in range(iterations):
+        # - Expectation; the responsibility of each gaussian for each bin
+        density = weights / sigmas * np.exp(-0.5 * ((x - means) / sigmas) ** 2)
+        norm = np.maximum(np.sum(density, axis=1, keepdims=True), np.finfo(float).tiny)
+        resp = counts[:, np.newaxis] * density / norm
+        # - Maximisation; the weighted moments of each gaussian
+        n_k = np.maximum(np.sum(resp, axis=0), np.finfo(float).tiny)
+        means = np.sum(resp * x, axis=0) / n_k
+        sigmas = np.maximum(np.sqrt(np.sum(resp * (x - means) ** 2, axis=0) / n_k), min_sigma)
+        weights = n_k / total
+        likelihood = np.sum(counts * np.log(norm[:, 0]))
+        if abs(likelihood - previous) <= tol * abs(likelihood):
+            break
+        previous = likelihood
+    return means, sigmas, weights
+
+
+def terrace_levels(topo_data, bins=512, flat_fraction=0.7, max_levels=8, min_prominence=0.05, min_weight=0.01):
+    """
+    Detect the terrace levels of a leveled topography scan from the histogram of the heights of its flattest pixels,
+    where the pixels on the step edges (the steepest pixels) are excluded so that the terrace peaks are not bridged.
+    The peaks of the smoothed histogram give the initial levels of a gaussian mixture, which is then fitted to the
+    histogram (with the unresolved levels merged), and the step heights are the differences of the adjacent levels.
+    The uncertainty of each level is the standard error of its mean (its standard deviation over the square root of
+    its number of pixels), which assumes uncorrelated pixels, so it is a lower bound.
+
+    :param topo_data: 2D numpy array of the leveled topography data.
+    :param bins: Number of bins of the histogram.
+    :param flat_fraction: Fraction of the pixels, with the smallest slopes, that are used.
+    :param max_levels: Largest number of terrace levels.
+    :param min_prominence: Smallest prominence of a terrace peak, as a fraction of the largest count of the histogram.
+    :param min_weight: Smallest fraction of the pixels of a terrace level, below which the level is discarded.
+    :return: Dictionary of the terrace levels ('levels', 'sigmas', 'weights' and 'level errors'), the step heights
+    between adjacent levels ('steps', 'step errors') and the histogram ('centres', 'counts'), in the units of the data.
+    """
+    topo_data = np.asarray(topo_data, dtype=float)
+    # The heights of the flattest pixels, from the magnitude of the gradient
+    slope = np.hypot(*np.gradient(topo_data))
+    flat = topo_data[slope <= np.percentile(slope, 100. * flat_fraction)]
+    counts, edges = np.histogram(flat, bins=bins)
+    centres = 0.5 * (edges[:-1] + edges[1:])
+    width = edges[1] - edges[0]
+    # Initial levels from the prominent peaks of the smoothed histogram
+    smoothed = ndimage.gaussian_filter1d(counts.astype(float), 2)
+    peaks, props = signal.find_peaks(np.concatenate(([0.], smoothed, [0.])),
+                                     prominence=min_prominence * np.max(smoothed))
+    peaks = peaks - 1
+    if len(peaks) == 0:
+        peaks = np.array([np.argmax(smoothed)])
+        props = {'prominences': np.ones(1)}
+    strongest = np.sort(np.argsort(-props['prominences'])[:max_levels])
+    means = centres[peaks[strongest]]
+    # - The initial width of each level is a quarter of the distance to its nearest neighbouring level
+    gaps = np.diff(means)
+    nearest = np.minimum(np.concatenate(([np.inf], gaps)), np.concatenate((gaps, [np.inf])))
+    sigmas = np.where(np.isfinite(nearest), 0.25 * nearest, 0.1 * (edges[-1] - edges[0]))
+    weights = np.full(len(means), 1. / len(means))
+    sigmas = np.maximum(sigmas, width)
+    # Fitting the mixture, then merging the adjacent levels that are not resolved (closer than the sum of their
+    # standard deviations) and discarding the insignificant levels, until all the remaining levels are distinct
+    while True:
+        means, sigmas, weights = _gaussian_mixture(centres, counts.astype(float), means, sigmas, weights,
+                                                   width / np.sqrt(12.))
+        order = np.argsort(means)
+        means, sigmas, weights = means[order], sigmas[order], weights[order]
+        overlap = np.diff(means) - (sigmas[1:] + sigmas[:-1])
+        if len(means) > 1 and np.min(overlap) < 0:
+            # - The closest pair is merged into one level with the same combined moments
+            i = np.argmin(overlap)
+            w = weights[i] + weights[i + 1]
+            mean = (weights[i] * means[i] + weights[i + 1] * means[i + 1]) / w
+            sigma = np.sqrt((weights[i] * (sigmas[i] ** 2 + means[i] ** 2) +
+                             weights[i + 1] * (sigmas[i + 1] ** 2 + means[i + 1] ** 2)) / w - mean ** 2)
+            means = np.concatenate((means[:i], [mean], means[i + 2:]))
+            sigmas = np.concatenate((sigmas[:i], [sigma], sigmas[i + 2:]))
+            weights = np.concatenate((weights[:i], [w], weights[i + 2:]))
+        elif len(means) > 1 and np.min(weights) < min_weight:
+            keep = weights >= min_weight
+            means, sigmas, weights = means[keep], sigmas[keep], weights[keep] / np.sum(weights[keep])
+        else:
+            break
+    errors = sigmas / np.sqrt(np.maximum(weights * flat.size, 1.))
+    return {'levels': means, 'sigmas': sigmas, 'weights': weights, 'level errors': errors,
+            'steps': np.diff(means), 'step errors': np.sqrt(errors[1:] ** 2 + errors[:-1] ** 2),
+            'centres': centres, 'counts': counts}
+
+
+# 11.0 - Defining the detection of the features (adsorbates and defects) of a topography scan, in chunks of rows
+def _prominent_peaks(topo_data, labels, local, prominence, regions):
+    """
+    Count the local maxima of each region that are at least the prominence higher than the highest saddle joining them
+    to a higher maximum of the same region. The candidate maxima are visited from the highest down, and each one is
+    kept if the pixels of its region above its height minus the prominence, that are connected to it, hold neither a
+    higher pixel nor a peak that has already been kept. The highest maximum of every region is always a peak.
+
+    :param topo_data: 2D numpy array of the (smoothed) topography data.
+    :param labels: 2D integer array of the region labels of the topography data.
+    :param local: Boolean 2D array of the candidate local maxima.
+    :param prominence: Smallest height of a peak above the saddle to any higher peak.
+    :param regions: 1D array of the labels of the regions whose peaks are counted.
+    :return: 1D integer array of the number of peaks of each region.
+    """
+    slices = ndimage.find_objects(labels)
+    peaks = np.ones(len(regions), dtype=int)
+    for i, label in enumerate(regions):
+        window = slices[label - 1]
+        region = labels[window] == label
+        z = topo_data[window]
+        rows, cols = np.nonzero(local[window] & region)
+        if len(rows) < 2:
+            continue
+        order = np.argsort(-z[rows, cols], kind='stable')
+        kept = np.zeros(region.shape, dtype=bool)
+        for r, c in zip(rows[order], cols[order]):
+            # - The pixels that can be reached from the candidate without descending by more than the prominence
+            basin, _ = ndimage.label(region & (z > z[r, c] - prominence))
+            basin = basin == basin[r, c]
+            if not (np.any(z[basin] > z[r, c]) or np.any(kept[basin])):
+                kept[r, c] = True
+        peaks[i] = max(np.count_nonzero(kept), 1)
+    return peaks
+
+
+def detect_features(topo_data, info, threshold=None, radius=2, min_area=4, chunk=1024, margin=64, smooth=1.,
+                    prominence=None):
+    """
+    Detect the features that protrude above the background of a leveled topography scan. The pixels above the
+    threshold are labelled into connected regions, each of which is a feature, and the peaks within each region are
+    counted, so that touching features are flagged by more than one peak. The peaks are the local maxima (from a
+    maximum filter) of the Gaussian smoothed heights that are at least the prominence above the saddle to any higher
+    peak, so that the noise on a flat-topped feature does not split it into several peaks. The image is
+    processed in chunks of rows, each with a margin of rows on either side, and a feature is kept by the chunk whose
+    core holds its highest pixel, so that each feature is found exactly once and large images are never labelled
+    whole. Features that extend further than the margin beyond their chunk are truncated.
+
+    :param topo_data: 2D numpy array of the leveled topography data.
+    :param info: The info dictionary of the scan direction.
+    :param threshold: Height above which a pixel belongs to a feature (if None, the median height plus three robust
+    standard deviations, from the inter-quartile range, is used).
+    :param radius: Radius (in pixels) of the maximum filter that finds the candidate peaks within each feature.
+    :param min_area: Smallest number of pixels of a feature.
+    :param chunk: Number of rows of each chunk.
+    :param margin: Number of rows on either side of each chunk that are labelled with it.
+    :param smooth: Standard deviation (in pixels) of the Gaussian smoothing applied before the peaks are found.
+    :param prominence: Smallest height of a peak above the saddle to any higher peak of the same feature (if None, one
+    robust standard deviation of the heights is used).
+    :return: Dictionary of the 1D arrays of the features; the centroid ('x', 'y') and the highest pixel ('peak x',
+    'peak y') in nm, the height of the highest pixel above the median ('height'), the area in nm^2 ('area') and the
+    number of peaks ('peaks'), as well as the 'threshold' and the median height ('background').
+    """
+    topo_data = np.asarray(topo_data, dtype=float)
+    rows, cols = topo_data.shape
+    # The background and the threshold, read from the height histogram
+    q1, background, q3 = HeightHistogram(topo_data).percentile([25, 50, 75])
+    if threshold is None:
+        threshold = background + 3. * (q3 - q1) / 1.349
+    if prominence is None:
+        prominence = (q3 - q1) / 1.349
+    results = list()
+    for r0 in range(0, rows, chunk):
+        r1 = min(r0 + chunk, rows)
+        e0, e1 = max(r0 - margin, 0), min(r1 + margin, rows)
+        block = topo_data[e0:e1]
+        mask = block > threshold
+        labels, count = ndimage.label(mask)
+        if count == 0:
+            continue
+        flat_labels = labels.ravel()
+        # - The area, highest pixel and height-weighted centroid of every region
+        area = np.bincount(flat_labels, minlength=count + 1)[1:]
+        peak_pos = np.array(ndimage.maximum_position(block, labels, np.arange(1, count + 1)), dtype=np.intp)
+        weight = np.where(mask, block - threshold, 0.).ravel()
+        row_index = np.repeat(np.arange(e0, e1, dtype=float), cols)
+        col_index = np.tile(np.arange(cols, dtype=float), e1 - e0)
+        total = np.maximum(np.bincount(flat_labels, weight, count + 1)[1:], np.finfo(float).tiny)
+        centre_row = np.bincount(flat_labels, weight * row_index, count + 1)[1:] / total
+        centre_col = np.bincount(flat_labels, weight * col_index, count + 1)[1:] / total
+        # - Keeping the regions whose highest pixel lies within the core of this chunk
+        keep = (peak_pos[:, 0] + e0 >= r0) & (peak_pos[:, 0] + e0 < r1) & (area >= min_area)
+        # - The number of prominent local maxima of the smoothed heights within every kept region
+        smooth_block = ndimage.gaussian_filter(block, smooth, mode='nearest') if smooth else block
+        local = (ndimage.maximum_filter(smooth_block, size=2 * radius + 1, mode='nearest') == smooth_block) & mask
+        peaks = _prominent_peaks(smooth_block, labels, local, prominence, np.flatnonzero(keep) + 1)
+        results.append((centre_col[keep], centre_row[keep], peak_pos[keep, 1], peak_pos[keep, 0] + e0,
+                        block[peak_pos[keep, 0], peak_pos[keep, 1]], area[keep], peaks))
+    columns = [np.concatenate(values) for values in zip(*results)] if len(results) > 0 else [np.zeros(0)] * 7
+    centre_col, centre_row, peak_col, peak_row, peak_z, area, peaks = columns
+    x_min, y_min = info.get('xreal_min', 0), info.get('yreal_min', 0)
+    return {'x': x_min + centre_col * info['xinc'], 'y': y_min + centre_row * info['yinc'],
+            'peak x': x_min + peak_col * info['xinc'], 'peak y': y_min + peak_row * info['yinc'],
+            'height': peak_z - background, 'area': area * info['xinc'] * info['yinc'], 'peaks': peaks.astype(int),
+            'threshold': threshold, 'background': background}
+
+
+# 12.0 - Defining the per-line registration of the scan directions, which corrects the creep and hysteresis of each line
+def row_shifts(frames, reference, max_shift=None, window=True, smooth=9):
+    """
+    Estimate the lateral shift of every line of the frames that registers it onto the same line of the reference, from
+    the peak of the 1D cross-correlation of the two lines. All the lines are transformed and correlated together, and
+    the lines are zero-padded to twice their length, so that the correlation does not wrap around. As the creep and
+    hysteresis of the piezo vary slowly between the lines, a running median over the lines rejects the shifts of the
+    lines that hold too little contrast to be registered on their own.
+
+    :param frames: Numpy array of the frames, of shape (..., rows, columns), such as the backward scan directions.
+    :param reference: Numpy array of the reference frames, which is broadcast against the frames.
+    :param max_shift: Largest shift (in pixels) that is searched for (if None, an eighth of the line length is used).
+    :param window: If True, a Hann window is applied to each line before the transform.
+    :param smooth: Number of lines of the running median of the shifts (if None, the raw shifts are returned).
+    :return: Numpy array of the x-shift of every line, in pixels, of shape (..., rows).
+    """
+    frames, reference = np.broadcast_arrays(np.asarray(frames, dtype=float), np.asarray(reference, dtype=float))
+    cols = frames.shape[-1]
+    if max_shift is None:
+        max_shift = max(cols // 8, 1)
+    max_shift = int(min(max_shift, cols - 1))
+    taper = np.hanning(cols) if window else 1.
+    spectra = [np.fft.rfft((lines - np.mean(lines, axis=-1, keepdims=True)) * taper, n=2 * cols, axis=-1)
+               for lines in (frames, reference)]
+    corr = np.fft.irfft(spectra[1] * np.conj(spectra[0]), n=2 * cols, axis=-1)
+    # - The correlation over the lags from -max_shift to +max_shift, with the sub-pixel vertex of its peak
+    corr = np.concatenate((corr[..., -max_shift:], corr[..., :max_shift + 1]), axis=-1)
+    peak = np.argmax(corr, axis=-1)[..., np.newaxis]
+    inner = np.clip(peak, 1, 2 * max_shift - 1)
+    offset = _parabolic_offset(np.take_along_axis(corr, inner - 1, axis=-1), np.take_along_axis(corr, inner, axis=-1),
+                               np.take_along_axis(corr, inner + 1, axis=-1))
+    shifts = (np.where(peak == inner, inner + offset, peak) - max_shift)[..., 0]
+    if smooth is not None and smooth > 1:
+        size = (1,) * (shifts.ndim - 1) + (int(smooth),)
+        shifts = ndimage.median_filter(shifts, size=size, mode='nearest')
+    return shifts
+
+
+def shift_rows(topo_data, shifts, method='linear'):
+    """
+    Shift every line of the frames along the x-axis by its own sub-pixel shift. The linear method interpolates between
+    the two neighbouring pixels of every line at once, with the edge pixels repeated beyond each line, whilst the
+    Fourier method applies the Fourier shift theorem to every line, where the shifted lines wrap around their ends.
+
+    :param topo_data: Numpy array of the frames, of shape (..., rows, columns).
+    :param shifts: Numpy array of the x-shift of every line, in pixels, of shape (..., rows), as returned from
+    'row_shifts'.
+    :param method: Method of the sub-pixel shifts; 'linear' or 'fourier'.
+    :return: Numpy array of the shifted frames.
+    """
+    topo_data = np.asarray(topo_data, dtype=float)
+    shifts = np.asarray(shifts, dtype=float)[..., np.newaxis]
+    cols = topo_data.shape[-1]
+    if method == 'linear':
+        src_x = np.arange(cols) - shifts
+        x0 = np.floor(src_x)
+        wx = src_x - x0
+        x0 = x0.astype(int)
+        left = np.take_along_axis(topo_data, np.broadcast_to(np.clip(x0, 0, cols - 1), topo_data.shape), axis=-1)
+        right = np.take_along_axis(topo_data, np.broadcast_to(np.clip(x0 + 1, 0, cols - 1), topo_data.shape), axis=-1)
+        return (1 - wx) * left + wx * right
+    elif method == 'fourier':
+        phase = np.exp(-2j * np.pi * np.fft.rfftfreq(cols) * shifts)
+        return np.fft.irfft(np.fft.rfft(topo_data, axis=-1) * phase, n=cols, axis=-1)
+    raise ValueError("Unknown shift method '{}'; use 'linear' or 'fourier'.".format(method))
@@ -0,0 +1,645 @@
+import os                                   # Standard os module to write and read the tiles of the mosaic store
+import json                                 # Standard json module to write and read the metadata of the mosaic store
+import shutil                               # Standard shutil module to copy a local OpenSeadragon beside the export
+import multiprocessing                      # Standard multiprocessing module to render the deep-zoom tiles in parallel
+import numpy as np                          # Standard numpy module
+import matplotlib                           # Standard matplotlib module to colour the deep-zoom tiles
+import matplotlib.image as mpimg            # Standard matplotlib module to save the deep-zoom tiles
+import flatfile_3 as ff                     # Module that loads in MATRIX flat-files into python class objects
+import topo_funcs as tf                     # Module that holds the vectorised topography image operations
+import topo_pipeline as tp                  # Module that holds the lazy pipeline of the topography operations
+
+# Information about the "topo_mosaic.py" module
+__version__ = "1.00"
+__date__ = "19th October 2026"
+__status__ = "Pending"
+
+__authors__ = "Procopi Constantinou & Tobias Gill"
+__email__ = "procopios.constantinou.16@ucl.ac.uk"
+
+
+# 1.0 - Defining the position of each topography scan within the common real-space frame of the sample
+def scan_origin(scan, scale=1e9):
+    """
+    Return the position of the first pixel (row 0, column 0) of a topography scan, from the position of the centre of
+    the scan that is recorded in the 'offset' of the flat-file.
+
+    :param scan: The DataArray instance of a single scan direction.
+    :param scale: Factor that converts the recorded offset into nm (the MATRIX offsets are recorded in metres).
+    :return: Array [x, y] of the position of the first pixel, in nm.
+    """
+    offset = scan.info.get('offset') or [(0., 0.)]
+    centre = scale * np.asarray(offset[0], dtype=float)
+    rows, cols = np.shape(scan.data)
+    return centre - 0.5 * np.array([scan.info['xinc'] * (cols - 1), scan.info['yinc'] * (rows - 1)])
+
+
+def grid_shape(x0, x1, y0, y1, pixel_size):
+    """
+    Return the shape of the regular grid whose first and last pixel centres lie on the given positions. The number of
+    pixel steps is rounded, so that an extent of a whole number of pixels never gains an extra row or column from the
+    floating point error of the positions.
+
+    :param x0: Position of the first column, in nm.
+    :param x1: Position of the last column, in nm.
+    :param y0: Position of the first row, in nm.
+    :param y1: Position of the last row, in nm.
+    :param pixel_size: Size of the pixels, in nm.
+    :return: Tuple of the (rows, columns) of the grid.
+    """
+    return int(round((y1 - y0) / pixel_size)) + 1, int(round((x1 - x0) / pixel_size)) + 1
+
+
+# 2.0 - Defining the class object that places many leveled topography scans in a common frame and stitches them
+class Mosaic(object):
+    def __init__(self, scans, pixel_size=None, scale=1e9):
+        """
+        Defines the initialisation of the class object.
+        scans:      List of the DataArray instances of the (leveled) topography scans.
+        pixel_size: Size (in nm) of the pixels of the mosaic (if None, the finest pixel size of the scans is used).
+        scale:      Factor that converts the recorded offsets of the scans into nm.
+        """
+        self.data = [np.asarray(scan.data, dtype=float) for scan in scans]      # List of the 2D topography data
+        # - Array of the (x, y) pixel sizes and (x, y) positions of the first pixel of each scan, in nm
+        self.inc = np.array([[scan.info['xinc'], scan.info['yinc']] for scan in scans], dtype=float)
+        self.origin = np.array([scan_origin(scan, scale) for scan in scans])
+        self.z_offset = np.zeros(len(scans))        # Height offset subtracted from each scan
+        if pixel_size is None:
+            pixel_size = float(np.amin(self.inc))
+        self.pixel_size = pixel_size                # Size of the pixels of the mosaic, in nm
+
+    def extent(self, i=None):
+        """
+        Return the real-space extent of a scan, or of the whole mosaic, from the centres of their outer pixels.
+
+        :param i: Integer index of the scan (if None, the extent of the whole mosaic is returned).
+        :return: List [x0, x1, y0, y1] of the extent, in nm.
+        """
+        if i is None:
+            extents = np.array([self.extent(j) for j in range(len(self.data))])
+            return [np.amin(extents[:, 0]), np.amax(extents[:, 1]), np.amin(extents[:, 2]), np.amax(extents[:, 3])]
+        rows, cols = np.shape(self.data[i])
+        x0, y0 = self.origin[i]
+        return [x0, x0 + self.inc[i, 0] * (cols - 1), y0, y0 + self.inc[i, 1] * (rows - 1)]
+
+    def sample(self, i, x0, y0, shape, pixel_size=None, order=1):
+        """
+        Sample a scan over a regular grid of the mosaic, with a weight that falls linearly to zero at the edges of the
+        scan so that the overlapping scans are feathered into each other.
+
+        :param i: Integer index of the scan.
+        :param x0: Position of the first column of the grid, in nm.
+        :param y0: Position of the first row of the grid, in nm.
+        :param shape: The (rows, columns) of the grid.
+        :param pixel_size: Size of the pixels of the grid, in nm (if None, the mosaic pixel size is used).
+        :param order: Order of the spline interpolation.
+        :return: The 2D arrays of the sampled heights and of their weights, which are zero outside of the scan.
+        """
+        if pixel_size is None:
+            pixel_size = self.pixel_size
+        # The grid pixels, in the pixel co-ordinates of the scan
+        scale = pixel_size / self.inc[i]
+        offset = (np.array([x0, y0]) - self.origin[i]) / self.inc[i]
+        cols = offset[0] + scale[0] * np.arange(shape[1])
+        rows = offset[1] + scale[1] * np.arange(shape[0])
+        # The weights, from the distance of each grid pixel to the nearest edge of the scan
+        n_rows, n_cols = np.shape(self.data[i])
+        wx = np.clip(np.minimum(cols, n_cols - 1 - cols) + 1, 0, None) / (0.5 * n_cols)
+        wy = np.clip(np.minimum(rows, n_rows - 1 - rows) + 1, 0, None) / (0.5 * n_rows)
+        wx[(cols < 0) | (cols > n_cols - 1)] = 0
+        wy[(rows < 0) | (rows > n_rows - 1)] = 0
+        weight = np.outer(wy, wx)
+        if not np.any(weight):
+            return np.zeros(shape), weight
+        heights = tf.affine_resample(self.data[i], np.diag(scale[::-1]), offset[::-1], shape, order=order)
+        return heights - self.z_offset[i], weight
+
+    def overlaps(self, min_pixels=16):
+        """
+        Return all the pairs of scans that overlap by at least the given number of mosaic pixels along both axes.
+
+        :param min_pixels: Minimum size of the overlap, in mosaic pixels.
+        :return: List of the tuples (i, j, [x0, x1, y0, y1]) of the overlapping scans and their overlap, in nm.
+        """
+        pairs = list()
+        extents = [self.extent(i) for i in range(len(self.data))]
+        for i in range(len(self.data)):
+            for j in range(i + 1, len(self.data)):
+                x0, x1 = max(extents[i][0], extents[j][0]), min(extents[i][1], extents[j][1])
+                y0, y1 = max(extents[i][2], extents[j][2]), min(extents[i][3], extents[j][3])
+                if min(x1 - x0, y1 - y0) >= min_pixels * self.pixel_size:
+                    pairs.append((i, j, [x0, x1, y0, y1]))
+        return pairs
+
+    def refine(self, max_shift=None, min_pixels=16, iterations=3):
+        """
+        Refine the positions and height offsets of the scans from the cross-correlation of every overlap. The relative
+        shift and height difference of each overlapping pair is measured, and the corrections of all the scans are
+        then found together by a least-squares fit, with the first scan held fixed, so the errors are spread over the
+        whole mosaic rather than accumulated along a chain of scans. A shift that is large compared to the overlap is
+        underestimated by the window of the correlation, so the refinement is repeated over the corrected overlaps.
+
+        :param max_shift: Largest shift (in nm) that is accepted from an overlap (if None, half of the overlap).
+        :param min_pixels: Minimum size of an overlap, in mosaic pixels, for it to be used.
+        :param iterations: Number of times that the overlaps are re-measured.
+        :return: The total (x, y) position corrections of each scan, in nm.
+        """
+        num = len(self.data)
+        total = np.zeros((num, 2))
+        for _ in range(iterations):
+            rows_xy, rows_z, meas_xy, meas_z = list(), list(), list(), list()
+            for i, j, (x0, x1, y0, y1) in self.overlaps(min_pixels):
+                shape = (int((y1 - y0) / self.pixel_size) + 1, int((x1 - x0) / self.pixel_size) + 1)
+                ref, _ = self.sample(i, x0, y0, shape)
+                moving, _ = self.sample(j, x0, y0, shape)
+                # - The shift that registers scan j onto scan i moves the origin of scan j by the same amount
+                shift = tf.phase_correlation(moving, reference=ref)
+                dy, dx = self.pixel_size * shift[0]
+                limit = 0.5 * min(x1 - x0, y1 - y0) if max_shift is None else max_shift
+                if np.hypot(dx, dy) > limit:
+                    continue
+                row = np.zeros(num)
+                row[j], row[i] = 1, -1
+                rows_xy.append(row)
+                meas_xy.append([dx, dy])
+                # - The height difference of the overlap, once the shift is applied
+                moving = tf.apply_shifts(moving, shift, crop=True, method='linear')[0]
+                wx0, wx1, wy0, wy1 = tf.overlap_window(shift, shape)
+                rows_z.append(row)
+                meas_z.append(np.median(moving - ref[wy0:wy1, wx0:wx1]))
+            if len(rows_xy) == 0:
+                break
+            # Solving for the corrections of all the scans, with the first scan held fixed
+            anchor = np.zeros(num)
+            anchor[0] = 1
+            corrections = np.linalg.lstsq(np.vstack(rows_xy + [anchor]), np.vstack(meas_xy + [[0, 0]]),
+                                          rcond=None)[0]
+            z_offsets = np.linalg.lstsq(np.vstack(rows_z + [anchor]), np.array(meas_z + [0]), rcond=None)[0]
+            self.origin += corrections
+            self.z_offset += z_offsets
+            total += corrections
+        return total
+
+    def render(self, x0, x1, y0, y1, pixel_size=None):
+        """
+        Render an area of the mosaic, where the overlapping scans are blended by their feathered weights.
+
+        :param x0: Position of the first column, in nm.
+        :param x1: Position of the last column, in nm.
+        :param y0: Position of the first row, in nm.
+        :param y1: Position of the last row, in nm.
+        :param pixel_size: Size of the rendered pixels, in nm (if None, the mosaic pixel size is used).
+        :return: 2D array of the rendered area, which is NaN where there is no scan.
+        """
+        if pixel_size is None:
+            pixel_size = self.pixel_size
+        shape = grid_shape(x0, x1, y0, y1, pixel_size)
+        total, weights = np.zeros(shape), np.zeros(shape)
+        for i in range(len(self.data)):
+            ex0, ex1, ey0, ey1 = self.extent(i)
+            if ex1 < x0 or ex0 > x1 or ey1 < y0 or ey0 > y1:
+                continue
+            heights, weight = self.sample(i, x0, y0, shape, pixel_size)
+            total += heights * weight
+            weights += weight
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(weights > 0, total / weights, np.nan)
+
+    def save(self, path, tile_size=256):
+        """
+        Write the mosaic to a tiled store, which holds the full resolution mosaic and a pyramid of mean-pooled levels,
+        each cut into tiles. Only a single tile of the full resolution mosaic is ever rendered at a time, and each
+        coarser tile is made from the four tiles below it, so the mosaic never has to fit into memory.
+
+        :param path: Directory of the mosaic store.
+        :param tile_size: Size (in pixels) of the square tiles.
+        :return: The MosaicStore instance of the written store.
+        """
+        x0, x1, y0, y1 = self.extent()
+        shape = grid_shape(x0, x1, y0, y1, self.pixel_size)
+        levels = list()
+        level = 0
+        while True:
+            grid = (int(np.ceil(shape[0] / tile_size)), int(np.ceil(shape[1] / tile_size)))
+            os.makedirs(os.path.join(path, str(level)), exist_ok=True)
+            for ty in range(grid[0]):
+                for tx in range(grid[1]):
+                    if level == 0:
+                        ps = self.pixel_size
+                        tile = self.render(x0 + tx * tile_size * ps, x0 + ((tx + 1) * tile_size - 1) * ps,
+                                           y0 + ty * tile_size * ps, y0 + ((ty + 1) * tile_size - 1) * ps)
+                    else:
+                        tile = MosaicStore._pool_children(path, level - 1, ty, tx, tile_size)
+                    # - Empty tiles are not written, and any tile left from an earlier mosaic is removed
+                    tile_path = os.path.join(path, str(level), '{}_{}.npy'.format(ty, tx))
+                    if np.all(np.isnan(tile)):
+                        if os.path.exists(tile_path):
+                            os.remove(tile_path)
+                        continue
+                    np.save(tile_path, tile.astype(np.float32))
+            levels.append({'shape': list(shape), 'grid': list(grid), 'pixel size': self.pixel_size * 2 ** level})
+            if max(grid) == 1:
+                break
+            shape = (int(np.ceil(shape[0] / 2)), int(np.ceil(shape[1] / 2)))
+            level += 1
+        with open(os.path.join(path, 'mosaic.json'), 'w') as meta_file:
+            json.dump({'origin': [x0, y0], 'tile size': tile_size, 'levels': levels}, meta_file, indent=4)
+        return MosaicStore(path)
+
+
+def mosaic_from_files(file_paths, scan_dir=0, image_props=None, pixel_size=None, refine=True):
+    """
+    Build the mosaic of the topography flat-files, where each scan is leveled by the level operation of a recipe.
+
+    :param file_paths: List of the paths of the topography flat-files.
+    :param scan_dir: Integer of the scan direction that is used.
+    :param image_props: Dictionary of the image properties, as saved by 'STT.save_recipe' (if None, the scans are
+    line-wise leveled). Only the leveling is used, since the image operations would move the scans within the frame.
+    :param pixel_size: Size (in nm) of the pixels of the mosaic (if None, the finest pixel size of the scans is used).
+    :param refine: If True, the positions and height offsets of the scans are refined from their overlaps.
+    :return: The Mosaic instance.
+    """
+    if image_props is None:
+        recipe = tp.TopoPipeline().level('Line-wise')
+    else:
+        recipe = tp.recipe_from_props(image_props).leveling()
+    scans = [recipe.evaluate(tf.TopoFile(ff.load(file_path)), [scan_dir])[scan_dir] for file_path in file_paths]
+    mosaic = Mosaic(scans, pixel_size)
+    if refine:
+        mosaic.refine()
+    return mosaic
+
+
+# 3.0 - Defining the class object that reads the areas of a tiled mosaic store at any zoom level
+class MosaicStore(object):
+    def __init__(self, path):
+        """
+        Defines the initialisation of the class object.
+        path:       Directory of the mosaic store.
+        """
+        self.path = path                            # Directory of the mosaic store
+        with open(os.path.join(path, 'mosaic.json'), 'r') as meta_file:
+            meta = json.load(meta_file)
+        self.origin = np.array(meta['origin'])      # Position (x, y) of the first pixel of the mosaic, in nm
+        self.tile_size = meta['tile size']          # Size (in pixels) of the square tiles
+        self.levels = meta['levels']                # List of the shape, tile grid and pixel size of each level
+
+    @staticmethod
+    def _pool_children(path, level, ty, tx, tile_size):
+        """
+        Make a tile of the next coarser level, by mean-pooling the four tiles of the given level that it covers.
+        """
+        block = np.full((2 * tile_size, 2 * tile_size), np.nan)
+        for dy in range(2):
+            for dx in range(2):
+                file_path = os.path.join(path, str(level), '{}_{}.npy'.format(2 * ty + dy, 2 * tx + dx))
+                if os.path.exists(file_path):
+                    child = np.load(file_path)
+                    block[dy * tile_size:dy * tile_size + child.shape[0],
+                          dx * tile_size:dx * tile_size + child.shape[1]] = child
+        block = block.reshape(tile_size, 2, tile_size, 2)
+        count = np.sum(~np.isnan(block), axis=(1, 3))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(count > 0, np.nansum(block, axis=(1, 3)) / count, np.nan)
+
+    def level_for(self, x0, x1, y0, y1, shape):
+        """
+        Return the coarsest level that still has at least as many pixels over the area as the display.
+
+        :param x0: Position of the left edge of the area, in nm.
+        :param x1: Position of the right edge of the area, in nm.
+        :param y0: Position of the bottom edge of the area, in nm.
+        :param y1: Position of the top edge of the area, in nm.
+        :param shape: The (rows, columns) of screen pixels over which the area is displayed.
+        :return: Integer of the level.
+        """
+        for level in reversed(range(len(self.levels))):
+            pixel_size = self.levels[level]['pixel size']
+            if (y1 - y0) / pixel_size >= shape[0] and (x1 - x0) / pixel_size >= shape[1]:
+                return level
+        return 0
+
+    def read(self, x0, x1, y0, y1, level=0):
+        """
+        Read an area of the mosaic at the given level, where only the tiles that cover the area are loaded.
+
+        :param x0: Position of the left edge of the area, in nm.
+        :param x1: Position of the right edge of the area, in nm.
+        :param y0: Position of the bottom edge of the area, in nm.
+        :param y1: Position of the top edge of the area, in nm.
+        :param level: Integer of the level (0 is the full resolution).
+        :return: 2D array of the area, which is NaN where there is no scan.
+        """
+        pixel_size = self.levels[level]['pixel size']
+        rows, cols = self.levels[level]['shape']
+        c0 = int(np.clip(np.floor((x0 - self.origin[0]) / pixel_size), 0, cols))
+        c1 = int(np.clip(np.ceil((x1 - self.origin[0]) / pixel_size) + 1, c0, cols))
+        r0 = int(np.clip(np.floor((y0 - self.origin[1]) / pixel_size), 0, rows))
+        r1 = int(np.clip(np.ceil((y1 - self.origin[1]) / pixel_size) + 1, r0, rows))
+        return self.read_pixels(level, r0, r1, c0, c1)
+
+    def tiles(self, level=0):
+        """
+        Iterate over the tiles of a level that hold any scan, where each tile is only loaded when it is reached.
+
+        :param level: Integer of the level (0 is the full resolution).
+        :return: Generator of the 2D arrays of the tiles, which are NaN where there is no scan.
+        """
+        rows, cols = self.levels[level]['grid']
+        for ty in range(rows):
+            for tx in range(cols):
+                file_path = os.path.join(self.path, str(level), '{}_{}.npy'.format(ty, tx))
+                if os.path.exists(file_path):
+                    yield np.load(file_path, mmap_mode='r')
+
+    def read_pixels(self, level, r0, r1, c0, c1):
+        """
+        Read the block of pixels [r0:r1, c0:c1] of a level, where only the tiles that cover the block are loaded.
+
+        :param level: Integer of the level (0 is the full resolution).
+        :param r0: First row of the block.
+        :param r1: Row after the last row of the block.
+        :param c0: First column of the block.
+        :param c1: Column after the last column of the block.
+        :return: 2D array of the block, which is NaN where there is no scan.
+        """
+        area = np.full((r1 - r0, c1 - c0), np.nan, dtype=np.float32)
+        ts = self.tile_size
+        for ty in range(r0 // ts, (r1 - 1) // ts + 1 if r1 > r0 else r0 // ts):
+            for tx in range(c0 // ts, (c1 - 1) // ts + 1 if c1 > c0 else c0 // ts):
+                file_path = os.path.join(self.path, str(level), '{}_{}.npy'.format(ty, tx))
+                if not os.path.exists(file_path):
+                    continue
+                tile = np.load(file_path, mmap_mode='r')
+                # - The part of the tile that falls within the area
+                tr0, tc0 = max(r0 - ty * ts, 0), max(c0 - tx * ts, 0)
+                tr1, tc1 = min(r1 - ty * ts, tile.shape[0]), min(c1 - tx * ts, tile.shape[1])
+                if tr1 <= tr0 or tc1 <= tc0:
+                    continue
+                area[ty * ts + tr0 - r0:ty * ts + tr1 - r0, tx * ts + tc0 - c0:tx * ts + tc1 - c0] = \
+                    tile[tr0:tr1, tc0:tc1]
+        return area
+
+
+# 4.0 - Defining the deep-zoom export of a topography scan or a mosaic store, as a pyramid of coloured image tiles
+# - Descriptor of the deep-zoom images, with the tile size, overlap, format and full resolution of each image
+DEEPZOOM_DESCRIPTOR = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                       '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" TileSize="{}" Overlap="{}" '
+                       'Format="{}"><Size Width="{}" Height="{}"/></Image>\n')
+# - Viewer page of the deep-zoom images, which is self-contained so that it is browsed offline and from the disk; the
+# tiles are loaded as images, and the levels coarser than the one on screen are drawn beneath it until it is loaded
+DEEPZOOM_VIEWER = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{name}</title>
+<style>html, body {{ width: 100%; height: 100%; margin: 0; overflow: hidden; background: #000; }}
+canvas {{ display: block; cursor: grab; }}</style>
+</head>
+<body>
+<canvas id="viewer"></canvas>
+<script>
+var image = {{url: "{name}_files/", format: "{fmt}", tileSize: {tile_size}, overlap: {overlap}, width: {width},
+              height: {height}, maxLevel: {max_level}}};
+var canvas = document.getElementById("viewer"), context = canvas.getContext("2d");
+var tiles = {{}}, view = {{x: 0, y: 0, scale: 1}}, pending = false, drag = null;
+function redraw() {{
+  if (!pending) {{
+    pending = true;
+    requestAnimationFrame(function () {{ pending = false; draw(); }});
+  }}
+}}
+function tile(level, col, row) {{
+  var key = level + "/" + col + "_" + row;
+  if (!(key in tiles)) {{
+    var img = new Image();
+    img.onload = redraw;
+    img.onerror = function () {{ img.missing = true; }};
+    img.src = image.url + key + "." + image.format;
+    tiles[key] = img;
+  }}
+  return tiles[key];
+}}
+function drawLevel(level) {{
+  var factor = Math.pow(2, level - image.maxLevel), size = image.tileSize, scale = view.scale / factor;
+  var cols = Math.ceil(Math.ceil(image.width * factor) / size);
+  var rows = Math.ceil(Math.ceil(image.height * factor) / size);
+  var x0 = view.x * factor, x1 = (view.x + canvas.width / view.scale) * factor;
+  var y0 = view.y * factor, y1 = (view.y + canvas.height / view.scale) * factor;
+  for (var row = Math.max(Math.floor(y0 / size), 0); row < Math.min(Math.floor(y1 / size) + 1, rows); row++) {{
+    for (var col = Math.max(Math.floor(x0 / size), 0); col < Math.min(Math.floor(x1 / size) + 1, cols); col++) {{
+      var img = tile(level, col, row);
+      if (img.complete && !img.missing && img.naturalWidth > 0) {{
+        var left = col * size - (col > 0 ? image.overlap : 0), top = row * size - (row > 0 ? image.overlap : 0);
+        context.drawImage(img, (left / factor - view.x) * view.scale, (top / factor - view.y) * view.scale,
+                          img.naturalWidth * scale, img.naturalHeight * scale);
+      }}
+    }}
+  }}
+}}
+function draw() {{
+  context.clearRect(0, 0, canvas.width, canvas.height);
+  context.imageSmoothingEnabled = view.scale < 1;
+  var level = Math.min(Math.max(image.maxLevel + Math.ceil(Math.log2(view.scale)), 0), image.maxLevel);
+  for (var coarser = Math.max(level - 3, 0); coarser <= level; coarser++) drawLevel(coarser);
+}}
+function zoom(factor, px, py) {{
+  var x = view.x + px / view.scale, y = view.y + py / view.scale;
+  view.scale *= factor;
+  view.x = x - px / view.scale;
+  view.y = y - py / view.scale;
+  redraw();
+}}
+function home() {{
+  canvas.width = window.innerWidth;
+  canvas.height = window.innerHeight;
+  view.scale = Math.min(canvas.width / image.width, canvas.height / image.height);
+  view.x = (image.width - canvas.width / view.scale) / 2;
+  view.y = (image.height - canvas.height / view.scale) / 2;
+  redraw();
+}}
+canvas.addEventListener("wheel", function (event) {{
+  event.preventDefault();
+  zoom(Math.pow(2, -event.deltaY / 500), event.offsetX, event.offsetY);
+}}, {{passive: false}});
+canvas.addEventListener("dblclick", function (event) {{ zoom(2, event.offsetX, event.offsetY); }});
+canvas.addEventListener("pointerdown", function (event) {{
+  drag = [event.clientX, event.clientY];
+  canvas.setPointerCapture(event.pointerId);
+}});
+canvas.addEventListener("pointermove", function (event) {{
+  if (drag) {{
+    view.x -= (event.clientX - drag[0]) / view.scale;
+    view.y -= (event.clientY - drag[1]) / view.scale;
+    drag = [event.clientX, event.clientY];
+    redraw();
+  }}
+}});
+canvas.addEventListener("pointerup", function () {{ drag = null; }});
+window.addEventListener("resize", function () {{
+  canvas.width = window.innerWidth;
+  canvas.height = window.innerHeight;
+  redraw();
+}});
+window.addEventListener("keydown", function (event) {{ if (event.key === "h") home(); }});
+home();
+</script>
+</body>
+</html>
+"""
+# - Viewer page of the deep-zoom images with OpenSeadragon, where the descriptor is given inline so that the page is
+# also browsed from the disk, and the script is either a local copy or loaded from a URL
+OPENSEADRAGON_VIEWER = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{name}</title>
+<script src="{prefix}openseadragon.min.js"></script>
+<style>html, body, #viewer {{ width: 100%; height: 100%; margin: 0; background: #000; }}</style>
+</head>
+<body>
+<div id="viewer"></div>
+<script>
+OpenSeadragon({{id: "viewer", showNavigator: true, prefixUrl: "{prefix}images/", tileSources: {{Image: {{
+    xmlns: "http://schemas.microsoft.com/deepzoom/2008", Url: "{name}_files/", Format: "{fmt}",
+    Overlap: "{overlap}", TileSize: "{tile_size}", Size: {{Width: "{width}", Height: "{height}"}}}}}}}});
+</script>
+</body>
+</html>
+"""
+OPENSEADRAGON = "https://cdn.jsdelivr.net/npm/openseadragon@4.1/build/openseadragon/"
+
+# - The mosaic stores that have been opened by each worker of the process pool
+_stores = dict()
+
+
+def _nan_pool(topo_data):
+    """
+    Downsample the data by a factor of two along both axes, by the mean of the pixels of each 2x2 block that are not
+    NaN, where an odd number of rows or columns is padded by repeating the last row or column (see 'tf.mean_pool').
+    """
+    rows, cols = np.shape(topo_data)
+    topo_data = np.pad(topo_data, ((0, rows % 2), (0, cols % 2)), mode='edge')
+    block = topo_data.reshape(topo_data.shape[0] // 2, 2, topo_data.shape[1] // 2, 2)
+    count = np.sum(~np.isnan(block), axis=(1, 3))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 0, np.nansum(block, axis=(1, 3)) / count, np.nan)
+
+
+def _render_tile(task):
+    """
+    Colour a single deep-zoom tile and save it, where the pixels of the tile are either given or read from a mosaic
+    store. The rows are flipped, as the tiles run from the top of the image whilst the scans run from the bottom.
+
+    :param task: Tuple (tile_path, pixels, vmin, vmax, cmap, fmt), where pixels is the 2D array of the tile or the tuple
+    (store_path, level, r0, r1, c0, c1) of the block of a mosaic store.
+    :return: Boolean as to whether the tile was written, as tiles with no scan are skipped.
+    """
+    tile_path, pixels, vmin, vmax, cmap, fmt = task
+    if isinstance(pixels, tuple):
+        store_path, level, r0, r1, c0, c1 = pixels
+        if store_path not in _stores:
+            _stores[store_path] = MosaicStore(store_path)
+        pixels = _stores[store_path].read_pixels(level, r0, r1, c0, c1)
+    if np.all(np.isnan(pixels)):
+        return False
+    # - The pixels that are NaN are transparent, as the colour of the masked values of a colormap
+    norm = np.clip((np.asarray(pixels[::-1], dtype=float) - vmin) / max(vmax - vmin, 1e-300), 0., 1.)
+    rgba = matplotlib.colormaps[cmap](np.ma.masked_invalid(norm), bytes=True)
+    mpimg.imsave(tile_path, rgba, format=fmt)
+    return True
+
+
+def export_deepzoom(source, path, tile_size=254, overlap=1, fmt='png', cmap='hot', vmin=None, vmax=None,
+                    workers=None, viewer='builtin'):
+    """
+    Export a topography scan or a mosaic store as a deep-zoom image; a descriptor (path.dzi) and a folder of the tiles
+    of every level (path_files), from a single pixel up to the full resolution, which can be browsed with a static
+    viewer (such as OpenSeadragon) without the image ever being loaded whole. The levels that are already made, the
+    image pyramid of a scan or the levels of a mosaic store, are re-used, and only the levels that are coarser than
+    these are pooled. The tiles of every level are coloured and saved by a pool of processes, where the tiles of a
+    mosaic store are read by the workers themselves, so that a gigapixel mosaic never has to fit into memory.
+
+    :param source: The DataArray instance of a scan direction, a 2D numpy array, a MosaicStore instance or the
+    directory of a mosaic store.
+    :param path: Path of the deep-zoom image, without the extension.
+    :param tile_size: Size (in pixels) of the square tiles, without their overlap.
+    :param overlap: Number of pixels by which each tile overlaps its neighbours.
+    :param fmt: Image format of the tiles; 'png' or 'webp'.
+    :param cmap: Matplotlib colormap name.
+    :param vmin: Height at the bottom of the colour scale (if None, the auto-contrast of the heights is used).
+    :param vmax: Height at the top of the colour scale (if None, the auto-contrast of the heights is used).
+    :param workers: Number of worker processes (if None, the number of CPUs is used, and if 1, no pool is used).
+    :param viewer: Viewer page path.html; 'builtin' for the self-contained page, which needs neither a network nor any
+    other file, or the folder (or URL, such as OPENSEADRAGON) of the OpenSeadragon script, where a local folder is
+    copied beside the export (if None, no viewer page is written).
+    :return: Path of the descriptor of the deep-zoom image.
+    """
+    if isinstance(source, str):
+        source = MosaicStore(source)
+    # The levels that are already made, from the full resolution downwards, where each level of a mosaic store is
+    # held by its index and is only read by the workers
+    if isinstance(source, MosaicStore):
+        levels = list(range(len(source.levels)))
+        shapes = [tuple(level['shape']) for level in source.levels]
+        coarsest = source.read_pixels(levels[-1], 0, shapes[-1][0], 0, shapes[-1][1]).astype(float)
+        # - The histogram is made from the full resolution tiles, as mean-pooling narrows the spread of the heights
+        histogram = tf.HeightHistogram.from_blocks(source.tiles)
+    else:
+        pyramid = tf.image_pyramid(source) if hasattr(source, 'info') else tf.ImagePyramid(source)
+        levels = list(pyramid.levels)
+        shapes = [np.shape(level) for level in levels]
+        coarsest = np.asarray(levels[-1], dtype=float)
+        histogram = pyramid.histogram()
+    # - The auto-contrast is relative to the minimum height, whilst the tiles are coloured from the absolute heights
+    auto = np.add(histogram.contrast(), histogram.min)
+    vmin = auto[0] if vmin is None else vmin
+    vmax = auto[1] if vmax is None else vmax
+    # - The coarser levels, down to a single pixel, are pooled from the coarsest level that is already made
+    while max(shapes[-1]) > 1:
+        coarsest = _nan_pool(coarsest)
+        levels.append(coarsest)
+        shapes.append(coarsest.shape)
+    # Writing the descriptor, then the tiles of every level (where the deep-zoom level 0 is the single pixel)
+    rows, cols = shapes[0]
+    max_level = len(levels) - 1
+    with open(path + '.dzi', 'w') as dzi_file:
+        dzi_file.write(DEEPZOOM_DESCRIPTOR.format(tile_size, overlap, fmt, cols, rows))
+    tasks = list()
+    for k, (level, (height, width)) in enumerate(zip(levels, shapes)):
+        folder = os.path.join(path + '_files', str(max_level - k))
+        os.makedirs(folder, exist_ok=True)
+        for row in range(int(np.ceil(height / float(tile_size)))):
+            for col in range(int(np.ceil(width / float(tile_size)))):
+                y0, y1 = max(row * tile_size - overlap, 0), min((row + 1) * tile_size + overlap, height)
+                x0, x1 = max(col * tile_size - overlap, 0), min((col + 1) * tile_size + overlap, width)
+                # - The rows of the tile, which run from the top of the image, are counted from its bottom
+                if isinstance(level, np.ndarray):
+                    pixels = level[height - y1:height - y0, x0:x1]
+                else:
+                    pixels = (source.path, level, height - y1, height - y0, x0, x1)
+                tile_path = os.path.join(folder, '{}_{}.{}'.format(col, row, fmt))
+                tasks.append((tile_path, pixels, vmin, vmax, cmap, fmt))
+    if workers == 1:
+        list(map(_render_tile, tasks))
+    else:
+        pool = multiprocessing.Pool(workers)
+        try:
+            list(pool.imap_unordered(_render_tile, tasks, chunksize=16))
+        finally:
+            pool.close()
+            pool.join()
+    if viewer is not None:
+        page = {'name': os.path.basename(path), 'fmt': fmt, 'tile_size': tile_size, 'overlap': overlap,
+                'width': cols, 'height': rows, 'max_level': max_level}
+        if viewer == 'builtin':
+            html = DEEPZOOM_VIEWER.format(**page)
+        else:
+            # - A local copy of OpenSeadragon is copied beside the export, so that the export can be moved whole
+            if os.path.isdir(viewer):
+                shutil.copytree(viewer, os.path.join(os.path.dirname(path), 'openseadragon'), dirs_exist_ok=True)
+                viewer = 'openseadragon'
+            html = OPENSEADRAGON_VIEWER.format(prefix=viewer.rstrip('/') + '/', **page)
+        with open(path + '.html', 'w') as html_file:
+            html_file.write(html)
+    return path + '.dzi'
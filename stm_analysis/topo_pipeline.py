@@ -0,0 +1,472 @@
+import json                                 # Standard json module to save and load the recipe files
+from collections import OrderedDict         # Standard collections module to hold the ordered cache entries
+import numpy as np                          # Standard numpy module
+import topo_funcs as tf                     # Module that holds the vectorised topography image operations
+import kernels as kn                        # Module that holds the pixel-loop kernels, with an optional compiled backend
+import topo_spectrum as ts                  # Module that holds the real Fourier transforms and the Fourier filters
+
+# Information about the "topo_pipeline.py" module
+__version__ = "1.00"
+__date__ = "19th October 2026"
+__status__ = "Pending"
+
+__authors__ = "Procopi Constantinou & Tobias Gill"
+__email__ = "procopios.constantinou.16@ucl.ac.uk"
+
+# Names of the operations that act on the image data, rather than on the geometry of the image
+PIXEL_OPS = ('level', 'scars', 'fourier')
+
+
+# 1.0 - Defining the geometry that accumulates all the adjacent flip, rotate and crop operations into one transform
+class _Geometry(object):
+    def __init__(self, shape):
+        """
+        Defines the initialisation of the accumulated geometry, which starts as the identity transform.
+        shape:      Shape (y_res, x_res) of the image before any of the geometric operations.
+        """
+        self.matrix = np.eye(2)                     # Linear part of the map from output to input pixel co-ordinates
+        self.offset = np.zeros(2)                   # Offset of the map from output to input pixel co-ordinates
+        self.shape = tuple(shape)                   # Shape of the output image
+        self.info_funcs = list()                    # List of the info updates of each operation, with their shapes
+
+    def is_identity(self):
+        """
+        Return True if no geometric operation has been accumulated.
+        """
+        return len(self.info_funcs) == 0
+
+    def flip(self, xflip, yflip):
+        """
+        Accumulate a left-right (x) and/or up-down (y) flip of the image.
+        """
+        flip_matrix = np.diag([-1. if yflip else 1., -1. if xflip else 1.])
+        flip_offset = np.array([self.shape[0] - 1. if yflip else 0., self.shape[1] - 1. if xflip else 0.])
+        self.offset = np.dot(self.matrix, flip_offset) + self.offset
+        self.matrix = np.dot(self.matrix, flip_matrix)
+        self.info_funcs.append((lambda info, shape: {}, self.shape))
+
+    def rotate(self, angle):
+        """
+        Accumulate a rotation of the image by the given angle (in degrees), which enlarges the image to fit.
+        """
+        rot_matrix, rot_offset, self.shape = tf.rotation_matrix(angle, self.shape)
+        self.offset = np.dot(self.matrix, rot_offset) + self.offset
+        self.matrix = np.dot(self.matrix, rot_matrix)
+
+        # Amend the metadata pertinent to the new dimensions
+        def rotated_info(info, shape):
+            return {'xres': shape[1], 'yres': shape[0],
+                    'xreal': info['xinc'] * shape[1], 'yreal': info['yinc'] * shape[0]}
+        self.info_funcs.append((rotated_info, self.shape))
+
+    def crop(self, xmin, xmax, ymin, ymax):
+        """
+        Accumulate a crop of the image, given the x- and y-axis crop co-ordinates in pixel units.
+        """
+        # If the cropping values of the min and max are identical, there is no cropping here
+        if xmin == xmax or ymin == ymax:
+            self.info_funcs.append((lambda info, shape: {'xreal_min': 0, 'yreal_min': 0}, self.shape))
+            return
+        # If the cropping values of the min and max are switched, avoid error by reversing the crop direction
+        xmin, xmax = min(xmin, xmax), max(xmin, xmax)
+        ymin, ymax = min(ymin, ymax), max(ymin, ymax)
+        self.offset = np.dot(self.matrix, [ymin, xmin]) + self.offset
+        self.shape = (ymax - ymin, xmax - xmin)
+
+        # Preserve the old positions of the cropping point and set the new image size
+        def cropped_info(info, shape):
+            xreal_min = info['xinc'] * xmin
+            yreal_min = info['yinc'] * ymin
+            return {'xres': shape[1], 'yres': shape[0], 'xreal_min': xreal_min, 'yreal_min': yreal_min,
+                    'xreal': xreal_min + info['xinc'] * shape[1], 'yreal': yreal_min + info['yinc'] * shape[0]}
+        self.info_funcs.append((cropped_info, self.shape))
+
+    def info(self, info):
+        """
+        Return the info dictionary of a scan direction, after all the accumulated operations.
+        """
+        info = dict(info)
+        for info_func, shape in self.info_funcs:
+            info.update(info_func(info, shape))
+        return info
+
+    def resample(self, topo_data):
+        """
+        Return the image data after all the accumulated operations. A strided view is returned when the operations
+        are exact pixel permutations, otherwise only the output window is interpolated.
+        """
+        view = tf.affine_view(topo_data, self.matrix, self.offset, self.shape)
+        if view is not None:
+            return view
+        return tf.affine_resample(topo_data, self.matrix, self.offset, self.shape)
+
+
+# 2.0 - Defining the lazy recipe of the topography level and image operations
+class TopoPipeline(object):
+    """
+    Recipe of the level and image operations that are performed on a topography flat-file. Recording an operation
+    returns a new pipeline, so that a recipe can be safely re-used and applied to any other flat-file. No numeric work
+    is done until 'evaluate' is called, at which point all of the adjacent flip, rotate and crop operations are fused
+    into a single transform and only the scan directions that are requested are evaluated.
+    """
+    def __init__(self, operations=None):
+        """
+        Defines the initialisation of the class object.
+        operations:     List of (name, parameters) tuples of the recorded operations.
+        """
+        self.operations = list() if operations is None else list(operations)
+
+    def __repr__(self):
+        return 'TopoPipeline(' + repr(self.operations) + ')'
+
+    def __eq__(self, other):
+        return isinstance(other, TopoPipeline) and self.operations == other.operations
+
+    def key(self):
+        """
+        Return a hashable key of the recipe, so that the evaluated results can be cached against it.
+        """
+        return tuple((name, tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in params.items())))
+                     for name, params in self.operations)
+
+    def _record(self, name, **params):
+        """
+        Return a new pipeline with the given operation appended to the recipe.
+        """
+        return TopoPipeline(self.operations + [(name, params)])
+
+    def level(self, level_type, plane=None, order=1):
+        """
+        Record a level operation.
+
+        :param level_type: The type of leveling performed; 'None', 'Line-wise', 'Line median' or 'Local plane'.
+        :param plane: Plane area [x0, x1, y0, y1] in real units (a zero-sized area uses the full image).
+        :param order: Order of the polynomial surface that is fitted for the 'Local plane' leveling.
+        :return: The new TopoPipeline instance.
+        """
+        # The plane area only matters for the 'Local plane' leveling, so it is dropped otherwise
+        if level_type != 'Local plane':
+            plane, order = None, 1
+        if plane is not None:
+            plane = [float(p) for p in plane]
+        return self._record('level', level_type=level_type, plane=plane, order=order)
+
+    def remove_scars(self, threshold=4.0, min_length=8, max_lines=5):
+        """
+        Record the removal of the scan-line artifacts (streaks and scars), which are replaced by interpolation from the
+        lines above and below them.
+
+        :param threshold: Threshold of the steps between the lines, in robust standard deviations.
+        :param min_length: Minimum number of consecutive pixels along a line for a partial scar (if None, only whole
+        lines are replaced).
+        :param max_lines: Largest number of adjacent lines that a streak may cover.
+        :return: The new TopoPipeline instance.
+        """
+        return self._record('scars', threshold=float(threshold), min_length=min_length, max_lines=int(max_lines))
+
+    def fourier(self, terms):
+        """
+        Record a Fourier filter, whose mask is built once for each image size (see 'topo_spectrum.filter_terms').
+
+        :param terms: List of the terms of the filter; an empty list records nothing.
+        :return: The new TopoPipeline instance.
+        """
+        terms = ts.filter_terms(terms)
+        if len(terms) == 0:
+            return self
+        return self._record('fourier', terms=terms)
+
+    def flip(self, xflip, yflip):
+        """
+        Record a left-right (x) and/or up-down (y) flip.
+        """
+        if not xflip and not yflip:
+            return self
+        return self._record('flip', xflip=bool(xflip), yflip=bool(yflip))
+
+    def rotate(self, angle):
+        """
+        Record a rotation by the given angle in degrees.
+        """
+        return self._record('rotate', angle=float(angle))
+
+    def crop(self, xmin, xmax, ymin, ymax):
+        """
+        Record a crop, given the x- and y-axis crop co-ordinates in real units.
+        """
+        return self._record('crop', xmin=float(xmin), xmax=float(xmax), ymin=float(ymin), ymax=float(ymax))
+
+    def leveling(self):
+        """
+        Return the pipeline of only the level (scar removal and Fourier filter) operations in the recipe.
+        """
+        return TopoPipeline([op for op in self.operations if op[0] in PIXEL_OPS])
+
+    def unfiltered(self):
+        """
+        Return the pipeline of only the level (and scar removal) operations in the recipe, without the Fourier filter.
+        The Fourier filter is applied before the image (flip, rotate and crop) operations, so the frequencies of its
+        terms must be measured on the image of this pipeline.
+        """
+        return TopoPipeline([op for op in self.operations if op[0] in PIXEL_OPS and op[0] != 'fourier'])
+
+    def geometry(self):
+        """
+        Return the pipeline of only the image (flip, rotate and crop) operations in the recipe.
+        """
+        return TopoPipeline([op for op in self.operations if op[0] not in PIXEL_OPS])
+
+    def evaluate(self, flat_file, scan_dirs=None):
+        """
+        Evaluate the recipe over the given scan directions of a flat-file.
+
+        :param flat_file: An instance of an Omicron topography flat file (or a TopoFile handle).
+        :param scan_dirs: List of the scan directions to be evaluated (if None, all the scan directions are used).
+        :return: Dictionary of the evaluated DataArray instances, keyed by their scan direction.
+        """
+        flat_file = tf.TopoFile(flat_file)
+        if scan_dirs is None:
+            scan_dirs = range(len(flat_file))
+        scan_dirs = [int(scan_dir) for scan_dir in scan_dirs]
+        # The scar removals at the start of the recipe are performed over the stack of all the scan directions at once
+        pipeline = self
+        leading = 0
+        while leading < len(self.operations) and self.operations[leading][0] == 'scars':
+            leading += 1
+        shapes = set(np.shape(flat_file[scan_dir].data) for scan_dir in scan_dirs)
+        if leading > 0 and len(shapes) == 1:
+            stack = np.stack([flat_file[scan_dir].data for scan_dir in scan_dirs])
+            for name, params in self.operations[:leading]:
+                stack = tf.remove_line_artifacts(stack, **params)[0]
+            for scan_dir, topo_data in zip(scan_dirs, stack):
+                flat_file = flat_file.replace(scan_dir, topo_data)
+            pipeline = TopoPipeline(self.operations[leading:])
+        return {scan_dir: pipeline.evaluate_scan(flat_file[scan_dir]) for scan_dir in scan_dirs}
+
+    def footprint(self, scan):
+        """
+        Return the outline of the final image of the image (flip, rotate and crop) operations, in the pixel co-ordinates
+        of the image before these operations. This is found from the same transform that is used to resample the image,
+        so the outline is exact for any rotation angle.
+
+        :param scan: The DataArray instance of a single scan direction, before the image operations.
+        :return: Px, Py, V; the x- and y-pixel co-ordinates of the four corners (bottom-left, top-left, top-right,
+        bottom-right) of the final image and the arrow [x, y, dx, dy] from its centre towards its top edge.
+        """
+        geometry = self._geometry(scan)
+        # The outer corners of the final image, as (row, column) pairs, mapped back onto the original pixel co-ordinates
+        # - Pixel centres lie on the integer co-ordinates, so the outer edges of the image lie half a pixel beyond them
+        rows, cols = geometry.shape[0] - 0.5, geometry.shape[1] - 0.5
+        corners = np.array([[-0.5, -0.5], [rows, -0.5], [rows, cols], [-0.5, cols]])
+        original = np.dot(corners, np.transpose(geometry.matrix)) + geometry.offset
+        Px, Py = original[:, 1], original[:, 0]
+        # The arrow points from the centre of the final image towards the centre of its top edge
+        centre = np.mean(original, axis=0)
+        tip = 0.5 * (original[1] - original[0])
+        V = np.array([centre[1], centre[0], tip[1], tip[0]])
+        return Px, Py, V
+
+    def _geometry(self, scan):
+        """
+        Return the accumulated geometry of only the image (flip, rotate and crop) operations in the recipe.
+        """
+        info = scan.info
+        geometry = _Geometry(np.shape(scan.data))
+        for name, params in self.operations:
+            if name not in PIXEL_OPS:
+                self._accumulate(geometry, info, name, params)
+        return geometry
+
+    def evaluate_scan(self, scan):
+        """
+        Evaluate the recipe over a single scan direction.
+
+        :param scan: The DataArray instance of a single scan direction.
+        :return: The new DataArray instance.
+        """
+        topo_data, info = scan.data, scan.info
+        geometry = _Geometry(np.shape(topo_data))
+        for name, params in self.operations:
+            # Level, scar removal and Fourier filter operations need the image data, so the accumulated geometry is
+            # resampled beforehand
+            if name in PIXEL_OPS:
+                if not geometry.is_identity():
+                    topo_data, info = geometry.resample(topo_data), geometry.info(info)
+                    geometry = _Geometry(np.shape(topo_data))
+                if name == 'level':
+                    topo_data = self._level(topo_data, info, **params)
+                elif name == 'scars':
+                    topo_data = tf.remove_line_artifacts(topo_data, **params)[0]
+                else:
+                    xinc, yinc = ts.pixel_size(info)
+                    topo_data = ts.fourier_filter(topo_data, params['terms'], xinc, yinc)
+            else:
+                self._accumulate(geometry, info, name, params)
+        if not geometry.is_identity():
+            topo_data, info = geometry.resample(topo_data), geometry.info(info)
+        return scan.__class__(topo_data, info)
+
+    @staticmethod
+    def _accumulate(geometry, info, name, params):
+        """
+        Accumulate a single image (flip, rotate or crop) operation into the geometry.
+        """
+        if name == 'flip':
+            geometry.flip(params['xflip'], params['yflip'])
+        elif name == 'rotate':
+            geometry.rotate(params['angle'])
+        elif name == 'crop':
+            # Converting from real units to pixel units, over the image after the accumulated operations
+            crop_info = dict(info, xres=geometry.shape[1], yres=geometry.shape[0])
+            geometry.crop(tf.nm2pnt(params['xmin'], crop_info), tf.nm2pnt(params['xmax'], crop_info),
+                          tf.nm2pnt(params['ymin'], crop_info, axis='y'), tf.nm2pnt(params['ymax'], crop_info, axis='y'))
+
+    @staticmethod
+    def _level(topo_data, info, level_type, plane=None, order=1):
+        """
+        Perform a level operation on the image data of a single scan direction.
+        """
+        if level_type == 'Line-wise':
+            return tf.linewise_subtract(topo_data)
+        elif level_type == 'Line median':
+            return kn.row_median_level(topo_data)
+        elif level_type == 'Local plane':
+            # If the plane area is not well defined, the full image is used
+            roi = None
+            if plane is not None and plane[0] != plane[1] and plane[2] != plane[3]:
+                roi = [tf.nm2pnt(plane[0], info), tf.nm2pnt(plane[1], info),
+                       tf.nm2pnt(plane[2], info, axis='y'), tf.nm2pnt(plane[3], info, axis='y')]
+            return tf.poly_surface_subtract(topo_data, order, roi=roi)
+        return topo_data
+
+
+# 3.0 - Defining the bounded cache that holds the results of each stage of the pipeline
+class StageCache(object):
+    """
+    Bounded, least-recently-used cache of the results of each stage (loading, leveling and image operations). Each
+    result is keyed by all of the inputs of its stage, so that a change further downstream re-uses the upstream
+    results and a change that only alters the rendering does no numeric work at all.
+    """
+    def __init__(self, maxsize=16):
+        """
+        Defines the initialisation of the class object.
+        maxsize:    Maximum number of results that are held before the least recently used is discarded.
+        """
+        self.maxsize = maxsize                      # Maximum number of cached results
+        self.entries = OrderedDict()                # Ordered dictionary of the cached results, oldest first
+        self.hits = 0                               # Number of times a cached result was re-used
+        self.misses = 0                             # Number of times a result had to be computed
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, func):
+        """
+        Return the cached result of the given key, or compute it using 'func' and cache it.
+
+        :param key: Hashable key of all the inputs of the stage.
+        :param func: Function, taking no arguments, that computes the result of the stage.
+        :return: The result of the stage.
+        """
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        self.misses += 1
+        result = func()
+        self.entries[key] = result
+        # Discard the least recently used results once the cache is full
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        """
+        Discard all of the cached results.
+        """
+        self.entries.clear()
+
+
+class LazyScans(object):
+    """
+    Read-only list of the scan directions of a flat-file, where each scan direction is only evaluated the first time
+    it is requested. It behaves like the list of DataArray instances returned from 'flatfile_3.load', such that the
+    final data of every scan direction can be indexed, while only the scan directions that are used are evaluated.
+    """
+    def __init__(self, length, evaluate):
+        """
+        Defines the initialisation of the class object.
+        length:     Number of scan directions.
+        evaluate:   Function, taking the integer of a scan direction, that returns its DataArray instance.
+        """
+        self.length = length                        # Number of scan directions
+        self.evaluate = evaluate                    # Function that evaluates a single scan direction
+        self.scans = dict()                         # Dictionary of the scan directions evaluated so far
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, scan_dir):
+        if isinstance(scan_dir, slice):
+            return [self[i] for i in range(*scan_dir.indices(self.length))]
+        scan_dir = int(scan_dir)
+        if scan_dir < 0:
+            scan_dir += self.length
+        if not 0 <= scan_dir < self.length:
+            raise IndexError('The scan direction {} is out of range.'.format(scan_dir))
+        if scan_dir not in self.scans:
+            self.scans[scan_dir] = self.evaluate(scan_dir)
+        return self.scans[scan_dir]
+
+    def __iter__(self):
+        return (self[scan_dir] for scan_dir in range(self.length))
+
+
+# 4.0 - Defining the recipe files, which hold the image properties of an STT session so they can be re-applied
+def recipe_from_props(image_props):
+    """
+    Return the pipeline of the level and image operations that are defined by the image properties.
+
+    :param image_props: Dictionary of the image properties, as defined in 'STT.update_function'.
+    :return: The TopoPipeline instance of the scar removal, level, Fourier filter, flip, rotate and crop operations.
+    """
+    crop = image_props["real crop"]
+    pipeline = TopoPipeline()
+    # The scar removal and Fourier filter were added after the first recipe files, so they are off if they are missing
+    if image_props.get("scars", False):
+        pipeline = pipeline.remove_scars()
+    return pipeline.level(image_props["leveling"], image_props["real plane"]) \
+        .fourier(image_props.get("fourier") or []) \
+        .flip(image_props["x flip"], image_props["y flip"]) \
+        .rotate(image_props["rotation"]) \
+        .crop(crop[0], crop[1], crop[2], crop[3])
+
+
+def save_recipe(file_path, image_props):
+    """
+    Save the image properties to a recipe file (in the json format).
+
+    :param file_path: Path of the recipe file.
+    :param image_props: Dictionary of the image properties, as defined in 'STT.update_function'.
+    """
+    recipe = {key: (np.asarray(value).tolist() if isinstance(value, np.ndarray) else value)
+              for key, value in image_props.items()}
+    with open(file_path, 'w') as recipe_file:
+        json.dump(recipe, recipe_file, indent=4, sort_keys=True)
+
+
+def load_recipe(file_path):
+    """
+    Load the image properties from a recipe file.
+
+    :param file_path: Path of the recipe file.
+    :return: Dictionary of the image properties.
+    """
+    with open(file_path, 'r') as recipe_file:
+        image_props = json.load(recipe_file)
+    for key in ("real plane", "real crop"):
+        image_props[key] = np.array(image_props[key], dtype=float)
+    return image_props
@@ -0,0 +1,573 @@
+import weakref                              # Standard weakref module to cache the power spectra of each scan
+import functools                            # Standard functools module to cache the Fourier masks of each image size
+import numpy as np                          # Standard numpy module
+import kernels as kn                        # Module that holds the pixel-loop kernels, with an optional compiled backend
+try:
+    from scipy import fft as sfft           # Optional scipy module for the multi-threaded real Fourier transforms
+except ImportError:
+    sfft = None
+
+# Information about the "topo_spectrum.py" module
+__version__ = "1.00"
+__date__ = "19th October 2026"
+__status__ = "Pending"
+
+__authors__ = "Procopi Constantinou & Tobias Gill"
+__email__ = "procopios.constantinou.16@ucl.ac.uk"
+
+# Names of the apodization windows that can be applied before the Fourier transform
+WINDOWS = ['None', 'Hann', 'Tukey']
+# Names of the terms of the Fourier filters
+FILTERS = ['lowpass', 'highpass', 'bragg', 'notch']
+
+
+# 1.0 - Defining the apodization windows and the real Fourier transform
+def _window_1d(n, window, alpha):
+    """
+    Return a 1D apodization window of the given length.
+    """
+    if window == 'Hann':
+        return np.hanning(n)
+    elif window == 'Tukey':
+        # A flat top with cosine tapers over the fraction 'alpha' of the samples (alpha = 1 is the Hann window)
+        x = np.linspace(0., 1., n)
+        taper = 0.5 * max(alpha, 1e-12)
+        edge = np.minimum(x, 1. - x)
+        return np.where(edge < taper, 0.5 * (1. - np.cos(np.pi * edge / taper)), 1.)
+    elif window == 'None':
+        return np.ones(n)
+    raise ValueError("The '{}' window is not available; choose from {}.".format(window, WINDOWS))
+
+
+def window_2d(shape, window='Hann', alpha=0.25):
+    """
+    Return the separable 2D apodization window of an image.
+
+    :param shape: Shape (rows, columns) of the image.
+    :param window: Name of the window; 'None', 'Hann' or 'Tukey'.
+    :param alpha: Fraction of each axis that is tapered by the 'Tukey' window.
+    :return: 2D numpy array of the window.
+    """
+    return np.outer(_window_1d(shape[0], window, alpha), _window_1d(shape[1], window, alpha))
+
+
+def rfft2(topo_data, workers=-1):
+    """
+    Return the 2D real Fourier transform of an image, using all the CPUs if the scipy transforms are available.
+
+    :param topo_data: 2D numpy array of the image.
+    :param workers: Number of threads of the scipy transform (-1 uses all the CPUs).
+    :return: 2D complex array of the half-plane transform, of shape (rows, columns // 2 + 1).
+    """
+    if sfft is not None:
+        return sfft.rfft2(topo_data, workers=workers)
+    return np.fft.rfft2(topo_data)
+
+
+def irfft2(transform, shape, workers=-1):
+    """
+    Return the image of a 2D half-plane transform, which is the inverse of 'rfft2'.
+
+    :param transform: 2D complex array of the half-plane transform (or a stack of them).
+    :param shape: Shape (rows, columns) of the image.
+    :param workers: Number of threads of the scipy transform (-1 uses all the CPUs).
+    :return: Numpy array of the image.
+    """
+    if sfft is not None:
+        return sfft.irfft2(transform, s=shape, workers=workers)
+    return np.fft.irfft2(transform, s=shape)
+
+
+# 2.0 - Defining the power spectral density of a topography scan, which is held over the half-plane of the transform
+class PowerSpectrum(object):
+    """
+    Power spectral density of a topography image, from the real Fourier transform of the windowed image. Only the
+    half-plane of non-negative x-frequencies is computed and held; the full, centred spectrum that is displayed is
+    rebuilt from the inversion symmetry of the spectrum of a real image, and only the first time it is requested.
+
+    shape:      Shape (rows, columns) of the image.
+    xinc:       Size of the pixels along the x-axis (in nm).
+    yinc:       Size of the pixels along the y-axis (in nm).
+    window:     Name of the apodization window.
+    alpha:      Fraction of each axis that is tapered by the 'Tukey' window.
+    fx:         1D array of the x-frequencies of the half-plane (in 1/nm).
+    fy:         1D array of the y-frequencies of the half-plane (in 1/nm).
+    half:       2D array of the power spectral density over the half-plane (in nm^4).
+    """
+    def __init__(self, topo_data, xinc, yinc, window='Hann', alpha=0.25, workers=-1):
+        """
+        Defines the initialisation of the class object.
+
+        :param topo_data: 2D numpy array of the image (in nm).
+        :param xinc: Size of the pixels along the x-axis (in nm).
+        :param yinc: Size of the pixels along the y-axis (in nm).
+        :param window: Name of the apodization window; 'None', 'Hann' or 'Tukey'.
+        :param alpha: Fraction of each axis that is tapered by the 'Tukey' window.
+        :param workers: Number of threads of the Fourier transform (-1 uses all the CPUs).
+        """
+        topo_data = np.asarray(topo_data, dtype=float)
+        self.shape = topo_data.shape
+        self.xinc, self.yinc = float(xinc), float(yinc)
+        self.window, self.alpha = window, alpha
+        # Removing the mean and applying the window, whose power is compensated so the total power is kept
+        weights = window_2d(self.shape, window, alpha)
+        transform = rfft2((topo_data - np.mean(topo_data)) * weights, workers)
+        norm = self.xinc * self.yinc / (topo_data.size * np.mean(weights ** 2))
+        self.half = norm * (transform.real ** 2 + transform.imag ** 2)
+        self.fx = np.fft.rfftfreq(self.shape[1], self.xinc)
+        self.fy = np.fft.fftfreq(self.shape[0], self.yinc)
+        self._full = None
+
+    def _multiplicity(self):
+        """
+        Return the number of times each column of the half-plane appears in the full spectrum.
+        """
+        multiplicity = np.full(len(self.fx), 2.)
+        multiplicity[0] = 1.
+        if self.shape[1] % 2 == 0:
+            multiplicity[-1] = 1.
+        return multiplicity
+
+    def full(self):
+        """
+        Return the full spectrum, centred on the zero frequency, which is rebuilt from the half-plane.
+
+        :return: 2D numpy array of the power spectral density, of the same shape as the image.
+        """
+        if self._full is None:
+            rows, cols = self.shape
+            # The columns beyond the half-plane are the inverted copies of the columns within it
+            columns = np.arange(cols)
+            mirrored = columns > cols // 2
+            source_cols = np.where(mirrored, (cols - columns) % cols, columns)
+            source_rows = np.where(mirrored[np.newaxis, :], (-np.arange(rows)[:, np.newaxis]) % rows,
+                                   np.arange(rows)[:, np.newaxis])
+            self._full = np.fft.fftshift(self.half[source_rows, source_cols[np.newaxis, :]])
+        return self._full
+
+    def frequencies(self):
+        """
+        Return the x- and y-frequencies of the full, centred spectrum (in 1/nm).
+        """
+        return (np.fft.fftshift(np.fft.fftfreq(self.shape[1], self.xinc)),
+                np.fft.fftshift(np.fft.fftfreq(self.shape[0], self.yinc)))
+
+    def extent(self):
+        """
+        Return the extent [x0, x1, y0, y1] of the full, centred spectrum (in 1/nm), for an image with origin='lower'.
+        """
+        fx, fy = self.frequencies()
+        dfx, dfy = 1. / (self.shape[1] * self.xinc), 1. / (self.shape[0] * self.yinc)
+        return [fx[0] - 0.5 * dfx, fx[-1] + 0.5 * dfx, fy[0] - 0.5 * dfy, fy[-1] + 0.5 * dfy]
+
+    def radial(self, bins=None, fmax=None):
+        """
+        Return the radially averaged power spectral density, over annuli of equal width.
+
+        :param bins: Number of annuli (if None, one annulus per frequency step is used).
+        :param fmax: Largest frequency (if None, the smaller of the two Nyquist frequencies is used).
+        :return: The 1D arrays of the frequencies at the centre of each annulus (in 1/nm) and of the averaged power.
+        """
+        df = max(1. / (self.shape[1] * self.xinc), 1. / (self.shape[0] * self.yinc))
+        if fmax is None:
+            fmax = min(0.5 / self.xinc, 0.5 / self.yinc)
+        if bins is None:
+            bins = max(int(fmax / df), 1)
+        radius = np.hypot(self.fx[np.newaxis, :], self.fy[:, np.newaxis])
+        return self._binned(radius, bins, 0., fmax, radius <= fmax)
+
+    def azimuthal(self, bins=180, fmin=None, fmax=None):
+        """
+        Return the azimuthally averaged power spectral density, over sectors of equal angle between 0 and 180 degrees
+        (the spectrum of a real image is symmetric under inversion, so the angles beyond 180 degrees are the same).
+
+        :param bins: Number of sectors.
+        :param fmin: Smallest frequency of the annulus that is averaged (if None, the lowest frequencies are excluded).
+        :param fmax: Largest frequency of the annulus that is averaged (if None, the smaller Nyquist frequency is used).
+        :return: The 1D arrays of the angles at the centre of each sector (in degrees) and of the averaged power.
+        """
+        if fmin is None:
+            fmin = 2 * max(1. / (self.shape[1] * self.xinc), 1. / (self.shape[0] * self.yinc))
+        if fmax is None:
+            fmax = min(0.5 / self.xinc, 0.5 / self.yinc)
+        radius = np.hypot(self.fx[np.newaxis, :], self.fy[:, np.newaxis])
+        angle = np.degrees(np.arctan2(self.fy[:, np.newaxis], self.fx[np.newaxis, :])) % 180.
+        return self._binned(angle, bins, 0., 180., (radius >= fmin) & (radius <= fmax))
+
+    def _binned(self, coordinate, bins, low, high, valid):
+        """
+        Return the average of the half-plane power over equal bins of the given co-ordinate, where each column of the
+        half-plane is weighted by the number of times it appears in the full spectrum.
+        """
+        weights = np.broadcast_to(self._multiplicity()[np.newaxis, :], self.shape[:1] + (len(self.fx),))[valid]
+        index = np.clip(((coordinate[valid] - low) / (high - low) * bins).astype(int), 0, bins - 1)
+        total = np.bincount(index, weights * self.half[valid], minlength=bins)
+        count = np.bincount(index, weights, minlength=bins)
+        centres = low + (np.arange(bins) + 0.5) * (high - low) / bins
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return centres, np.where(count > 0, total / np.maximum(count, 1e-300), np.nan)
+
+
+# 3.0 - Defining the cache of the power spectra, which holds a spectrum of each scan for every choice of window
+_spectra = weakref.WeakKeyDictionary()
+
+
+def power_spectrum(scan, window='Hann', alpha=0.25, workers=-1):
+    """
+    Return the power spectrum of a single scan direction, which is only computed the first time it is requested for
+    the given window. As the scan directions of a TopoFile are shared between its copies, so are their spectra.
+
+    :param scan: The DataArray instance of a single scan direction, whose data is in metres.
+    :param window: Name of the apodization window; 'None', 'Hann' or 'Tukey'.
+    :param alpha: Fraction of each axis that is tapered by the 'Tukey' window.
+    :param workers: Number of threads of the Fourier transform (-1 uses all the CPUs).
+    :return: The PowerSpectrum instance of the scan direction (in nm).
+    """
+    spectra = _spectra.get(scan)
+    if spectra is None or spectra[0] is not scan.data:
+        spectra = (scan.data, dict())
+        _spectra[scan] = spectra
+    key = (window, float(alpha) if window == 'Tukey' else None)
+    if key not in spectra[1]:
+        spectra[1][key] = PowerSpectrum(np.asarray(scan.data) * 1e9, scan.info['xinc'], scan.info['yinc'],
+                                        window, alpha, workers)
+    return spectra[1][key]
+
+
+# 4.0 - Defining the detection of the lattice peaks of a power spectrum and the lattice that they define
+def _radial_median(values, radius, step):
+    """
+    Return, at every pixel, the median of the values over the annulus of the given width that holds the pixel. The
+    median of each annulus is found from a single sort of all the pixels by their annulus and value.
+
+    :param values: 2D numpy array of the values.
+    :param radius: 2D numpy array of the radius of every pixel.
+    :param step: Width of the annuli.
+    :return: 2D numpy array of the median of the annulus of every pixel.
+    """
+    index = (np.asarray(radius) / step).astype(np.intp).ravel()
+    values = np.asarray(values).ravel()
+    order = np.lexsort((values, index))
+    counts = np.bincount(index)
+    starts = np.cumsum(counts) - counts
+    medians = values[order][np.minimum(starts + counts // 2, len(values) - 1)]
+    return medians[index].reshape(np.shape(radius))
+
+
+def find_peaks(spectrum, count=12, radius=2, min_ratio=None, fmin=None):
+    """
+    Find the strongest peaks of a power spectrum, relative to the median power of the annulus at the same frequency,
+    with their positions refined to sub-pixel accuracy by the vertex of a parabola through the log-power on either
+    side of each peak. The median, unlike the radial average, is not raised by the peaks on the ring of a lattice.
+
+    :param spectrum: The PowerSpectrum instance.
+    :param count: Largest number of peaks that are returned.
+    :param radius: Radius (in pixels) of the window within which a peak must be the maximum.
+    :param min_ratio: Smallest ratio of the power of a peak to the median power at the same frequency (if None, twice
+    the base-2 log of the number of pixels is used; the power of noise is exponentially distributed, with a median of
+    ln(2) times its average, so a noise peak is then very unlikely to be found anywhere in the spectrum).
+    :param fmin: Smallest frequency of a peak, in 1/nm (if None, the three lowest frequency steps are excluded).
+    :return: The 2D array of the (x, y) frequencies of the peaks (in 1/nm) and the 1D array of their power ratios,
+    ordered from the strongest peak.
+    """
+    fx, fy = spectrum.frequencies()
+    dfx, dfy = fx[1] - fx[0], fy[1] - fy[0]
+    if fmin is None:
+        fmin = 3 * max(dfx, dfy)
+    if min_ratio is None:
+        min_ratio = 2 * np.log2(np.prod(spectrum.shape))
+    # The log of the ratio of the spectrum to the median of its annulus, which flattens the background of the low
+    # frequencies
+    radius_f = np.hypot(fx[np.newaxis, :], fy[:, np.newaxis])
+    floor = np.finfo(float).tiny
+    log_power = np.log(np.maximum(spectrum.full(), floor))
+    contrast = log_power - _radial_median(log_power, radius_f, max(dfx, dfy))
+    # - The peaks are the maxima of the spectrum itself, so that their positions are not biased by the background
+    peaks = kn.local_maxima(np.where(radius_f < fmin, -np.inf, log_power), radius)
+    peaks = peaks[contrast[peaks[:, 0], peaks[:, 1]] > np.log(min_ratio)]
+    if len(peaks) == 0:
+        return np.zeros((0, 2)), np.zeros(0)
+    order = np.argsort(-contrast[peaks[:, 0], peaks[:, 1]], kind='stable')[:count]
+    rows, cols = peaks[order, 0], peaks[order, 1]
+    # Sub-pixel refinement along each axis, where the samples beyond the edges are taken from the edge pixels
+    shape = log_power.shape
+    offsets = list()
+    for d_row, d_col in ((1, 0), (0, 1)):
+        minus = log_power[np.clip(rows - d_row, 0, shape[0] - 1), np.clip(cols - d_col, 0, shape[1] - 1)]
+        plus = log_power[np.clip(rows + d_row, 0, shape[0] - 1), np.clip(cols + d_col, 0, shape[1] - 1)]
+        denom = minus - 2 * log_power[rows, cols] + plus
+        safe = np.where(denom == 0, 1, denom)
+        offsets.append(np.where(denom < 0, np.clip(0.5 * (minus - plus) / safe, -0.5, 0.5), 0.))
+    frequencies = np.stack([fx[0] + (cols + offsets[1]) * dfx, fy[0] + (rows + offsets[0]) * dfy], axis=1)
+    return frequencies, np.exp(contrast[rows, cols])
+
+
+def lattice_parameters(spectrum, count=12, radius=2, min_ratio=None, fmin=None, tolerance=0.1):
+    """
+    Extract the lattice of a topography scan from the peaks of its power spectrum. The peaks come in pairs that are
+    related by inversion, so only one peak of each pair is kept, and they are grouped into shells of equal frequency.
+    The first reciprocal vector is the strongest peak of the innermost shell, and the second reciprocal vector is the
+    strongest of the innermost remaining peaks that is not collinear with it (at most 90 degrees from it), from which
+    the real-space lattice vectors are found.
+
+    :param spectrum: The PowerSpectrum instance.
+    :param count: Largest number of peaks that are used.
+    :param radius: Radius (in pixels) of the window within which a peak must be the maximum.
+    :param min_ratio: Smallest ratio of the power of a peak to the median power at the same frequency (if None, twice
+    the base-2 log of the number of pixels is used).
+    :param fmin: Smallest frequency of a peak, in 1/nm (if None, the three lowest frequency steps are excluded).
+    :param tolerance: Relative tolerance of the frequencies of the peaks within the same shell.
+    :return: Dictionary of the lattice; the peaks ('peaks', 'ratios'), the number of peaks in the innermost shell
+    ('order'; 4 for a square or rectangular lattice and 6 for a hexagonal lattice), the reciprocal vectors ('b1', 'b2'
+    in 1/nm), the lattice vectors ('a1', 'a2' in nm), the lattice constants ('a', 'b' in nm), the angle between the
+    lattice vectors ('gamma' in degrees) and the angle of the first lattice vector from the x-axis ('angle', from 0
+    to 180 degrees).
+    The lattice entries are NaN if fewer than two independent peaks are found.
+    """
+    peaks, ratios = find_peaks(spectrum, count, radius, min_ratio, fmin)
+    lattice = {'peaks': peaks, 'ratios': ratios, 'order': 0, 'b1': np.full(2, np.nan), 'b2': np.full(2, np.nan),
+               'a1': np.full(2, np.nan), 'a2': np.full(2, np.nan), 'a': np.nan, 'b': np.nan, 'gamma': np.nan,
+               'angle': np.nan}
+    # Keeping one peak of each inversion pair, the one within the half-plane of angles from 0 to 180 degrees
+    upper = (peaks[:, 1] > 0) | ((peaks[:, 1] == 0) & (peaks[:, 0] > 0))
+    unique, unique_ratios = list(), list()
+    for peak, ratio in zip(np.where(upper[:, np.newaxis], peaks, -peaks), ratios):
+        if all(np.hypot(*(peak - other)) > tolerance * np.hypot(*peak) for other in unique):
+            unique.append(peak)
+            unique_ratios.append(ratio)
+    if len(unique) == 0:
+        return lattice
+    unique, unique_ratios = np.array(unique), np.array(unique_ratios)
+    magnitude = np.hypot(unique[:, 0], unique[:, 1])
+    # The innermost shell, and its strongest peak as the first reciprocal vector
+    shell = magnitude <= (1 + tolerance) * np.min(magnitude)
+    lattice['order'] = 2 * int(np.sum(shell))
+    b1 = unique[shell][np.argmax(unique_ratios[shell])]
+    # The innermost non-collinear peak (the strongest within its shell) as the second reciprocal vector
+    sine = np.abs(b1[0] * unique[:, 1] - b1[1] * unique[:, 0]) / (np.hypot(*b1) * magnitude)
+    candidates = sine > np.sin(np.radians(15))
+    if not np.any(candidates):
+        return lattice
+    inner = candidates & (magnitude <= (1 + tolerance) * np.min(magnitude[candidates]))
+    b2 = unique[inner][np.argmax(unique_ratios[inner])]
+    if np.dot(b1, b2) < 0:
+        b2 = -b2
+    # The lattice vectors satisfy a_i . b_j = delta_ij
+    a1, a2 = np.transpose(np.linalg.inv(np.array([b1, b2])))
+    lattice.update({'b1': b1, 'b2': b2, 'a1': a1, 'a2': a2, 'a': np.hypot(*a1), 'b': np.hypot(*a2),
+                    'gamma': np.degrees(np.arccos(np.clip(np.dot(a1, a2) / (np.hypot(*a1) * np.hypot(*a2)), -1, 1))),
+                    'angle': np.degrees(np.arctan2(a1[1], a1[0])) % 180.})
+    return lattice
+
+
+# 5.0 - Defining the Fourier filters, whose masks are built once for each image size and then re-used
+def pixel_size(info):
+    """
+    Return the size of the pixels of a scan direction (in nm), from its real size and resolution.
+
+    :param info: The info dictionary of the scan direction.
+    :return: The x- and y-sizes of the pixels.
+    """
+    return ((info['xreal'] - info.get('xreal_min', 0)) / info['xres'],
+            (info['yreal'] - info.get('yreal_min', 0)) / info['yres'])
+
+
+def filter_terms(terms):
+    """
+    Return the terms of a Fourier filter as nested tuples, so that they can be used as the key of the cached masks (the
+    terms loaded from a recipe file are nested lists). Each term is one of:
+    ('lowpass', cutoff) keeps the frequencies below the cutoff (in 1/nm), with a gaussian roll-off that halves at it;
+    ('highpass', cutoff) keeps the frequencies above the cutoff (in 1/nm), as the complement of the low-pass;
+    ('bragg', ((fx, fy), ...), radius) keeps only gaussian spots of the given radius (in 1/nm) around the peaks, their
+    inversions and the zero frequency;
+    ('notch', ((fx, fy), ...), radius) removes gaussian spots of the given radius around the peaks and their
+    inversions, such as those of periodic interference.
+
+    :param terms: List of the terms of the filter.
+    :return: Tuple of the terms.
+    """
+    normalised = list()
+    for term in terms:
+        if term[0] not in FILTERS:
+            raise ValueError("The '{}' filter is not available; choose from {}.".format(term[0], FILTERS))
+        if term[0] in ('lowpass', 'highpass'):
+            normalised.append((str(term[0]), float(term[1])))
+        else:
+            peaks = tuple((float(peak[0]), float(peak[1])) for peak in term[1])
+            normalised.append((str(term[0]), peaks, float(term[2])))
+    return tuple(normalised)
+
+
+@functools.lru_cache(maxsize=32)
+def fourier_mask(terms, shape, xinc, yinc):
+    """
+    Return the mask of a Fourier filter over the half-plane of the real Fourier transform of an image. The masks are
+    cached, so every image of the same size and pixel size re-uses the same mask, which is read-only.
+
+    :param terms: Tuple of the terms of the filter, as returned by 'filter_terms'.
+    :param shape: Shape (rows, columns) of the image.
+    :param xinc: Size of the pixels along the x-axis (in nm).
+    :param yinc: Size of the pixels along the y-axis (in nm).
+    :return: 2D numpy array of the mask, of shape (rows, columns // 2 + 1).
+    """
+    fx = np.fft.rfftfreq(shape[1], xinc)[np.newaxis, :]
+    fy = np.fft.fftfreq(shape[0], yinc)[:, np.newaxis]
+    radius = np.hypot(fx, fy)
+    mask = np.ones((shape[0], shape[1] // 2 + 1))
+    for term in terms:
+        if term[0] == 'lowpass':
+            mask = mask * np.exp(-np.log(2) * (radius / term[1]) ** 2)
+        elif term[0] == 'highpass':
+            mask = mask * (1. - np.exp(-np.log(2) * (radius / term[1]) ** 2))
+        else:
+            # - The spots around each peak and its inversion, as only one of the two may lie within the half-plane
+            spots = np.zeros_like(mask)
+            for peak in term[1]:
+                for sign in (1., -1.):
+                    distance = np.hypot(fx - sign * peak[0], fy - sign * peak[1])
+                    spots = np.maximum(spots, np.exp(-np.log(2) * (distance / term[2]) ** 2))
+            if term[0] == 'bragg':
+                mask = mask * np.maximum(spots, np.exp(-np.log(2) * (radius / term[2]) ** 2))
+            else:
+                mask = mask * (1. - spots)
+    mask.flags.writeable = False
+    return mask
+
+
+def fourier_filter(topo_data, terms, xinc, yinc, workers=-1):
+    """
+    Filter an image, or a stack of images of the same size, by multiplying their real Fourier transforms by the mask
+    of the filter.
+
+    :param topo_data: Numpy array of the image, or of the stack of images of shape (..., rows, columns).
+    :param terms: List of the terms of the filter (see 'filter_terms').
+    :param xinc: Size of the pixels along the x-axis (in nm).
+    :param yinc: Size of the pixels along the y-axis (in nm).
+    :param workers: Number of threads of the Fourier transforms (-1 uses all the CPUs).
+    :return: Numpy array of the filtered image, or stack of images.
+    """
+    topo_data = np.asarray(topo_data, dtype=float)
+    terms = filter_terms(terms)
+    if len(terms) == 0:
+        return topo_data
+    shape = topo_data.shape[-2:]
+    mask = fourier_mask(terms, shape, float(xinc), float(yinc))
+    return irfft2(rfft2(topo_data, workers) * mask, shape, workers)
+
+
+# 6.0 - Defining the template matching by normalized cross-correlation, which re-uses the transform of the image
+class TemplateMatcher(object):
+    def __init__(self, topo_data, workers=-1):
+        """
+        Defines the normalized cross-correlation of an image with any number of smaller templates. The transform of
+        the image and the cumulative sums of its heights are computed once, so that each template only costs one
+        transform of its own and one inverse transform. The correlation is circular over the size of the image,
+        which is exact for every placement of a template that lies fully within the image.
+
+        :param topo_data: 2D numpy array of the image.
+        :param workers: Number of threads of the Fourier transforms (-1 uses all the CPUs).
+
+        self.shape: Shape (rows, columns) of the image.
+        self.transform: 2D complex array of the half-plane transform of the image.
+        self.sums: Tuple of the 2D cumulative sums of the heights and squared heights of the image, with a leading row
+        and column of zeros.
+        """
+        topo_data = np.asarray(topo_data, dtype=float)
+        self.shape = topo_data.shape
+        self.workers = workers
+        # - The heights are centred, so that the sums of the squared heights do not lose their precision
+        topo_data = topo_data - np.mean(topo_data)
+        self.transform = rfft2(topo_data, workers)
+        self.sums = tuple(np.pad(np.cumsum(np.cumsum(values, axis=0), axis=1), ((1, 0), (1, 0)))
+                          for values in (topo_data, topo_data ** 2))
+
+    def _window_sums(self, sums, rows, cols):
+        """
+        Return the sums of the image over every placement of a window of the given size, from its cumulative sums.
+        """
+        return sums[rows:, cols:] - sums[:-rows, cols:] - sums[rows:, :-cols] + sums[:-rows, :-cols]
+
+    def scores(self, template):
+        """
+        Return the normalized cross-correlation of the template with every placement of it within the image, which
+        lies between -1 and 1 and is insensitive to the offset and scale of the heights.
+
+        :param template: 2D numpy array of the template, which is no larger than the image.
+        :return: 2D numpy array of the scores, of shape (rows - template rows + 1, columns - template columns + 1),
+        indexed by the top left pixel of each placement.
+        """
+        template = np.asarray(template, dtype=float)
+        rows, cols = template.shape
+        if rows > self.shape[0] or cols > self.shape[1]:
+            raise ValueError("The template {} is larger than the image {}.".format(template.shape, self.shape))
+        template = template - np.mean(template)
+        padded = np.zeros(self.shape)
+        padded[:rows, :cols] = template
+        # - As the template has a zero mean, its correlation with the image needs no local mean of the image
+        correlation = irfft2(self.transform * np.conj(rfft2(padded, self.workers)), self.shape, self.workers)
+        correlation = correlation[:self.shape[0] - rows + 1, :self.shape[1] - cols + 1]
+        total, total_sq = (self._window_sums(sums, rows, cols) for sums in self.sums)
+        variance = np.maximum(total_sq - total ** 2 / template.size, 0.) * np.sum(template ** 2)
+        # - Flat placements, whose variance is lost in the rounding of the sums, are given a score of zero
+        scale = np.max(variance) if variance.size > 0 else 0.
+        valid = variance > 1e-10 * scale
+        return np.where(valid, correlation / np.sqrt(np.where(valid, variance, 1.)), 0.)
+
+    def match(self, template, min_score=0.6, min_distance=None, count=None):
+        """
+        Find the placements of the template that best match the image, where only the best placement within the
+        given distance of each other is kept (non-maximum suppression).
+
+        :param template: 2D numpy array of the template.
+        :param min_score: Smallest score of a match.
+        :param min_distance: Radius (in pixels) within which only the best match is kept (if None, half of the
+        smaller side of the template is used).
+        :param count: Largest number of matches that are returned (if None, all the matches are returned).
+        :return: Tuple of the 2D integer array of the (row, column) of the top left pixel of each match and the 1D
+        array of their scores, ordered from the best match.
+        """
+        scores = self.scores(template)
+        if min_distance is None:
+            min_distance = max(min(np.shape(template)) // 2, 1)
+        peaks = kn.local_maxima(scores, int(min_distance), min_score)
+        order = np.argsort(-scores[peaks[:, 0], peaks[:, 1]], kind='stable')[:count]
+        return peaks[order], scores[peaks[order, 0], peaks[order, 1]]
+
+
+# - Cache of the template matchers of each scan, which are only computed the first time they are requested
+_matchers = weakref.WeakKeyDictionary()
+
+
+def template_matcher(scan, workers=-1):
+    """
+    Return the template matcher of a single scan direction, which is only computed the first time it is requested.
+
+    :param scan: The DataArray instance of a single scan direction.
+    :param workers: Number of threads of the Fourier transforms (-1 uses all the CPUs).
+    :return: The TemplateMatcher instance of the scan direction.
+    """
+    matcher = _matchers.get(scan)
+    if matcher is None or matcher[0] is not scan.data:
+        matcher = (scan.data, TemplateMatcher(scan.data, workers))
+        _matchers[scan] = matcher
+    return matcher[1]
+
+
+def match_template(scan, template, min_score=0.6, min_distance=None, count=None):
+    """
+    Find the matches of a template within a single scan direction, with their positions in real units.
+
+    :param scan: The DataArray instance of a single scan direction.
+    :param template: 2D numpy array of the template, cut from a scan of the same pixel size.
+    :param min_score: Smallest score of a match.
+    :param min_distance: Radius (in pixels) within which only the best match is kept (if None, half of the smaller
+    side of the template is used).
+    :param count: Largest number of matches that are returned (if None, all the matches are returned).
+    :return: Dictionary of the 1D arrays of the centres of the matches ('x', 'y', in nm), the (row, column) of their
+    top left pixels ('row', 'col') and their 'scores', ordered from the best match.
+    """
+    peaks, scores = template_matcher(scan).match(template, min_score, min_distance, count)
+    rows, cols = np.shape(template)
+    return {'x': scan.info.get('xreal_min', 0) + (peaks[:, 1] + 0.5 * (cols - 1)) * scan.info['xinc'],
+            'y': scan.info.get('yreal_min', 0) + (peaks[:, 0] + 0.5 * (rows - 1)) * scan.info['yinc'],
+            'row': peaks[:, 0], 'col': peaks[:, 1], 'scores': scores}
@@ -1,12 +1,14 @@
-from scipy.optimize import leastsq
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.ndimage.interpolation import rotate
-from copy import deepcopy
+try:
+    from stm_analysis import topo_funcs as tf
+except ImportError:
+    import topo_funcs as tf
 
 class local_plane():
 
-    def __init__(self, file_data, x0, x1, y0, y1, scan_dir=0):
+    def __init__(self, file_data, x0, x1, y0, y1, scan_dir=0, order=1, mask=None):
         """
         Plane flatten an stm image by fitting to a defined area.
 
@@ -19,6 +21,12 @@ class local_plane():
 
         Optional Arguments
         :param scan_dir: flat file scan direction.
+        :param order: Order of the polynomial surface that is fitted (1 = plane).
+        :param mask: Boolean array of the pixels to be included in the fit.
+
+        For a plane (order=1), topo_plane_lsq holds the [p_x, p_y, p_z] pixel gradients and z offset, as before. For
+        higher orders there are no equivalent gradients, so topo_plane_lsq holds the coefficients of the
+        tf.poly_surface_terms, over the normalised co-ordinates of tf.poly_surface_fit.
         """
 
         x0 = self.nm2pnt(x0, file_data)
@@ -35,10 +43,13 @@ class local_plane():
 
         self.topo_data = file_data[scan_dir].data
 
-        self.param_init = [1, 1, 1]
+        self.order = order
 
-        self.topo_plane_lsq = leastsq(self.topo_plane_residuals, self.param_init,
-                                      args=(self.topo_data, x0, x1, y0, y1))[0]
+        self.topo_surface_coeffs = tf.poly_surface_fit(self.topo_data, order, roi=[x0, x1, y0, y1], mask=mask)
+        if order == 1:
+            self.topo_plane_lsq = self.plane_gradients(self.topo_surface_coeffs)
+        else:
+            self.topo_plane_lsq = self.topo_surface_coeffs
         self.topo_plane_fit = self.topo_plane_paramEval(self.topo_plane_lsq)
         self.topo_data_flattened = self.topo_data - self.topo_plane_fit
         self.topo_data_flattened = self.topo_data_flattened - np.amin(self.topo_data_flattened)
@@ -79,6 +90,21 @@ class local_plane():
         """
         return self.topo_data_flattened
 
+    def plane_gradients(self, coeffs):
+        """
+        Convert the coefficients of a first order surface fit into the x and y plane gradients and z offset.
+
+        :param coeffs: List of the [1, x, y] coefficients returned by the surface fit (normalised co-ordinates).
+        :return: List of the x, y gradients (per pixel) and z offset.
+        """
+        # The surface fit maps the pixel co-ordinates x onto (x - half) / scale, over the full image
+        x_half, y_half = 0.5 * (self.x_res - 1), 0.5 * (self.y_res - 1)
+        x_scale, y_scale = max(x_half, 1.), max(y_half, 1.)
+        self.p_x = coeffs[1] / x_scale
+        self.p_y = coeffs[2] / y_scale
+        self.p_z = coeffs[0] - self.p_x * x_half - self.p_y * y_half
+        return np.array([self.p_x, self.p_y, self.p_z])
+
     def topo_plane_residuals(self, param, topo_data, x0, x1, y0, y1):
         """
         Calculate the residuals between the real and fit generated data.
@@ -96,23 +122,20 @@ class local_plane():
         self.p_y = param[1]
         self.p_z = param[2]
 
-        self.diff = []
-        for y in range(y0, y1):
-            for x in range(x0, x1):
-                self.diff.append(topo_data[y, x] - (self.p_x*x + self.p_y*y + self.p_z))
+        y, x = np.mgrid[y0:y1, x0:x1]
+        self.diff = (topo_data[y0:y1, x0:x1] - (self.p_x*x + self.p_y*y + self.p_z)).ravel()
         return self.diff
 
     def topo_plane_paramEval(self, param):
         """
         Generate a plane from given parameters.
-        :param param: List of x, y gradients and z offset.
+        :param param: List of x, y gradients and z offset, or the surface coefficients for a higher order fit.
         :return: Generated plane data.
         """
-        # Create an empty numpy array with the same number as pixels as the real data.
-        self.topo_plane_fit_data = np.zeros((self.y_res, self.x_res))
-        for y in range(0, self.y_res):  # Iterate over the y-axis pixels.
-            for x in range(0, self.x_res):  # Iterate over the x-axis pixels.
-                self.topo_plane_fit_data[y, x] = param[0]*x + param[1]*y + param[2]  # Generate plane value.
+        if self.order == 1:
+            self.topo_plane_fit_data = param[0]*self.x_range[None, :] + param[1]*self.y_range[:, None] + param[2]
+        else:
+            self.topo_plane_fit_data = tf.poly_surface_eval(param, (self.y_res, self.x_res), self.order)
         return self.topo_plane_fit_data  # Return entire array.
 
 
@@ -216,23 +239,14 @@ def stm_rotate(flat_file, angle):
     :param angle: Rotation angle in degrees.
     :return: New flat file instance with rotated image data.
     """
-    flat_file_copy = deepcopy(flat_file)  # Create a deep copy of the flat file.
-
-    # For each scan direction in the flat file rotate the data by the given angle.
-    for scan_dir in flat_file_copy:
-        scan_dir.data = rotate(scan_dir.data, angle)
+    # Define the metadata pertinent to the new dimensions of the rotated image.
+    def rotated_info(info, data):
+        new_res = np.shape(data)  # Get the new pixel resolution from the rotated image.
+        return {'xres': new_res[1], 'yres': new_res[0],
+                'xreal': info['xinc'] * new_res[1], 'yreal': info['yinc'] * new_res[0]}
 
-    new_res = np.shape(flat_file_copy[0].data)  # Get the new pixel resolution from the rotated image.
-
-    # For each scan direction amend the metadata pertinent to the new dimensions.
-    for scan_dir in flat_file_copy:
-        scan_dir.info['xres'] = new_res[1]  # Set new x-axis pixel resolution.
-        scan_dir.info['yres'] = new_res[0]  # Set new y-axis pixel resolution.
-
-        scan_dir.info['xreal'] = scan_dir.info['xinc'] * new_res[1]  # Set new x-axis image size.
-        scan_dir.info['yreal'] = scan_dir.info['yinc'] * new_res[0]  # Set new y-axis image size.
-
-    return flat_file_copy  # Return the new amended flat file instance.
+    # For each scan direction in the flat file rotate the data by the given angle, sharing the untouched metadata.
+    return tf.TopoFile(flat_file).apply(lambda data: rotate(data, angle), info_func=rotated_info)
 
 
 def stm_crop(flat_file, xmin, xmax, ymin, ymax):
@@ -252,22 +266,16 @@ def stm_crop(flat_file, xmin, xmax, ymin, ymax):
     ymin = nm2pnt(ymin, flat_file, axis='y')
     ymax = nm2pnt(ymax, flat_file, axis='y')
 
-    flat_file_copy = deepcopy(flat_file)  # Create a new deep copy of the flat file.
-
-    # For each scan direction in the flat file crop the data and amend metadata.
-    for scan_dir in flat_file_copy:
-        scan_dir.data = scan_dir.data[ymin:ymax, xmin:xmax]  # Crop image data.
-
-        scan_dir.info['xres'] = xmax - xmin  # Set new x-axis pixel resolution.
-        scan_dir.info['yres'] = ymax - ymin  # Set new y-axis pixel resolution.
+    # Define the metadata pertinent to the new dimensions of the cropped image.
+    def cropped_info(info, data):
+        return {'xres': xmax - xmin, 'yres': ymax - ymin,
+                'xreal': info['xinc'] * (xmax - xmin), 'yreal': info['yinc'] * (ymax - ymin)}
 
-        scan_dir.info['xreal'] = scan_dir.info['xinc'] * scan_dir.info['xres']  # Set new x-axis image size.
-        scan_dir.info['yreal'] = scan_dir.info['yinc'] * scan_dir.info['yres']  # Set new y-axis image size.
+    # For each scan direction in the flat file crop the image data (as a view) and amend metadata.
+    return tf.TopoFile(flat_file).apply(lambda data: data[ymin:ymax, xmin:xmax], info_func=cropped_info)
 
-    return flat_file_copy  # Return new flat file instance.
 
-
-def profile(points, flat_file, num_points=100, scan_dir=0):
+def profile(points, flat_file, num_points=100, scan_dir=0, order=1):
     """
     Extract a line profile from the given falt file and list of x, y co-ordinates.
 
@@ -278,37 +286,11 @@ def profile(points, flat_file, num_points=100, scan_dir=0):
     Optional Arguments
     :param num_points: Number of points in the line profile data.
     :param scan_dir: Scan direction from which to take the line profile data.
+    :param order: Order of the spline interpolation; 0 for the nearest pixel, 1 for bilinear and 3 for cubic.
     :return: Line profile z-data, Line profile distance-data.
     """
-    length = 0
-    for p in range(len(points) - 1):
-        length += np.sqrt((points[p + 1, 0] - points[p, 0]) ** 2 + (points[p + 1, 1] - points[p, 0]) ** 2)
-
-    x_len = len(flat_file[scan_dir].data[0])
-    y_len = len(flat_file[scan_dir].data)
-
-    for point in range(len(points)):
-        points[point][0] = nm2pnt(points[point][0], flat_file, axis='x')
-        points[point][1] = nm2pnt(points[point][1], flat_file, axis='y')
-        if points[point][0] >= x_len:
-            points[point][0] = x_len - 1
-        if points[point][1] >= y_len:
-            points[point][1] = y_len - 1
-
-    def line(coords, flat_file):
-
-        x0, y0 = coords[0]
-        x1, y1 = coords[1]
-        num = num_points
-        x, y = np.linspace(x0, x1, num), np.linspace(y0, y1, num)
-
-        zi = flat_file[scan_dir].data[y.astype(np.int), x.astype(np.int)]
-
-        return zi
-
-    profile_data = np.array([])
-    for pair in range(len(points) - 1):
-        profile_data = np.append(profile_data, line([points[pair], points[pair + 1]], flat_file))
+    _, profile_data, length = tf.line_profile(flat_file[scan_dir].data, points, flat_file[scan_dir].info, num_points,
+                                              order)
 
     return profile_data, length
 
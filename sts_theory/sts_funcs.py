@@ -63,9 +63,10 @@ def iv(system, tip, sample, tunneling_matrix):
     Output:\n
     :return The tunneling current as a function of the voltage bias (I(V) curve).
     """
-    current = np.zeros(len(system.bias))
-    for i in np.arange(0, len(system.bias)):
-        current[i] = sint.simps(tip.DoSbiased[i] * sample.DoS * tunneling_matrix.tunn_element[i])
+    # The integrands of all the biases are formed together and integrated along the energy axis in a single call
+    integrand = np.asarray(tip.DoSbiased)[:len(system.bias)] * sample.DoS * \
+        np.asarray(tunneling_matrix.tunn_element)[:len(system.bias)]
+    current = sint.simpson(integrand, axis=-1)
     return current
 
 
@@ -197,12 +198,12 @@ class Tip(object):
         """
         # - Finding the unbiased, grounded density of states
         dos = abs(gradient * system.en + intercept)
-        self.DoSground = dos / sint.simps(dos)
+        self.DoSground = dos / sint.simpson(dos)
         # - Finding the biased density of states
         DOSbiased = np.zeros((len(system.bias), len(system.en)))
         for i in np.arange(0, len(system.bias)):
             dos = abs(gradient * (system.en - system.bias[i]) + intercept)
-            DOSbiased[i] = dos / sint.simps(dos)
+            DOSbiased[i] = dos / sint.simpson(dos)
         self.DoSbiased = DOSbiased
 
     def dos_gauss(self, system, mu=0, sigma=10):
@@ -217,12 +218,12 @@ class Tip(object):
         """
         # - Finding the unbiased, grounded density of states
         dos = gauss(system.en, mu, sigma)
-        self.DoSground = dos / sint.simps(dos)
+        self.DoSground = dos / sint.simpson(dos)
         # - Finding the biased density of states
         DOSbiased = np.zeros((len(system.bias), len(system.en)))
         for i in np.arange(0, len(system.bias)):
             dos = gauss(system.en + system.bias[i], mu, sigma)
-            DOSbiased[i] = dos / sint.simps(dos)
+            DOSbiased[i] = dos / sint.simpson(dos)
         self.DoSbiased = DOSbiased
 
     def dos_linewgauss(self, system, gradient=0, intercept=1, mu=0, sigma=0.2):
@@ -241,14 +242,14 @@ class Tip(object):
         dos_linear = abs(gradient * system.en + intercept)
         dos_gauss = gauss(system.en, mu, sigma)
         dos = dos_gauss + dos_linear
-        self.DoSground = dos / sint.simps(dos)
+        self.DoSground = dos / sint.simpson(dos)
         # - Finding the biased density of states
         DOSbiased = np.zeros((len(system.bias), len(system.en)))
         for i in np.arange(0, len(system.bias)):
             dos_linear = abs(gradient * (system.en - system.bias[i]) + intercept)
             dos_gauss = gauss(system.en - system.bias[i], mu, sigma)
             dos = dos_gauss + dos_linear
-            DOSbiased[i] = dos / sint.simps(dos)
+            DOSbiased[i] = dos / sint.simpson(dos)
         self.DoSbiased = DOSbiased
 
     def dos_data(self, system, x, y):
@@ -261,7 +262,7 @@ class Tip(object):
         :return .DoS: density of states based on a data-set.
         """
         f = spol.interp1d(x, y, kind="cubic")
-        self.DoS = f(system.en) / sint.simps(f(system.en))
+        self.DoS = f(system.en) / sint.simpson(f(system.en))
 
     def roc_data(self, v_bias, i_emission):
         """
@@ -322,7 +323,7 @@ class Sample(object):
         :return .DoS: Metallic; linear density of states.
         """
         dos = abs(gradient * system.en + intercept)
-        self.DoS = dos / sint.simps(dos)
+        self.DoS = dos / sint.simpson(dos)
 
     def dos_gauss(self, system, mu=0., sigma=10):
         """    
@@ -335,7 +336,7 @@ class Sample(object):
         :return .DoS: Metallic; gaussian density of states.
         """
         dos = gauss(system.en, mu, sigma)
-        self.DoS = dos / sint.simps(dos)
+        self.DoS = dos / sint.simpson(dos)
 
     def dos_step(self, system):
         """    
@@ -347,7 +348,7 @@ class Sample(object):
         egap_lhs = +1 * (self.egap / 2) - self.eoffset
         egap_rhs = -1 * (self.egap / 2) - self.eoffset
         dos = (-1 * np.sign(system.en + egap_lhs) + 1) + (np.sign(system.en + egap_rhs) + 1)
-        self.DoS = dos / sint.simps(dos)
+        self.DoS = dos / sint.simpson(dos)
 
     def dos_para(self, system, grad_lhs=1, grad_rhs=1):
         """    
@@ -375,7 +376,7 @@ class Sample(object):
         dos_rhs = grad_rhs * np.sqrt(np.abs(x_rhs - (self.egap / 2) - self.eoffset))
         # Appending all the density of states into a single array
         dos = np.append(np.append(dos_lhs, dos_mid), dos_rhs)
-        self.DoS = dos / sint.simps(dos)
+        self.DoS = dos / sint.simpson(dos)
 
     def dos_parass(self, system, grad_lhs=1, grad_rhs=1, ss_params=None):
         """    
@@ -416,7 +417,7 @@ class Sample(object):
             dos_ss = np.sum(dos_allss, axis=0)
         # Linear superposition of all density of states elements
         dos = dos_int + dos_ss
-        self.DoS = dos / sint.simps(dos)
+        self.DoS = dos / sint.simpson(dos)
 
     def dos_data(self, system, x, y):
         """    
@@ -429,7 +430,7 @@ class Sample(object):
         :return .DoS: density of states based on a data-set.
         """
         f = spol.interp1d(x, y, kind="cubic")
-        self.DoS = f(system.en) / sint.simps(f(system.en))
+        self.DoS = f(system.en) / sint.simpson(f(system.en))
 
 
 class TunnMatrix(object):
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import numpy as np
+
+# The modules of 'stm_analysis' and 'sts_theory' import their siblings by name
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'stm_analysis'))
+sys.path.insert(0, os.path.join(ROOT, 'sts_theory'))
+
+
+def hex_lattice(size, a, inc, angle=0., noise=0.3, seed=0):
+    """
+    Return a hexagonal lattice of unit cosine waves, with Gaussian noise.
+
+    :param size: Number of pixels along each axis.
+    :param a: Lattice constant, in nm.
+    :param inc: Pixel size, in nm.
+    :param angle: Angle of the lattice, in degrees.
+    :param noise: Standard deviation of the noise.
+    :param seed: Seed of the noise.
+    :return: 2D numpy array of the lattice.
+    """
+    y, x = np.mgrid[0:size, 0:size] * inc
+    b = 2 / np.sqrt(3) / a
+    lattice = np.zeros((size, size))
+    for k in range(3):
+        theta = np.radians(angle + 30 + 60 * k)
+        lattice += np.cos(2 * np.pi * b * (np.cos(theta) * x + np.sin(theta) * y))
+    return lattice + np.random.default_rng(seed).normal(0, noise, (size, size))
@@ -0,0 +1,43 @@
+import queue
+import threading
+
+import matplotlib
+matplotlib.use('Agg')
+
+import figure_render as fr
+
+
+class QueueLoop:
+    def __init__(self):
+        self.callbacks = queue.Queue()
+
+    def add_callback(self, callback):
+        self.callbacks.put(callback)
+
+
+def test_main_thread_call_from_worker(monkeypatch):
+    loop = QueueLoop()
+    monkeypatch.setattr(fr, '_kernel_loop', lambda: loop)
+    results = list()
+    worker = threading.Thread(target=lambda: results.append(fr.main_thread_call(threading.current_thread)))
+    worker.start()
+    # - The main thread runs the callbacks of its event loop, as the kernel would
+    loop.callbacks.get(timeout=5)()
+    worker.join(timeout=5)
+    assert results == [threading.main_thread()]
+
+
+def test_errors_persist_across_show():
+    display = fr.FigureDisplay()
+    live_fig = fr.LiveFigure((2, 2))
+    live_fig.fig.add_subplot(111).plot([0, 1])
+    scheduler = fr.RenderScheduler(lambda: 1 / 0, display, delay=None)
+    scheduler.submit()
+    for _ in range(2):
+        display.begin()
+        display.show(live_fig)
+        errors = [out for out in display.output.outputs if out['output_type'] == 'stream']
+        assert len(errors) == 1 and 'ZeroDivisionError' in errors[0]['text']
+    assert len(display.frame_times) == 2
+    display.clear_errors()
+    assert all(out['output_type'] == 'display_data' for out in display.output.outputs)
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+import scipy.integrate as sint
+
+import kernels as kn
+
+
+def test_parity():
+    # Every kernel of every installed backend matches the numpy reference kernels
+    results = kn.check_parity(shape=(128, 96))
+    assert set(results) == set(kn.BACKENDS)
+
+
+def test_benchmark():
+    times = kn.benchmark(shape=(128, 128), repeat=1)
+    for name in kn.BACKENDS:
+        assert set(times[name]) == {'row median', 'scars', 'maxima', 'simpson'}
+        assert all(value >= 0 for value in times[name].values())
+
+
+@pytest.mark.parametrize('using', sorted(kn.BACKENDS))
+def test_simpson(using):
+    y = np.random.default_rng(0).random((7, 101))
+    assert np.allclose(kn.simpson(y, 0.01, using=using), sint.simpson(y, dx=0.01, axis=-1))
+
+
+@pytest.mark.parametrize('using', sorted(kn.BACKENDS))
+def test_scar_mask(using):
+    topo_data = np.random.default_rng(0).normal(0, 0.01, (64, 64))
+    topo_data[20, 10:30] += 1.
+    mask = kn.scar_mask(topo_data, using=using)
+    assert np.array_equal(np.flatnonzero(mask[20]), np.arange(10, 30))
+    assert not mask[:, :10].any() and not mask[:, 30:].any()
+
+
+def test_iv():
+    sf = pytest.importorskip('sts_funcs')
+    system = type('System', (), {'bias': np.zeros(5)})
+    tip = type('Tip', (), {'DoSbiased': np.random.default_rng(0).random((5, 51))})
+    sample = type('Sample', (), {'DoS': np.linspace(0, 1, 51)})
+    matrix = type('Matrix', (), {'tunn_element': np.ones((5, 51))})
+    expected = [sint.simpson(tip.DoSbiased[i] * sample.DoS) for i in range(5)]
+    assert np.allclose(sf.iv(system, tip, sample, matrix), expected)
@@ -0,0 +1,25 @@
+import numpy as np
+
+import topo_funcs as tf
+
+INFO = {'xres': 128, 'yres': 128, 'xinc': 0.1, 'yinc': 0.1}
+
+
+def noisy_background(seed=0):
+    return np.random.default_rng(seed).normal(0, 1., (128, 128))
+
+
+def test_flat_topped_feature_has_one_peak():
+    y, x = np.mgrid[0:128, 0:128]
+    topo_data = noisy_background() + 12. * (np.hypot(x - 64, y - 64) < 10)
+    features = tf.detect_features(topo_data, INFO)
+    assert len(features['peaks']) == 1
+    assert features['peaks'][0] == 1
+
+
+def test_touching_features_have_two_peaks():
+    y, x = np.mgrid[0:128, 0:128]
+    bumps = np.exp(-((x - 56) ** 2 + (y - 64) ** 2) / 50.) + np.exp(-((x - 72) ** 2 + (y - 64) ** 2) / 50.)
+    features = tf.detect_features(noisy_background() + 20. * bumps, INFO)
+    assert len(features['peaks']) == 1
+    assert features['peaks'][0] == 2
@@ -0,0 +1,50 @@
+import numpy as np
+
+import flatfile_3 as ff
+import topo_funcs as tf
+import topo_mosaic as tm
+
+
+def scan(offset, size=64, inc=0.1, seed=0):
+    info = {'xinc': inc, 'yinc': inc, 'xres': size, 'yres': size, 'offset': [offset]}
+    return ff.DataArray(np.random.default_rng(seed).random((size, size)), info)
+
+
+def test_grid_shape():
+    # An extent of a whole number of pixels, up to floating point error, has no extra row or column
+    assert tm.grid_shape(0., 6.3 + 1e-12, 0., 6.3 - 1e-12, 0.1) == (64, 64)
+    assert tm.grid_shape(0.3, 0.7, 0.1, 0.2, 0.1) == (2, 5)
+
+
+def test_save_matches_render(tmp_path):
+    # Two scans that overlap by half their width, with offsets (in metres) that are not exact in floating point
+    mosaic = tm.Mosaic([scan((0.1e-9, 0.3e-9)), scan((3.3e-9, 0.3e-9), seed=1)])
+    store = mosaic.save(str(tmp_path), tile_size=32)
+    rendered = mosaic.render(*mosaic.extent())
+    assert tuple(store.levels[0]['shape']) == rendered.shape
+    stored = store.read(*mosaic.extent())
+    assert stored.shape == rendered.shape
+    assert not np.isnan(stored[:, -1]).any() and not np.isnan(stored[-1]).any()
+    assert np.allclose(stored, rendered, atol=1e-6)
+
+
+def test_store_histogram_is_full_resolution(tmp_path):
+    mosaic = tm.Mosaic([scan((0., 0.)), scan((3.2e-9, 0.), seed=1)])
+    store = mosaic.save(str(tmp_path), tile_size=32)
+    rendered = mosaic.render(*mosaic.extent())
+    full = tf.HeightHistogram(rendered[np.isfinite(rendered)])
+    streamed = tf.HeightHistogram.from_blocks(store.tiles)
+    assert streamed.size == full.size
+    assert np.allclose(streamed.percentile([0.5, 50, 99.5]), full.percentile([0.5, 50, 99.5]), atol=1e-6)
+    assert np.isclose(streamed.rq, full.rq, rtol=1e-5)
+
+
+def test_export_viewer_is_self_contained(tmp_path):
+    store = tm.Mosaic([scan((0., 0.), size=300)]).save(str(tmp_path / 'store'), tile_size=128)
+    path = str(tmp_path / 'scan')
+    tm.export_deepzoom(store, path, tile_size=64, workers=1)
+    with open(path + '.html') as html_file:
+        html = html_file.read()
+    assert 'http' not in html and '<script src' not in html
+    assert '"scan_files/"' in html and 'width: 300' in html and 'maxLevel: 9' in html
+    assert (tmp_path / 'scan_files' / '9' / '4_4.png').exists()
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+import flatfile_3 as ff
+import topo_funcs as tf
+import topo_pipeline as tp
+from conftest import hex_lattice
+
+
+def lattice_file(size=256, inc=0.05, noise=0., seed=0):
+    info = {'xres': size, 'yres': size, 'xinc': inc, 'yinc': inc, 'xreal': size * inc, 'yreal': size * inc,
+            'xreal_min': 0, 'yreal_min': 0}
+    topo_data = hex_lattice(size, 0.5, inc, noise=noise, seed=seed) * 1e-10
+    return tf.TopoFile([ff.DataArray(topo_data, info)])
+
+
+def test_bragg_filter_of_rotated_scan():
+    sa = pytest.importorskip('stm_analysis')
+    clean, noisy = lattice_file(), lattice_file(noise=3., seed=1)
+    recipe = tp.TopoPipeline().level('None').rotate(20)
+    # The Bragg terms are read from an analysis of the noisy scan, whose final image is rotated
+    stt = object.__new__(sa.STT)
+    stt.image_recipe, stt.stage_cache, stt.flat_files = recipe, tp.StageCache(), ['noisy']
+    stt.selected_pos, stt.scan_dir, stt.selected_data = 0, 0, noisy
+    fft = object.__new__(sa.STT_fft)
+    fft.analysis, fft.window, fft.alpha = stt, 'Hann', 0.25
+    terms = fft.bragg_terms(radius=0.3)
+    assert len(terms[0][1]) == 6
+    filtered = tp.TopoPipeline().level('None').fourier(terms).rotate(20).evaluate(noisy)[0].data
+    expected = recipe.evaluate(clean)[0].data
+    inside = np.isfinite(filtered) & (expected != 0)
+    assert np.corrcoef(filtered[inside], expected[inside])[0, 1] > 0.9
+
+
+def test_unfiltered():
+    recipe = tp.TopoPipeline().remove_scars().level('Line-wise').fourier([('lowpass', 2.)]).rotate(20)
+    assert [name for name, _ in recipe.unfiltered().operations] == ['scars', 'level']
+
+
+def test_lazy_scans():
+    evaluated = list()
+    scans = tp.LazyScans(4, lambda scan_dir: evaluated.append(scan_dir) or scan_dir * 10)
+    assert len(scans) == 4 and scans[2] == 20 and scans[-1] == 30 and scans[2] == 20
+    assert evaluated == [2, 3]
+    assert list(scans) == [0, 10, 20, 30] and scans[1:3] == [10, 20]
+    with pytest.raises(IndexError):
+        scans[4]
@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+import topo_spectrum as ts
+from conftest import hex_lattice
+
+
+@pytest.mark.parametrize('size, a, inc', [(256, 0.384, 0.022), (512, 0.384, 0.022), (256, 0.384, 0.05)])
+def test_lattice_constant(size, a, inc):
+    # The first ring of a 256 pixel scan with 0.022 nm pixels is only 17 pixels from the centre
+    spectrum = ts.PowerSpectrum(hex_lattice(size, a, inc), inc, inc)
+    lattice = ts.lattice_parameters(spectrum)
+    assert lattice['order'] == 6
+    assert lattice['a'] == pytest.approx(a, rel=0.01)
+
+
+def test_no_peaks_in_noise():
+    for seed in range(10):
+        noise = np.random.default_rng(seed).normal(size=(256, 256))
+        peaks, ratios = ts.find_peaks(ts.PowerSpectrum(noise, 0.02, 0.02))
+        assert len(peaks) == 0
@@ -0,0 +1,36 @@
+import subprocess
+import sys
+
+import numpy as np
+
+from conftest import ROOT
+
+
+class Scan:
+    def __init__(self, data):
+        y_res, x_res = data.shape
+        self.data = data
+        self.info = {'xres': x_res, 'yres': y_res, 'xinc': 0.1, 'yinc': 0.1}
+
+
+def test_import_leaves_sys_path_alone():
+    code = ("import sys; path = list(sys.path); import stm_topography_analysis as sta; "
+            "assert sys.path == path; print(sta.tf.__name__)")
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip() == 'stm_analysis.topo_funcs'
+
+
+def test_local_plane_keeps_pixel_gradients(monkeypatch):
+    # - nm2pnt still uses np.int, which was removed in numpy 1.24
+    monkeypatch.setattr(np, 'int', int, raising=False)
+    import stm_topography_analysis as sta
+    y, x = np.mgrid[0:60, 0:80]
+    data = 2e-11 * x - 3e-11 * y + 1e-9
+    data[40:, 60:] += 1e-9
+    plane = sta.local_plane([Scan(data)], 0.5, 5.0, 0.5, 3.5)
+    np.testing.assert_allclose(plane.topo_plane_lsq, [2e-11, -3e-11, 1e-9], rtol=1e-8)
+    residuals = plane.topo_plane_residuals(plane.topo_plane_lsq, data, 5, 50, 5, 35)
+    assert residuals.shape == (45 * 30,)
+    np.testing.assert_allclose(residuals, 0, atol=1e-20)
+    np.testing.assert_allclose(plane.get_data()[:40, :60], 0, atol=1e-20)